@@ -0,0 +1,176 @@
+# analytics.py
+from typing import Dict, List, Optional
+
+# Imported on first use: NumPy alone adds ~50 ms to every worker start
+np = None
+
+from columnar import ColumnarStore
+
+PERCENTILES = (25, 50, 75, 90)
+# Buckets for current_resale / cost
+RATIO_BINS = (0.0, 0.25, 0.5, 0.75, 1.0, 1.25)
+
+
+def _import_numpy() -> bool:
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:  # analytics are optional; the rest of the app runs without NumPy
+            return False
+        np = numpy
+    return True
+
+
+class InventoryAnalytics:
+    """Grouped valuation statistics computed with NumPy.
+
+    The tracker's records are converted to arrays once and cached until the
+    next mutation calls ``invalidate``; every statistic is then a vectorized
+    pass over those arrays rather than a Python loop over the items.
+    """
+
+    def __init__(self, records):
+        self._records = records
+        self._arrays: Optional[Dict] = None
+        self._summaries: Dict[int, Dict] = {}
+
+    @staticmethod
+    def available() -> bool:
+        return _import_numpy()
+
+    def invalidate(self):
+        """Drop the cached arrays; called by the tracker on every mutation"""
+        self._arrays = None
+        self._summaries = {}
+
+    def _build_arrays(self) -> Dict:
+        records = self._records
+        count = len(records)
+        ids = np.fromiter(records.keys(), dtype=np.int64, count=count)
+        arrays = {'ids': ids}
+        if isinstance(records, ColumnarStore):
+            # Slice the packed columns directly instead of visiting each record
+            rows = np.fromiter(records.live_rows(), dtype=np.int64, count=count)
+            for field, key in (('cost', 'cost'), ('current_retail', 'retail'),
+                               ('current_resale', 'resale')):
+                arrays[key] = np.frombuffer(records.column(field), dtype=np.float64)[rows]
+            for field in ('condition', 'resale_location'):
+                arrays[field] = self._decode(records, rows, field)
+            dates = np.array(records.text_column('purchase_date'), dtype=object)[rows]
+        else:
+            for field, key in (('cost', 'cost'), ('current_retail', 'retail'),
+                               ('current_resale', 'resale')):
+                arrays[key] = np.fromiter((item[field] for item in records.values()),
+                                          dtype=np.float64, count=count)
+            for field in ('condition', 'resale_location'):
+                arrays[field] = np.unique(
+                    np.array([item.get(field) or '' for item in records.values()], dtype='U'),
+                    return_inverse=True)
+            dates = np.array([item.get('purchase_date') for item in records.values()], dtype=object)
+        dates[dates == None] = ''  # noqa: E711 (elementwise)
+        # Group labels and per-item group codes, shared by every summary
+        arrays['purchase_year'] = np.unique(dates.astype('U4'), return_inverse=True)
+        return arrays
+
+    @staticmethod
+    def _decode(records: ColumnarStore, rows, field: str):
+        """Labels and per-item group codes of a dictionary-encoded column,
+        grouped on the integer codes and decoded once per distinct value"""
+        codes, symbols = records.encoded_column(field)
+        used, inverse = np.unique(np.frombuffer(codes, dtype=np.uint32)[rows],
+                                  return_inverse=True)
+        # None and '' share a label, so regroup the few decoded names
+        names = np.array([symbols[code] or '' for code in used], dtype='U')
+        labels, merged = np.unique(names, return_inverse=True)
+        return labels, merged[inverse]
+
+    def _get_arrays(self) -> Dict:
+        if self._arrays is None:
+            _import_numpy()
+            self._arrays = self._build_arrays()
+        return self._arrays
+
+    @staticmethod
+    def _percentiles(values) -> Dict[str, float]:
+        if not len(values):
+            return {f'p{p}': 0.0 for p in PERCENTILES}
+        return {f'p{p}': float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+    def _group_stats(self, arrays: Dict, key: str) -> List[Dict]:
+        labels, codes = arrays[key]
+        if not len(labels):
+            return []
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        counts = np.diff(np.r_[starts, len(order)])
+        cost = arrays['cost'][order]
+        retail = arrays['retail'][order]
+        resale = arrays['resale'][order]
+        total_cost = np.add.reduceat(cost, starts)
+        total_retail = np.add.reduceat(retail, starts)
+        total_resale = np.add.reduceat(resale, starts)
+        groups = []
+        for i, start in enumerate(starts):
+            end = start + counts[i]
+            groups.append({
+                key: str(labels[sorted_codes[start]]),
+                'count': int(counts[i]),
+                'total_cost': float(total_cost[i]),
+                'total_retail': float(total_retail[i]),
+                'total_resale': float(total_resale[i]),
+                'profit_loss': float(total_resale[i] - total_cost[i]),
+                'cost_percentiles': self._percentiles(cost[start:end]),
+                'resale_percentiles': self._percentiles(resale[start:end]),
+            })
+        return groups
+
+    def _depreciation(self, arrays: Dict) -> Dict:
+        cost = arrays['cost']
+        priced = cost > 0
+        ratios = arrays['resale'][priced] / cost[priced]
+        edges = np.array(RATIO_BINS + (np.inf,))
+        counts, _ = np.histogram(ratios, bins=edges)
+        buckets = [{'min': float(lo), 'max': None if np.isinf(hi) else float(hi), 'count': int(n)}
+                   for lo, hi, n in zip(edges[:-1], edges[1:], counts)]
+        return {
+            'count': int(len(ratios)),
+            'mean': float(ratios.mean()) if len(ratios) else 0.0,
+            'percentiles': self._percentiles(ratios),
+            'histogram': buckets,
+        }
+
+    def _top_losers(self, arrays: Dict, limit: int) -> List[Dict]:
+        loss = arrays['cost'] - arrays['resale']
+        if not len(loss) or limit <= 0:
+            return []
+        limit = min(limit, len(loss))
+        top = np.argpartition(-loss, limit - 1)[:limit]
+        top = top[np.lexsort((-arrays['ids'][top], -loss[top]))]
+        losers = []
+        for i in top:
+            equipment = self._records[int(arrays['ids'][i])]
+            losers.append({
+                'id': int(arrays['ids'][i]),
+                'description': equipment.get('description', ''),
+                'cost': float(arrays['cost'][i]),
+                'current_resale': float(arrays['resale'][i]),
+                'loss': float(loss[i]),
+            })
+        return losers
+
+    def summary(self, top: int = 10) -> Dict:
+        """Totals and percentiles by condition, location and purchase year,
+        resale/cost ratio distribution and the ``top`` biggest losers"""
+        if top in self._summaries:
+            return self._summaries[top]
+        arrays = self._get_arrays()
+        summary = self._summaries[top] = {
+            'by_condition': self._group_stats(arrays, 'condition'),
+            'by_resale_location': self._group_stats(arrays, 'resale_location'),
+            'by_purchase_year': self._group_stats(arrays, 'purchase_year'),
+            'depreciation': self._depreciation(arrays),
+            'top_losers': self._top_losers(arrays, top),
+        }
+        return summary
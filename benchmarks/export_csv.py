@@ -0,0 +1,76 @@
+# export_csv.py
+"""Time-to-first-byte and peak memory of the /export/csv route.
+
+Usage: python benchmarks/export_csv.py [item_count ...]
+"""
+import gc
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import write_inventory
+
+
+def load_export_app():
+    """Import equiptment-with-exports.py (its name is not a valid module name)"""
+    spec = importlib.util.spec_from_file_location(
+        'equipment_exports', os.path.join(ROOT, 'equiptment-with-exports.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(client, url: str, buffered: bool):
+    """Return (time to first byte, total time, peak traced bytes, body size)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(url, buffered=False)
+    chunks = iter(response.response)
+    size = 0
+    first_byte = None
+    if buffered:
+        # What the old implementation did: build the whole body, then send
+        body = b''.join(chunks)
+        first_byte = time.perf_counter() - start
+        size = len(body)
+    else:
+        for chunk in chunks:
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(chunk)
+    total = time.perf_counter() - start
+    response.close()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first_byte, total, peak, size
+
+
+def main(counts):
+    workdir = tempfile.mkdtemp(prefix='ham-gear-bench-')
+    os.chdir(workdir)  # the app loads equipment_data.json from the cwd
+    exports = load_export_app()
+    from equipment import EquipmentTracker
+    print(f"{'items':>9} {'mode':>9} {'ttfb ms':>9} {'total ms':>9} {'peak MiB':>9} {'bytes':>12}")
+    for count in counts:
+        data_file = f'inventory_{count}.json'
+        write_inventory(data_file, count)
+        # The route reads the module-level tracker on every request
+        exports.tracker = EquipmentTracker(data_file)
+        client = exports.app.test_client()
+        for label, url, buffered in (('buffered', '/export/csv', True),
+                                     ('streamed', '/export/csv', False),
+                                     ('gzip', '/export/csv?gzip=1', False)):
+            ttfb, total, peak, size = measure(client, url, buffered)
+            print(f"{count:>9} {label:>9} {ttfb * 1000:>9.1f} {total * 1000:>9.1f} "
+                  f"{peak / 2**20:>9.1f} {size:>12}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 100000])
@@ -0,0 +1,449 @@
+# loadtest.py
+"""Drive a locally started app with concurrent readers and writers, then
+check the data file it leaves behind.
+
+The server gets a fresh synthetic equipment_data.json in a scratch
+directory. It runs as the Flask server with threads, or with
+``--workers N`` as gunicorn with N processes sharing the file. Each
+client thread sends a weighted mix of page views, searches, summaries,
+exports and add/edit/delete form posts over its own keep-alive
+connection. The run reports throughput, latency percentiles and error
+rates per operation.
+
+Then the server is stopped and the data file and journal are replayed
+and checked:
+- the file parses and ids are unique
+- every add that succeeded is there exactly once
+- every deleted item is gone
+- every edited item holds the last value written to it
+- the item count matches /api/summary
+The exit status is 1 if anything failed.
+
+Usage:
+    python benchmarks/loadtest.py [--clients 16] [--duration 30] [--items 1000]
+        [--mix dashboard=35,search=25,summary=20,export=5,add=7,edit=6,delete=2]
+        [--workers N] [--journal] [--output report.json]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from journal import ChangeJournal
+from synthetic import CONDITIONS, LOCATIONS, MAKERS, write_inventory
+
+DEFAULT_MIX = 'dashboard=35,search=25,summary=20,export=5,add=7,edit=6,delete=2'
+READS = {
+    'dashboard': '/',
+    'search': '/search?q={query}',
+    'summary': '/api/summary',
+    'export': '/export/csv',
+}
+WRITES = ('add', 'edit', 'delete')
+SEARCH_TERMS = ['yaesu', 'icom ic', 'kenwood', 'qrz', 'excellent', 'openspot', 'kx']
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in READS and name not in WRITES:
+            raise argparse.ArgumentTypeError(f"unknown operation: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workdir: str, port: int, workers: int, env: Dict[str, str]) -> subprocess.Popen:
+    """Serve wsgi.py from ``workdir`` so it uses the scratch data file.
+
+    The server's output goes to ``server.log`` there: the access log alone
+    would fill a pipe nobody reads and stall the server.
+    """
+    if workers:
+        command = [sys.executable, '-m', 'gunicorn', '--pythonpath', ROOT,
+                   '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+                   '--workers', str(workers), '--bind', f'127.0.0.1:{port}']
+    else:
+        command = [sys.executable, '-c',
+                   'import sys; sys.path.insert(0, sys.argv[1]); from wsgi import app; '
+                   'app.run(host="127.0.0.1", port=int(sys.argv[2]), threaded=True)',
+                   ROOT, str(port)]
+    with open(server_log(workdir), 'wb') as log:
+        return subprocess.Popen(command, cwd=workdir, env=env,
+                                stdout=log, stderr=subprocess.STDOUT)
+
+
+def server_log(workdir: str) -> str:
+    return os.path.join(workdir, 'server.log')
+
+
+def log_tail(workdir: str, lines: int = 40) -> str:
+    """The last lines the server wrote"""
+    try:
+        with open(server_log(workdir), 'rb') as f:
+            f.seek(max(0, os.path.getsize(f.name) - 64 * 1024))
+            text = f.read().decode(errors='replace')
+    except OSError:
+        return ''
+    return '\n'.join(text.splitlines()[-lines:])
+
+
+def wait_until_ready(server: subprocess.Popen, port: int, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError('server exited')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/api/summary')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'server not ready after {timeout}s')
+
+
+class Client(threading.Thread):
+    """One simulated user with a keep-alive connection"""
+
+    def __init__(self, index: int, run: 'LoadRun'):
+        super().__init__(daemon=True)
+        self.index = index
+        self.run_state = run
+        self.rng = random.Random(index)
+        self.connection: Optional[http.client.HTTPConnection] = None
+        self.added = 0
+
+    def _request(self, method: str, path: str, body: Optional[str] = None) -> Tuple[int, bytes]:
+        headers = {}
+        if body is not None:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        for attempt in (1, 2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection('127.0.0.1', self.run_state.port,
+                                                             timeout=60)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # The server may have closed an idle keep-alive connection.
+                # Only reads are retried; a write may already have happened.
+                self.connection.close()
+                self.connection = None
+                if attempt == 2 or method != 'GET':
+                    raise
+
+    def run(self):
+        run = self.run_state
+        names = list(run.mix)
+        weights = [run.mix[name] for name in names]
+        while not run.stop.is_set():
+            operation = self.rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                ok = getattr(self, f'_do_{operation}', self._do_read)(operation)
+            except (OSError, http.client.HTTPException) as e:
+                ok = False
+                run.note_error(operation, repr(e))
+            run.record(operation, time.perf_counter() - start, ok)
+
+    def _do_read(self, operation: str) -> bool:
+        path = READS[operation].format(query=self.rng.choice(SEARCH_TERMS).replace(' ', '+'))
+        status, _ = self._request('GET', path)
+        if status != 200:
+            self.run_state.note_error(operation, f'HTTP {status}')
+        return status == 200
+
+    def _form(self, description: str, resale_location: str) -> str:
+        maker = self.rng.choice(list(MAKERS))
+        cost = round(self.rng.uniform(40, 4000), 2)
+        return urlencode({
+            'description': description or f"{maker} {self.rng.choice(MAKERS[maker])}",
+            'cost': cost,
+            'purchase_date': '2024-05-01',
+            'current_retail': round(cost * 1.1, 2),
+            'current_resale': round(cost * 0.7, 2),
+            'resale_location': resale_location or self.rng.choice(LOCATIONS),
+            'condition': self.rng.choice(CONDITIONS),
+        })
+
+    def _do_add(self, operation: str) -> bool:
+        # The form redirects on success and re-renders itself on failure
+        marker = f'Load test {self.run_state.run_id} c{self.index} #{self.added}'
+        self.added += 1
+        status, _ = self._request('POST', '/add', self._form(marker, ''))
+        if status == 302:
+            self.run_state.added.append(marker)
+            return True
+        self.run_state.note_error(operation, f'HTTP {status}')
+        return False
+
+    def _do_edit(self, operation: str) -> bool:
+        # Each client edits only its own share of ids, so the last value it
+        # wrote to an id is the value that id must end up with
+        ids = self.run_state.edit_ids[self.index]
+        if not ids:
+            return self._do_read('summary')
+        equipment_id = self.rng.choice(ids)
+        value = f'edited {self.run_state.run_id} c{self.index} {time.monotonic_ns()}'
+        status, _ = self._request('POST', f'/edit/{equipment_id}', self._form('', value))
+        if status == 302:
+            self.run_state.edited[equipment_id] = value
+            return True
+        self.run_state.note_error(operation, f'HTTP {status}')
+        return False
+
+    def _do_delete(self, operation: str) -> bool:
+        try:
+            equipment_id = self.run_state.delete_ids.pop()
+        except IndexError:
+            return self._do_read('summary')
+        status, _ = self._request('GET', f'/delete/{equipment_id}')
+        if status == 302:
+            self.run_state.deleted.append(equipment_id)
+            return True
+        self.run_state.note_error(operation, f'HTTP {status}')
+        return False
+
+
+class LoadRun:
+    """Shared state of one load test: what the clients did and how long it took"""
+
+    def __init__(self, port: int, mix: Dict[str, int], clients: int, initial_ids: List[int]):
+        self.port = port
+        self.mix = mix
+        self.run_id = uuid.uuid4().hex[:8]
+        self.stop = threading.Event()
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.failures: Dict[str, int] = defaultdict(int)
+        self.error_samples: Dict[str, List[str]] = defaultdict(list)
+        # Disjoint id sets: deletes take from the top, each client edits
+        # its own residue class of the rest
+        ids = sorted(initial_ids)
+        split = len(ids) // 5
+        self.delete_ids = ids[len(ids) - split:]
+        editable = ids[:len(ids) - split]
+        self.edit_ids = [[equipment_id for equipment_id in editable
+                          if equipment_id % clients == index] for index in range(clients)]
+        self.added: List[str] = []
+        self.edited: Dict[int, str] = {}
+        self.deleted: List[int] = []
+
+    def record(self, operation: str, seconds: float, ok: bool):
+        with self._lock:
+            self.latencies[operation].append(seconds)
+            if not ok:
+                self.failures[operation] += 1
+
+    def note_error(self, operation: str, message: str):
+        with self._lock:
+            if len(self.error_samples[operation]) < 5:
+                self.error_samples[operation].append(message)
+
+    def report(self, elapsed: float) -> Dict:
+        operations = {}
+        for operation, timings in sorted(self.latencies.items()):
+            timings = sorted(timings)
+            operations[operation] = {
+                'requests': len(timings),
+                'errors': self.failures[operation],
+                'error_rate': self.failures[operation] / len(timings),
+                'throughput_rps': len(timings) / elapsed,
+                'p50_ms': _percentile(timings, 0.50) * 1000,
+                'p95_ms': _percentile(timings, 0.95) * 1000,
+                'p99_ms': _percentile(timings, 0.99) * 1000,
+                'max_ms': timings[-1] * 1000,
+                'error_samples': self.error_samples.get(operation, []),
+            }
+        total = sum(len(timings) for timings in self.latencies.values())
+        errors = sum(self.failures.values())
+        return {
+            'elapsed_s': elapsed,
+            'requests': total,
+            'errors': errors,
+            'error_rate': errors / total if total else 0.0,
+            'throughput_rps': total / elapsed,
+            'operations': operations,
+        }
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def fetch_count(port: int) -> int:
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    connection.request('GET', '/api/summary')
+    return json.loads(connection.getresponse().read())['count']
+
+
+def verify(data_file: str, run: LoadRun, initial_count: int, served_count: int) -> List[str]:
+    """Check the files on disk against what the clients know they did;
+    returns the problems found"""
+    problems = []
+    try:
+        with open(data_file) as f:
+            snapshot = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        return [f'data file unreadable: {e}']
+    ids = [item.get('id') for item in snapshot]
+    if len(ids) != len(set(ids)):
+        problems.append('duplicate ids in the data file')
+    records = ChangeJournal(data_file).replay(snapshot)
+    by_id = {item['id']: item for item in records}
+    if len(by_id) != len(records):
+        problems.append('duplicate ids after replaying the journal')
+
+    for item in records:
+        missing = [field for field in ('description', 'cost', 'condition') if field not in item]
+        if missing or not isinstance(item.get('cost'), (int, float)):
+            problems.append(f"item {item.get('id')} is malformed")
+            break
+
+    descriptions = defaultdict(int)
+    for item in records:
+        descriptions[item['description']] += 1
+    lost = [marker for marker in run.added if descriptions[marker] != 1]
+    if lost:
+        problems.append(f'{len(lost)} successful adds missing or duplicated, e.g. {lost[0]!r}')
+    survivors = [equipment_id for equipment_id in run.deleted if equipment_id in by_id]
+    if survivors:
+        problems.append(f'{len(survivors)} deleted items still present, e.g. id {survivors[0]}')
+    stale = [equipment_id for equipment_id, value in run.edited.items()
+             if equipment_id in by_id and by_id[equipment_id].get('resale_location') != value]
+    if stale:
+        problems.append(f'{len(stale)} edits lost, e.g. id {stale[0]}')
+
+    expected = initial_count + len(run.added) - len(run.deleted)
+    if len(records) != expected:
+        problems.append(f'{len(records)} items on disk, expected {expected}')
+    if served_count != len(records):
+        problems.append(f'/api/summary reported {served_count} items, disk has {len(records)}')
+
+    meta_file = data_file + '.meta'
+    if os.path.exists(meta_file) and by_id:
+        with open(meta_file) as f:
+            next_id = json.load(f).get('next_id', 0)
+        if next_id <= max(by_id):
+            problems.append(f'id high-water mark {next_id} is not above the largest id {max(by_id)}')
+    return problems
+
+
+def print_report(report: Dict, problems: List[str]):
+    print(f"{'operation':<10} {'requests':>9} {'errors':>7} {'rps':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for operation, stats in report['operations'].items():
+        print(f"{operation:<10} {stats['requests']:>9} {stats['errors']:>7} "
+              f"{stats['throughput_rps']:>9.1f} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+              f"{stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+        for sample in stats['error_samples']:
+            print(f"{'':<10}   {sample}")
+    print(f"\n{report['requests']} requests in {report['elapsed_s']:.1f}s: "
+          f"{report['throughput_rps']:.1f} req/s, error rate {report['error_rate']:.2%}")
+    if problems:
+        print('\nData check FAILED:')
+        for problem in problems:
+            print(f'  - {problem}')
+    else:
+        print('Data check passed')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30, help='seconds of load')
+    parser.add_argument('--items', type=int, default=1000, help='synthetic inventory size')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'operation weights (default {DEFAULT_MIX})')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='serve with gunicorn and this many worker processes')
+    parser.add_argument('--journal', action='store_true', help='run the server with EQUIPMENT_JOURNAL=1')
+    parser.add_argument('--output', help='write the report as JSON here')
+    parser.add_argument('--keep', action='store_true', help='keep the scratch directory')
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+
+    workdir = tempfile.mkdtemp(prefix='ham-gear-load-')
+    data_file = os.path.join(workdir, 'equipment_data.json')
+    write_inventory(data_file, args.items)
+    env = {key: value for key, value in os.environ.items() if not key.startswith('EQUIPMENT_')}
+    env['EQUIPMENT_TEMPLATE_CACHE'] = os.path.join(workdir, 'jinja')
+    if args.journal:
+        env['EQUIPMENT_JOURNAL'] = '1'
+
+    port = free_port()
+    server = start_server(workdir, port, args.workers, env)
+    failed = True
+    try:
+        wait_until_ready(server, port)
+        run = LoadRun(port, args.mix, args.clients, list(range(1, args.items + 1)))
+        clients = [Client(index, run) for index in range(args.clients)]
+        print(f"{args.clients} clients for {args.duration:g}s against "
+              f"{'gunicorn x%d' % args.workers if args.workers else 'the Flask server'}, "
+              f"{args.items} items{' (journal)' if args.journal else ''}", flush=True)
+        started = time.perf_counter()
+        for client in clients:
+            client.start()
+        time.sleep(args.duration)
+        run.stop.set()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - started
+        served_count = fetch_count(port)
+        failed = False
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        if failed:
+            print(f'Server log ({server_log(workdir)}):\n{log_tail(workdir)}', file=sys.stderr)
+
+    # Background compaction may still be finishing when SIGTERM arrives;
+    # replaying the journal covers whatever it left behind
+    problems = verify(data_file, run, args.items, served_count)
+    report = run.report(elapsed)
+    report['data_check'] = {'passed': not problems, 'problems': problems}
+    print_report(report, problems)
+    if problems or report['errors']:
+        print(f'\nLast lines of the server log:\n{log_tail(workdir)}')
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.keep:
+        print(f'Scratch directory kept: {workdir}')
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(1 if problems or report['errors'] else 0)
+
+
+if __name__ == '__main__':
+    main()
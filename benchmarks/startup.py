@@ -0,0 +1,74 @@
+# startup.py
+"""Cold-start time of the web app: import, then the first dashboard request.
+
+Each run is a fresh interpreter, like a worker restarted by the process
+manager. The first run starts with an empty template bytecode cache; the
+others reuse what it wrote.
+
+Usage: python benchmarks/startup.py [item_count] [runs]
+"""
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def child():
+    """Measure one start-up inside this process and print it as JSON"""
+    start = time.perf_counter()
+    from export_csv import load_export_app
+    exports = load_export_app()
+    imported = time.perf_counter()
+    client = exports.app.test_client()
+    response = client.get('/')
+    assert response.status_code == 200, response.status_code
+    first = time.perf_counter()
+    client.get('/search?q=yaesu')
+    second = time.perf_counter()
+    print(json.dumps({'import': imported - start, 'first_request': first - imported,
+                      'second_request': second - first}))
+
+
+def run_once(workdir: str, env: dict) -> dict:
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'],
+                            cwd=workdir, env=env, check=True, capture_output=True,
+                            text=True).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings['process'] = time.perf_counter() - start
+    return timings
+
+
+def main(count: int, runs: int):
+    from synthetic import write_inventory
+    workdir = tempfile.mkdtemp(prefix='ham-gear-startup-')
+    write_inventory(os.path.join(workdir, 'equipment_data.json'), count)
+    cache_dir = os.path.join(workdir, 'jinja-cache')
+    env = dict(os.environ, EQUIPMENT_TEMPLATE_CACHE=cache_dir)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    results = [run_once(workdir, env) for _ in range(runs)]
+    print(f"{count} items, {runs} runs (ms)")
+    print(f"{'':>16} {'import':>9} {'1st req':>9} {'2nd req':>9} {'process':>9}")
+    keys = ('import', 'first_request', 'second_request', 'process')
+    rows = [('first run', results[0])]
+    if runs > 1:
+        rows.append(('median of rest', {key: statistics.median(r[key] for r in results[1:])
+                                        for key in keys}))
+    for label, timings in rows:
+        print(f"{label:>16} " + ' '.join(f"{timings[key] * 1000:>9.1f}" for key in keys))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--child']:
+        child()
+    else:
+        args = [int(arg) for arg in sys.argv[1:]]
+        main(args[0] if args else 1000, args[1] if len(args) > 1 else 5)
@@ -0,0 +1,298 @@
+# suite.py
+"""Benchmark every tracker operation and the main routes on synthetic
+inventories, and save the numbers as JSON for comparing runs.
+
+For each size, a synthetic equipment_data.json is generated and loaded.
+Then every EquipmentTracker operation is timed, followed by /, /search,
+/export/csv and /api/summary through the Flask test client. Each
+operation runs up to --repeat times or for --budget seconds, whichever
+comes first. One more traced call measures its peak Python allocations.
+
+Usage:
+    python benchmarks/suite.py [--sizes 10 1000 100000 1000000]
+                               [--repeat 50] [--budget 2]
+                               [--journal] [--columnar] [--snapshot]
+                               [--output results.json] [--compare old.json]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bulk import parse_operations
+from export_csv import load_export_app
+from snapshot import json_to_snapshot
+from synthetic import make_item, write_inventory
+
+DEFAULT_SIZES = [10, 1000, 100000]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+# A p50 this much slower than the baseline is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(call: Callable[[int], object], repeat: int, budget: float,
+            trace: bool = True) -> Dict:
+    """Time ``call(i)`` for i = 0, 1, ... until ``repeat`` runs or
+    ``budget`` seconds, then trace one extra call for peak memory"""
+    gc.collect()
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < repeat:
+        start = time.perf_counter()
+        call(len(timings))
+        timings.append(time.perf_counter() - start)
+        if time.perf_counter() - started >= budget:
+            break
+    total = sum(timings)
+    peak = None
+    if trace:
+        tracemalloc.start()
+        call(len(timings))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    timings.sort()
+    return {
+        'runs': len(timings),
+        'total_s': total,
+        'ops_per_s': len(timings) / total if total else None,
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p95_ms': percentile(timings, 0.95) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'max_ms': timings[-1] * 1000,
+        'peak_kib': peak / 1024 if peak is not None else None,
+    }
+
+
+def tracker_operations(store, size: int, rng: random.Random) -> Dict[str, Callable[[int], object]]:
+    """Name -> call(i) for every tracker operation, in the order they run.
+
+    Mutations keep the inventory at ``size``: the items add_equipment
+    creates are the ones delete_equipment removes again.
+    """
+    ids = [item['id'] for item in store.get_all_equipment()] or [0]
+    added: List[int] = []
+
+    def pick(i: int) -> int:
+        return ids[(i * 7919) % len(ids)]
+
+    def add(i: int):
+        item = make_item(0, rng)
+        added.append(store.add_equipment(item['description'], item['cost'], item['purchase_date'],
+                                         item['current_retail'], item['current_resale'],
+                                         item['resale_location'], item['condition']))
+
+    def delete(i: int):
+        if added:
+            store.delete_equipment(added.pop())
+
+    def batch(i: int):
+        results = store.apply_batch(parse_operations([
+            {'op': 'create', 'item': {'description': f'Batch item {i}', 'cost': 10.0}},
+            {'op': 'update', 'id': pick(i), 'fields': {'condition': 'Fair'}},
+        ]))
+        added.append(results[0]['id'])
+
+    operations = {
+        'get_total_value': lambda i: store.get_total_value(),
+        'get_equipment_by_id': lambda i: store.get_equipment_by_id(pick(i)),
+        'get_equipment_page': lambda i: store.get_equipment_page(50),
+        'get_all_equipment': lambda i: store.get_all_equipment(),
+        'iter_equipment': lambda i: sum(1 for _ in store.iter_equipment()),
+        'search_equipment[token]': lambda i: store.search_equipment('yaesu ft', mode='token'),
+        'search_equipment[substring]': lambda i: store.search_equipment('400XD', mode='substring'),
+        'search_equipment[scan]': lambda i: store.search_equipment('400XD', mode='scan'),
+        'search_page[token]': lambda i: store.search_page('icom', limit=50),
+        'add_equipment': add,
+        'update_equipment': lambda i: store.update_equipment(pick(i), condition='Good'),
+        'apply_batch': batch,
+        'delete_equipment': delete,
+    }
+    if hasattr(store, '_save_data'):
+        operations['_save_data'] = lambda i: store._save_data()
+    if hasattr(store, 'compact'):
+        operations['compact'] = lambda i: store.compact(force=True)
+    analytics = getattr(store, 'analytics', None)
+    if analytics is not None and analytics.available():
+        # Invalidate first so every run computes instead of hitting the cache
+        operations['get_analytics'] = lambda i: (analytics.invalidate(), store.get_analytics())
+    return operations
+
+
+ROUTES = [
+    ('GET /', '/'),
+    ('GET /search', '/search?q=yaesu'),
+    ('GET /search[substring]', '/search?q=400XD&mode=substring'),
+    ('GET /api/summary', '/api/summary'),
+    ('GET /export/csv', '/export/csv'),
+]
+
+
+def route_operations(client) -> Dict[str, Callable[[int], object]]:
+    """Name -> call(i) for each route, reading the whole (streamed) body"""
+    def get(url):
+        def call(i):
+            response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+            body = response.get_data()
+            response.close()
+            return body
+        return call
+    return {name: get(url) for name, url in ROUTES}
+
+
+def run_size(exports, size: int, args, workdir: str) -> List[Dict]:
+    import equipment
+    from equipment import EquipmentTracker
+
+    data_file = os.path.join(workdir, f'inventory_{size}.json')
+    write_inventory(data_file, size)
+    if args.snapshot:
+        snapshot_file = os.path.join(workdir, f'inventory_{size}.snap')
+        json_to_snapshot(data_file, snapshot_file)
+        data_file = snapshot_file
+    results = []
+
+    def record(kind: str, name: str, stats: Dict):
+        stats = dict(stats, kind=kind, name=name, size=size)
+        results.append(stats)
+        print(f"{size:>9} {name:<30} {stats['runs']:>6} {stats['p50_ms']:>10.3f} "
+              f"{stats['p95_ms']:>10.3f} {stats['p99_ms']:>10.3f} "
+              f"{stats['ops_per_s'] or 0:>11.1f} "
+              f"{(stats['peak_kib'] or 0) / 1024:>9.1f}", flush=True)
+
+    def load(i):
+        return EquipmentTracker(data_file, journal=args.journal, columnar=args.columnar,
+                                background_compaction=False)
+    # Loading a big inventory is slow, so it gets the same budget but
+    # never more than a few runs
+    record('tracker', 'load', measure(load, min(args.repeat, 5), args.budget))
+
+    store = load(0)
+    rng = random.Random(size)
+    for name, call in tracker_operations(store, size, rng).items():
+        record('tracker', name, measure(call, args.repeat, args.budget))
+
+    # Routes go through the app's lazily created tracker
+    equipment._tracker = store
+    client = exports.app.test_client()
+    page_cache = equipment.page_cache
+    max_entries = page_cache.max_entries
+    page_cache.max_entries = 0  # render every time
+    try:
+        for name, call in route_operations(client).items():
+            record('route', name, measure(call, args.repeat, args.budget))
+    finally:
+        page_cache.max_entries = max_entries
+    record('route', 'GET / [page cache]', measure(route_operations(client)['GET /'],
+                                                  args.repeat, args.budget))
+    equipment._tracker = None
+    del store
+    gc.collect()
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict], baseline_file: str):
+    """Print the p50 change against a previous results file"""
+    with open(baseline_file) as f:
+        baseline = {(r['kind'], r['name'], r['size']): r for r in json.load(f)['results']}
+    print(f"\nCompared with {baseline_file} (p50):")
+    regressions = 0
+    for result in results:
+        old = baseline.get((result['kind'], result['name'], result['size']))
+        if old is None or not old['p50_ms']:
+            continue
+        change = result['p50_ms'] / old['p50_ms'] - 1
+        flag = ''
+        if change > REGRESSION_THRESHOLD:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"{result['size']:>9} {result['name']:<30} {old['p50_ms']:>10.3f} -> "
+              f"{result['p50_ms']:>10.3f} ms ({change:+.1%}){flag}")
+    print(f"{regressions} regression(s) over {REGRESSION_THRESHOLD:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=50, help='max runs per operation')
+    parser.add_argument('--budget', type=float, default=2.0, help='max seconds per operation')
+    parser.add_argument('--journal', action='store_true', help='save through the change journal')
+    parser.add_argument('--columnar', action='store_true', help='use the columnar store')
+    parser.add_argument('--snapshot', action='store_true', help='load from a binary snapshot')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<time>.json)')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    args = parser.parse_args()
+    # Resolve before leaving the current directory
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.compare) if args.compare else None
+
+    workdir = tempfile.mkdtemp(prefix='ham-gear-suite-')
+    os.chdir(workdir)  # nothing the app writes lands in the repository
+    exports = load_export_app()
+    print(f"{'items':>9} {'operation':<30} {'runs':>6} {'p50 ms':>10} {'p95 ms':>10} "
+          f"{'p99 ms':>10} {'ops/s':>11} {'peak MiB':>9}")
+    results = []
+    try:
+        for size in args.sizes:
+            results.extend(run_size(exports, size, args, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'journal': args.journal,
+            'columnar': args.columnar,
+            'snapshot': args.snapshot,
+            'repeat': args.repeat,
+            'budget_s': args.budget,
+            # ru_maxrss is KiB on Linux
+            'peak_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        'results': results,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {len(results)} results to {output}")
+    if baseline:
+        compare(results, baseline)
+
+
+if __name__ == '__main__':
+    main()
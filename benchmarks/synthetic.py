@@ -0,0 +1,72 @@
+# synthetic.py
+import json
+import random
+import textwrap
+from datetime import date, timedelta
+from typing import Dict, Iterator, List
+
+MAKERS = {
+    'Yaesu': ['FT-DX10', 'FT-991A', 'FT-891', 'FTM 400XDR/DE', 'FT-5DR', 'FT-710'],
+    'Icom': ['IC-7300', 'IC-705', 'IC-9700', 'ID-52A', 'IC-7610'],
+    'Kenwood': ['TS-590SG', 'TS-890S', 'TH-D75A', 'TM-V71A'],
+    'Anytone': ['878UV Plus', 'AT-D578UV Pro'],
+    'Elecraft': ['KX2', 'KX3', 'K4'],
+    'Shark RF': ['OpenSpot 4 Pro', 'OpenSpot 3'],
+    'MFJ': ['MFJ-993B Tuner', 'MFJ-259C Analyzer'],
+    'Diamond': ['X510NA Antenna', 'SX-600 Meter'],
+}
+CONDITIONS = ['Excellent', 'Good', 'Fair', 'Poor']
+LOCATIONS = ['QRZ', 'eBay', 'HamEstate', 'QTH.com', 'Swapmeet', '',
+             'QRZ; bought used; discontinued model', 'QRZ; bought USED on QRZ']
+
+
+def make_item(equipment_id: int, rng: random.Random) -> Dict:
+    """One record shaped like an entry in equipment_data.json"""
+    maker = rng.choice(list(MAKERS))
+    cost = round(rng.uniform(40, 4000), 2)
+    purchased = date(2010, 1, 1) + timedelta(days=rng.randrange(15 * 365))
+    item = {
+        'id': equipment_id,
+        'description': f"{maker} {rng.choice(MAKERS[maker])}",
+        'cost': cost,
+        'purchase_date': purchased.isoformat(),
+        'current_retail': round(cost * rng.uniform(0.8, 1.3), 2) if rng.random() > 0.2 else 0.0,
+        'current_resale': round(cost * rng.uniform(0.3, 1.1), 2),
+        'resale_location': rng.choice(LOCATIONS),
+        'condition': rng.choice(CONDITIONS),
+        'date_added': f"{purchased.isoformat()} 19:34:20",
+    }
+    if rng.random() < 0.25:
+        # Some items have been edited since they were added
+        item['last_updated'] = f"{(purchased + timedelta(days=rng.randrange(1, 365))).isoformat()} 08:15:00"
+    return item
+
+
+def iter_inventory(count: int, seed: int = 73) -> Iterator[Dict]:
+    """Yield a reproducible synthetic inventory of ``count`` items"""
+    rng = random.Random(seed)
+    for equipment_id in range(1, count + 1):
+        yield make_item(equipment_id, rng)
+
+
+def generate_inventory(count: int, seed: int = 73) -> List[Dict]:
+    """A reproducible synthetic inventory of ``count`` items"""
+    return list(iter_inventory(count, seed))
+
+
+def write_inventory(path: str, count: int, seed: int = 73):
+    """Write a synthetic inventory in the equipment_data.json format.
+
+    Items are written one at a time, byte-for-byte what ``json.dump(...,
+    indent=2)`` produces, so a million-item file never has to fit in memory.
+    """
+    with open(path, 'w') as f:
+        if count <= 0:
+            f.write('[]')
+            return
+        f.write('[\n')
+        for position, item in enumerate(iter_inventory(count, seed)):
+            if position:
+                f.write(',\n')
+            f.write(textwrap.indent(json.dumps(item, indent=2), '  '))
+        f.write('\n]')
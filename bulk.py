@@ -0,0 +1,99 @@
+# bulk.py
+from typing import Dict, List
+
+# Fields a client may set on create or update
+EDITABLE_FIELDS = ('description', 'cost', 'purchase_date', 'current_retail',
+                   'current_resale', 'resale_location', 'condition')
+NUMERIC_FIELDS = ('cost', 'current_retail', 'current_resale')
+
+
+class BulkOperationError(ValueError):
+    """A batch operation was rejected; nothing in the batch was applied"""
+
+    def __init__(self, index: int, message: str):
+        super().__init__(f"Operation {index}: {message}")
+        self.index = index
+
+
+def _coerce_fields(index: int, fields, required: bool) -> Dict:
+    if not isinstance(fields, dict):
+        raise BulkOperationError(index, "fields must be an object")
+    unknown = set(fields) - set(EDITABLE_FIELDS)
+    if unknown:
+        raise BulkOperationError(index, f"unknown fields: {', '.join(sorted(unknown))}")
+    coerced = {}
+    for key, value in fields.items():
+        if value is None or value == "":
+            continue  # same as leaving a form field blank
+        if key in NUMERIC_FIELDS:
+            try:
+                coerced[key] = float(value)
+            except (TypeError, ValueError):
+                raise BulkOperationError(index, f"{key} must be a number")
+        else:
+            coerced[key] = str(value).strip()
+    if required:
+        if not coerced.get('description'):
+            raise BulkOperationError(index, "description is required")
+        if 'cost' not in coerced:
+            raise BulkOperationError(index, "cost is required")
+    return coerced
+
+
+def _coerce_id(index: int, value) -> int:
+    if isinstance(value, bool):
+        raise BulkOperationError(index, "id must be an integer")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise BulkOperationError(index, "id must be an integer")
+
+
+def parse_operations(payload) -> List[Dict]:
+    """Validate and normalize a bulk request body.
+
+    Accepts a list of operations or ``{"operations": [...]}``, where each
+    operation is one of::
+
+        {"op": "create", "item": {...fields}}
+        {"op": "update", "id": 3, "fields": {...fields}}
+        {"op": "delete", "id": 4}
+
+    Returns the operations with ids and numeric fields coerced. Raises
+    BulkOperationError for the first invalid one.
+    """
+    if isinstance(payload, dict):
+        payload = payload.get('operations')
+    if not isinstance(payload, list):
+        raise BulkOperationError(0, "expected a list of operations")
+    operations = []
+    for index, operation in enumerate(payload):
+        if not isinstance(operation, dict):
+            raise BulkOperationError(index, "operation must be an object")
+        op = operation.get('op')
+        if op == 'create':
+            operations.append({'op': 'create',
+                               'fields': _coerce_fields(index, operation.get('item'), True)})
+        elif op == 'update':
+            operations.append({'op': 'update',
+                               'id': _coerce_id(index, operation.get('id')),
+                               'fields': _coerce_fields(index, operation.get('fields'), False)})
+        elif op == 'delete':
+            operations.append({'op': 'delete', 'id': _coerce_id(index, operation.get('id'))})
+        else:
+            raise BulkOperationError(index, f"unknown op {op!r}")
+    return operations
+
+
+def check_ids(operations: List[Dict], exists) -> None:
+    """Reject updates/deletes of ids that don't exist or were deleted earlier
+    in the same batch; ``exists`` answers for ids present before the batch"""
+    deleted = set()
+    for index, operation in enumerate(operations):
+        if operation['op'] == 'create':
+            continue
+        equipment_id = operation['id']
+        if equipment_id in deleted or not exists(equipment_id):
+            raise BulkOperationError(index, f"equipment {equipment_id} not found")
+        if operation['op'] == 'delete':
+            deleted.add(equipment_id)
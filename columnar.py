@@ -0,0 +1,278 @@
+# columnar.py
+import math
+from array import array
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+NUMERIC_FIELDS = ('cost', 'current_retail', 'current_resale')
+# Low-cardinality text, stored once per distinct value
+ENCODED_FIELDS = ('condition', 'resale_location')
+TEXT_FIELDS = ('description', 'purchase_date', 'date_added', 'last_updated')
+# Key order of a record as written to equipment_data.json
+FIELD_ORDER = ('id', 'description', 'cost', 'purchase_date', 'current_retail',
+               'current_resale', 'resale_location', 'condition', 'date_added',
+               'last_updated')
+
+# Rebuild the columns once this many deleted rows have piled up
+_VACUUM_MIN_DEAD = 1024
+
+
+class EquipmentRecord:
+    """Dict-like view of one row in a ColumnarStore.
+
+    Supports the subset of the dict API the tracker, templates and CSV
+    export use; writes go straight through to the columns.
+    """
+
+    __slots__ = ('_store', '_id')
+
+    def __init__(self, store: 'ColumnarStore', equipment_id: int):
+        self._store = store
+        self._id = equipment_id
+
+    def __getitem__(self, key: str):
+        return self._store._get_field(self._id, key)
+
+    def __setitem__(self, key: str, value):
+        self._store._set_field(self._id, key, value)
+
+    def __contains__(self, key) -> bool:
+        try:
+            self._store._get_field(self._id, key)
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key: str, default=None):
+        try:
+            return self._store._get_field(self._id, key)
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        return list(self._store._keys(self._id))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def update(self, fields: Dict):
+        for key, value in fields.items():
+            self[key] = value
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (EquipmentRecord, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"EquipmentRecord({dict(self.items())!r})"
+
+
+class ColumnarStore(MutableMapping):
+    """Column-oriented id -> record mapping for large inventories.
+
+    Prices live in contiguous ``array('d')`` columns, condition and
+    resale_location are dictionary-encoded into ``array('I')`` codes, and
+    records are handed out as ``__slots__`` views instead of one dict per
+    item. Deleted rows are tombstoned and reclaimed in bulk by ``vacuum``.
+    Iteration follows insertion order, like the dict it replaces.
+    """
+
+    def __init__(self):
+        self._row_of: Dict[int, int] = {}
+        self._ids = array('q')
+        self._numeric = {field: array('d') for field in NUMERIC_FIELDS}
+        self._codes = {field: array('I') for field in ENCODED_FIELDS}
+        self._symbols: Dict[str, List] = {field: [] for field in ENCODED_FIELDS}
+        self._symbol_codes: Dict[str, Dict] = {field: {} for field in ENCODED_FIELDS}
+        self._text: Dict[str, List[Optional[str]]] = {field: [] for field in TEXT_FIELDS}
+        # Keys outside the known columns, e.g. from hand-edited JSON
+        self._extras: Dict[int, Dict] = {}
+        self._dead = 0
+
+    @classmethod
+    def from_columns(cls, ids: array, numeric: Dict[str, array], codes: Dict[str, array],
+                     symbols: Dict[str, List], text: Dict[str, Sequence],
+                     extras: Dict[int, Dict]) -> 'ColumnarStore':
+        """Build a store around ready-made columns, one row per id, without
+        visiting each record; text columns may be any indexable sequence
+        that also supports assignment and ``append`` (see snapshot.py)"""
+        store = cls()
+        store._ids = ids
+        store._row_of = dict(zip(ids, range(len(ids))))
+        store._numeric = numeric
+        store._codes = codes
+        store._symbols = {field: list(values) for field, values in symbols.items()}
+        store._symbol_codes = {field: {value: code for code, value in enumerate(values)}
+                               for field, values in store._symbols.items()}
+        store._text = text
+        store._extras = extras
+        return store
+
+    # Mapping protocol
+
+    def __getitem__(self, equipment_id: int) -> EquipmentRecord:
+        if equipment_id not in self._row_of:
+            raise KeyError(equipment_id)
+        return EquipmentRecord(self, equipment_id)
+
+    def __setitem__(self, equipment_id: int, equipment):
+        if equipment_id in self._row_of:
+            self._delete_row(equipment_id)
+        self._append_row(equipment_id, equipment)
+
+    def __delitem__(self, equipment_id: int):
+        if equipment_id not in self._row_of:
+            raise KeyError(equipment_id)
+        self._delete_row(equipment_id)
+        if self._dead >= _VACUUM_MIN_DEAD and self._dead > len(self._row_of):
+            self.vacuum()
+
+    def __contains__(self, equipment_id) -> bool:
+        return equipment_id in self._row_of
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._row_of)
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    # Column access
+
+    def column(self, field: str) -> array:
+        """Raw numeric column, including tombstoned rows; see ``live_rows``"""
+        return self._numeric[field]
+
+    def encoded_column(self, field: str) -> Tuple[array, List]:
+        """Codes and code -> value table of a dictionary-encoded column"""
+        return self._codes[field], self._symbols[field]
+
+    def column_sum(self, field: str) -> float:
+        """Exact sum of a numeric column over live records"""
+        column = self._numeric[field]
+        if not self._dead:
+            return math.fsum(column)
+        return math.fsum(column[row] for row in self._row_of.values())
+
+    def live_rows(self) -> List[int]:
+        """Row positions of live records, in iteration order"""
+        return list(self._row_of.values())
+
+    def row(self, equipment_id: int) -> Optional[int]:
+        """Row position of a live record, or None"""
+        return self._row_of.get(equipment_id)
+
+    def id_column(self) -> array:
+        """Raw id column, including tombstoned rows; see ``live_rows``"""
+        return self._ids
+
+    def text_column(self, field: str) -> Sequence:
+        """Raw text column, including tombstoned rows; see ``live_rows``"""
+        return self._text[field]
+
+    def extra_fields(self) -> Dict[int, Dict]:
+        """id -> keys outside the known columns, for records that have any"""
+        return self._extras
+
+    def copy(self) -> 'ColumnarStore':
+        """Independent copy for writing out while this one keeps changing;
+        columns are copied in bulk and records aren't visited"""
+        store = type(self)()
+        store._row_of = dict(self._row_of)
+        store._ids = array('q', self._ids)
+        store._numeric = {field: array('d', column) for field, column in self._numeric.items()}
+        store._codes = {field: array('I', column) for field, column in self._codes.items()}
+        store._symbols = {field: list(values) for field, values in self._symbols.items()}
+        store._symbol_codes = {field: dict(codes) for field, codes in self._symbol_codes.items()}
+        store._text = {field: column.copy() for field, column in self._text.items()}
+        store._extras = {equipment_id: dict(extras) for equipment_id, extras in self._extras.items()}
+        store._dead = self._dead
+        return store
+
+    def vacuum(self):
+        """Rebuild the columns without tombstoned rows"""
+        records = [(equipment_id, dict(EquipmentRecord(self, equipment_id).items()))
+                   for equipment_id in self._row_of]
+        self.__init__()
+        for equipment_id, equipment in records:
+            self._append_row(equipment_id, equipment)
+
+    # Row helpers
+
+    def _encode(self, field: str, value) -> int:
+        codes = self._symbol_codes[field]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._symbols[field])
+            self._symbols[field].append(value)
+        return code
+
+    def _append_row(self, equipment_id: int, equipment):
+        self._row_of[equipment_id] = len(self._ids)
+        self._ids.append(equipment_id)
+        for field in NUMERIC_FIELDS:
+            self._numeric[field].append(float(equipment[field]))
+        for field in ENCODED_FIELDS:
+            self._codes[field].append(self._encode(field, equipment.get(field)))
+        for field in TEXT_FIELDS:
+            self._text[field].append(equipment.get(field))
+        extras = {key: value for key, value in equipment.items()
+                  if key not in FIELD_ORDER}
+        if extras:
+            self._extras[equipment_id] = extras
+
+    def _delete_row(self, equipment_id: int):
+        row = self._row_of.pop(equipment_id)
+        # Release the strings now; the fixed-width slots go at vacuum time
+        for field in TEXT_FIELDS:
+            self._text[field][row] = None
+        self._extras.pop(equipment_id, None)
+        self._dead += 1
+
+    def _get_field(self, equipment_id: int, key: str):
+        row = self._row_of[equipment_id]
+        if key == 'id':
+            return equipment_id
+        if key in self._numeric:
+            return self._numeric[key][row]
+        if key in self._codes:
+            value = self._symbols[key][self._codes[key][row]]
+        elif key in self._text:
+            value = self._text[key][row]
+        else:
+            return self._extras.get(equipment_id, {})[key]
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def _set_field(self, equipment_id: int, key: str, value):
+        row = self._row_of[equipment_id]
+        if key == 'id':
+            raise KeyError("id cannot be changed")
+        if key in self._numeric:
+            self._numeric[key][row] = float(value)
+        elif key in self._codes:
+            self._codes[key][row] = self._encode(key, value)
+        elif key in self._text:
+            self._text[key][row] = value
+        else:
+            self._extras.setdefault(equipment_id, {})[key] = value
+
+    def _keys(self, equipment_id: int) -> Iterator[str]:
+        row = self._row_of[equipment_id]
+        for key in FIELD_ORDER:
+            if key in self._text and self._text[key][row] is None:
+                continue
+            if key in self._codes and self._symbols[key][self._codes[key][row]] is None:
+                continue
+            yield key
+        yield from self._extras.get(equipment_id, ())
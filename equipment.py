@@ -1,43 +1,659 @@
 # app.py
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, abort, session, make_response, g
+import atexit
+import gc
+import hashlib
 import json
 import os
-from datetime import datetime
-from typing import List, Dict, Optional
+from datetime import datetime, timezone
+from functools import wraps
+import math
+import signal
+import sys
+import threading
+import time
+import uuid
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, Dict, Mapping, Optional, Tuple
+
+from jinja2 import FileSystemBytecodeCache, Template
+from werkzeug.local import LocalProxy
+
+from analytics import InventoryAnalytics
+from bulk import BulkOperationError, check_ids, parse_operations
+from columnar import ColumnarStore, EquipmentRecord, FIELD_ORDER
+from exports import stream_csv
+from file_lock import FileLock, file_stamp
+from journal import ChangeJournal, apply_change, changed_id, iter_changes
+from metrics import MetricsRegistry, SIZE_BUCKETS, file_size, instrument
+from page_cache import PageCache
+from profiler import RequestProfiler, code_key, cumulative, exclusive, outermost
+from rwlock import ReadWriteLock
+from search_index import TokenIndex, TrigramIndex, SEARCH_FIELDS, SEARCH_MODES
+from snapshot import Snapshot, SnapshotError, diff_store, is_snapshot, load_store, read_records, write_snapshot
+from sqlite_store import SQLiteEquipmentTracker
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-this'
 
+
+def _json_default(value):
+    """Serialize columnar record views like the dicts they stand in for"""
+    if isinstance(value, EquipmentRecord):
+        return dict(value)
+    return str(value)
+
+
+class DataFileError(Exception):
+    """The data file exists but can't be read as an inventory"""
+
+
+def _write_json_atomic(path: str, data, **dump_kwargs):
+    """Replace ``path`` with ``data`` as JSON. The new file is written and
+    fsynced under a temporary name first, so a crash leaves either the old
+    file or the new one, never a truncated mix."""
+    tmp_file = path + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+    # Make the rename itself survive a power cut
+    try:
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:  # e.g. Windows, where directories can't be opened
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def _exit_on_sigterm():
+    """Turn SIGTERM into a normal exit so atexit handlers, such as the
+    flush of coalesced saves, still run; the default action kills the
+    process without them. Raising SystemExit instead of saving inside the
+    handler unwinds whatever the main thread was doing first, so no lock
+    it held is still taken. Left alone when something else (e.g.
+    gunicorn) already handles SIGTERM; its worker_exit hook flushes."""
+    if threading.current_thread() is not threading.main_thread():
+        return
+    if signal.getsignal(signal.SIGTERM) is signal.SIG_DFL:
+        signal.signal(signal.SIGTERM, _sigterm_exit)
+
+
+def _sigterm_exit(signum, frame):
+    sys.exit(128 + signum)
+
+
+def _env_flag(name: str) -> bool:
+    """Read a boolean switch from the environment"""
+    return os.environ.get(name, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# Compiled templates are kept on disk so a freshly started worker loads
+# them instead of parsing and compiling every template again.
+TEMPLATE_CACHE_DIR = (os.environ.get('EQUIPMENT_TEMPLATE_CACHE')
+                      or os.path.join(app.root_path, '__pycache__', 'jinja'))
+try:
+    os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+    app.jinja_options = dict(app.jinja_options,
+                             bytecode_cache=FileSystemBytecodeCache(TEMPLATE_CACHE_DIR))
+except OSError:
+    app.logger.warning('Template cache directory %s is not writable', TEMPLATE_CACHE_DIR)
+
+
+def precompile_templates() -> int:
+    """Compile every template into the bytecode cache; returns the count"""
+    names = app.jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+@app.cli.command('precompile-templates')
+def precompile_templates_command():
+    """Compile the templates into the bytecode cache ahead of a deploy"""
+    print(f"Compiled {precompile_templates()} templates into {TEMPLATE_CACHE_DIR}")
+
+
+# Record field -> get_total_value key for the running sums
+TOTAL_FIELDS = {'cost': 'total_cost', 'current_retail': 'total_retail',
+                'current_resale': 'total_resale'}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Records copied per read-lock hold while a search index is built
+INDEX_CHUNK = 10000
+
+
+def _reads(method):
+    """Run a tracker method as a reader, after picking up any changes other
+    processes made to the data file"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._sync()
+        with self._rwlock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _searches(method):
+    """Build the index a search mode needs before the search takes the
+    read lock; building holds the lock only a chunk of records at a time"""
+    @wraps(method)
+    def wrapper(self, query, mode='token', *args, **kwargs):
+        if query:
+            self._ensure_index(mode)
+        return method(self, query, mode, *args, **kwargs)
+    return wrapper
+
+
+def _writes(method):
+    """Run a tracker method as the only writer in any process, on top of
+    the latest data on disk"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._file_lock:
+            self._refresh()
+            with self._rwlock.write():
+                result = method(self, *args, **kwargs)
+                # Before readers see the new records under the old tag
+                self._stamp = self._file_stamp()
+        return result
+    return wrapper
+
+
 class EquipmentTracker:
-    def __init__(self, data_file: str = "equipment_data.json"):
+    def __init__(self, data_file: str = "equipment_data.json", journal: bool = False,
+                 compact_threshold: int = 1000, background_compaction: bool = True,
+                 columnar: bool = False, save_delay: float = 0.0):
         self.data_file = data_file
-        self.equipment_list = self._load_data()
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self.background_compaction = background_compaction
+        # Seconds to gather mutations into one full save (0: save each one).
+        # Only for a single process: other workers can't see unsaved changes.
+        self.save_delay = save_delay
+        self._save_timer: Optional[threading.Timer] = None
+        # In-memory changes not yet on disk
+        self._dirty = False
+        if save_delay > 0:
+            atexit.register(self.flush)
+            _exit_on_sigterm()
+        # A binary snapshot (snapshot.py) instead of JSON; always columnar
+        self.binary = is_snapshot(data_file)
+        self._journal = ChangeJournal(data_file)
+        self._compact_lock = threading.Lock()
+        # Request threads share one tracker: reads run concurrently, writes
+        # one at a time with no reader in between.
+        self._rwlock = ReadWriteLock()
+        # Worker processes sharing the data file take turns writing it
+        self._file_lock = FileLock(data_file + ".lock")
+        # One compaction at a time across processes. Always taken while
+        # holding the file lock, never the other way round; a background
+        # compaction keeps it while it writes the snapshot without the
+        # file lock.
+        self._compaction_file_lock = FileLock(data_file + ".compact.lock")
+        # Stamp of the files before our own background compaction started
+        # replacing them (see _file_stamp)
+        self._compaction_stamp = None
+        with self._file_lock:
+            # id -> record, kept in file order; every lookup by id goes through here.
+            # The columnar store trades per-item dicts for packed columns.
+            self._records = self._load_records(columnar)
+            self._next_id = self._load_next_id()
+            # Bumped by every mutation; together with the per-process instance
+            # id it identifies exactly what the in-memory inventory looks like.
+            self.data_version = 0
+            self._instance = uuid.uuid4().hex[:12]
+            self.last_modified = self._data_mtime()
+            # Ascending ids for keyset pagination; new ids always go on the end
+            self._sorted_ids = sorted(self._records)
+            # The search indexes wait for the first search that needs them,
+            # so loading (and memory use until then) is just the records.
+            # The trigram index only serves mode=substring.
+            self._token_index: Optional[TokenIndex] = None
+            self._trigram_index: Optional[TrigramIndex] = None
+            self._index_lock = threading.Lock()
+            # Mutations made while an index is being built, replayed onto
+            # it before it goes live: (added, record) pairs
+            self._index_log: Optional[List[Tuple[bool, Dict]]] = None
+            self.analytics = InventoryAnalytics(self._records)
+            # Running sums behind get_total_value, adjusted on every mutation.
+            # Seeded with exact sums so they start out matching check_totals.
+            self._totals = {key: self._exact_sum(field) for field, key in TOTAL_FIELDS.items()}
+            if self._journal.entries and not self.journal:
+                # Left over from a run in journal mode; fold it in so the plain
+                # JSON file is complete again.
+                self._compact(background=False)
+            # What the files looked like when we last read or wrote them
+            self._stamp = self._file_stamp()
+    
+    def _load_records(self, columnar: bool):
+        """The inventory as the id -> record mapping the tracker works on"""
+        if self.binary and os.path.exists(self.data_file):
+            try:
+                records = load_store(self.data_file)
+            except SnapshotError as e:
+                raise DataFileError(f"{e}; fix or restore it before starting") from e
+            self._journal.replay_into(records)
+            return records
+        records = ColumnarStore() if columnar or self.binary else {}
+        for item in self._load_data():
+            records[item['id']] = item
+        return records
     
     def _load_data(self) -> List[Dict]:
-        """Load equipment data from JSON file"""
-        if os.path.exists(self.data_file):
+        """Load equipment data from JSON file and replay any journal"""
+        try:
+            equipment_list = self._read_data_file()
+        except json.JSONDecodeError as e:
+            # Starting empty would overwrite the whole inventory on the next save
+            raise DataFileError(f"{self.data_file} is not valid JSON ({e}); fix or restore it "
+                                f"before starting") from e
+        return self._journal.replay(equipment_list)
+    
+    def _read_data_file(self) -> List[Dict]:
+        if not os.path.exists(self.data_file):
+            return []
+        if self.binary:
+            return read_records(self.data_file)
+        with open(self.data_file, 'r') as f:
+            text = f.read()
+        if not text.strip():
+            return []
+        return json.loads(text)
+    
+    def _file_stamp(self):
+        stamp = file_stamp((self.data_file, self._journal.rotated_path, self._journal.path))
+        if self._compaction_stamp is not None:
+            # Our background compaction is rewriting the data file from
+            # what we already hold and then dropping the rotated journal;
+            # neither changes the inventory, so only the live journal counts
+            return self._compaction_stamp[:2] + stamp[2:]
+        return stamp
+    
+    def _sync(self):
+        """Reload if another process (or a hand edit) changed the data file"""
+        if self._file_stamp() != self._stamp:
+            with self._file_lock:
+                self._refresh()
+    
+    def _refresh(self):
+        """Apply changes made on disk since we last looked, touching only
+        the records that differ; the caller holds the file lock"""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        data, rotated, live = stamp
+        old_data, old_rotated, old_live = self._stamp
+        with self._rwlock.write():
+            if ((data, rotated) == (old_data, old_rotated) and live is not None
+                    and (old_live is None or old_live[0] == live[0])
+                    and live[1] >= self._journal.offset):
+                # Only the journal grew: apply just the new lines
+                changes = self._journal.read_new()
+                affected = {changed_id(change) for entry in changes
+                            for change in iter_changes(entry)}
+                by_id = {equipment_id: dict(self._records[equipment_id])
+                         for equipment_id in affected if equipment_id in self._records}
+                for change in changes:
+                    apply_change(by_id, change)
+                changed = {equipment_id: by_id.get(equipment_id) for equipment_id in affected}
+            else:
+                try:
+                    changed = self._reload_changes()
+                except (json.JSONDecodeError, SnapshotError) as e:
+                    # Most likely a hand edit in progress; keep serving what we have
+                    app.logger.warning('Not reloading %s: %s', self.data_file, e)
+                    self._stamp = stamp
+                    return
+            self._apply_external(changed)
+            self._next_id = max(self._next_id, self._load_next_id())
+            if changed:
+                self.data_version += 1
+                self.last_modified = self._data_mtime()
+            self._stamp = stamp
+    
+    def _reload_changes(self) -> Dict[int, Optional[Dict]]:
+        """Records that differ between memory and the files on disk (None:
+        deleted there). A snapshot is compared column by column and only
+        the items that differ are decoded; JSON is read in full."""
+        if (self.binary and isinstance(self._records, ColumnarStore)
+                and os.path.exists(self.data_file)):
+            snapshot = Snapshot(self.data_file)
             try:
-                with open(self.data_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                return []
-        return []
+                changes = self._journal.read_all()
+                affected = {changed_id(change) for entry in changes
+                            for change in iter_changes(entry)}
+                by_id = diff_store(self._records, snapshot, include=affected)
+            finally:
+                snapshot.close()
+            if by_id is not None:
+                for change in changes:
+                    apply_change(by_id, change)
+                for equipment_id in affected:
+                    by_id.setdefault(equipment_id, None)  # deleted by the journal
+                return {equipment_id: item for equipment_id, item in by_id.items()
+                        if self._differs(equipment_id, item)}
+        by_id = {item['id']: item for item in self._journal.replay(self._read_data_file())}
+        changed = {equipment_id: item for equipment_id, item in by_id.items()
+                   if self._differs(equipment_id, item)}
+        changed.update((equipment_id, None) for equipment_id in self._records
+                       if equipment_id not in by_id)
+        return changed
+    
+    def _differs(self, equipment_id: int, item: Optional[Dict]) -> bool:
+        """Whether memory disagrees with a record from disk (None: absent)"""
+        current = self._records.get(equipment_id)
+        if item is None:
+            return current is not None
+        return current is None or dict(current) != item
+    
+    def _apply_external(self, changed: Dict[int, Optional[Dict]]):
+        """Bring records to the state found on disk (None: deleted there)"""
+        for equipment_id, item in changed.items():
+            current = self._records.get(equipment_id)
+            if item is None:
+                if current is not None:
+                    self._delete(equipment_id)
+            elif current is None:
+                self._insert_record(item)
+            else:
+                self._unindex_record(current)
+                if isinstance(current, EquipmentRecord):
+                    current.update({key: value for key, value in item.items() if key != 'id'})
+                else:
+                    self._records[equipment_id] = current = item
+                self._index_record(current)
+    
+    @property
+    @_reads
+    def equipment_list(self) -> List[Dict]:
+        """All records in file order"""
+        return [self._snapshot(equipment) for equipment in self._records.values()]
+    
+    @staticmethod
+    def _snapshot(equipment: Dict) -> Dict:
+        """A record as handed to callers, unaffected by later writes"""
+        if isinstance(equipment, EquipmentRecord):
+            return dict(equipment)
+        # Dict records are replaced on update, never mutated, so a reader
+        # can keep using the one it got.
+        return equipment
+    
+    @property
+    def _meta_file(self) -> str:
+        return self.data_file + ".meta"
+    
+    def _load_next_id(self) -> int:
+        """Restore the id high-water mark so deleted ids are never reused"""
+        next_id = max(self._records, default=0) + 1
+        next_id = max(next_id, self._journal.high_water + 1)
+        if os.path.exists(self._meta_file):
+            try:
+                with open(self._meta_file, 'r') as f:
+                    next_id = max(next_id, int(json.load(f).get('next_id', 0)))
+            except (json.JSONDecodeError, ValueError, AttributeError):
+                pass
+        return next_id
+    
+    def _save_meta(self, next_id: int):
+        """Persist the id high-water mark next to the data file"""
+        _write_json_atomic(self._meta_file, {'next_id': next_id})
     
     def _save_data(self):
-        """Save equipment data to JSON file"""
-        with open(self.data_file, 'w') as f:
-            json.dump(self.equipment_list, f, indent=2, default=str)
+        """Save equipment data to the data file"""
+        self._write_data_file(self._records)
+        self._save_meta(self._next_id)
+        self._dirty = False
+    
+    def _data_mtime(self) -> float:
+        """Newest modification time of the data file and its journal"""
+        mtimes = [os.path.getmtime(path)
+                  for path in (self.data_file, self._journal.path, self._journal.rotated_path)
+                  if os.path.exists(path)]
+        return max(mtimes, default=time.time())
+    
+    def reset_after_fork(self):
+        """Give a forked worker its own lock file handle and instance id"""
+        # flock is held per open file, so a descriptor inherited from the
+        # master wouldn't keep sibling workers apart
+        self._file_lock = FileLock(self.data_file + ".lock")
+        self._compaction_file_lock = FileLock(self.data_file + ".compact.lock")
+        self._instance = uuid.uuid4().hex[:12]
+        # The parent's timer thread didn't come along
+        self._save_timer = None
+    
+    @property
+    def version_tag(self) -> str:
+        """Opaque tag that changes whenever the inventory does (used as ETag).
+
+        Derived from the stamps of the data file and journal, so every
+        worker serving the same files hands out the same tag. Changes this
+        process hasn't written yet add its own instance id and counter.
+        """
+        self._sync()
+        tag = hashlib.blake2b(repr(self._stamp).encode(), digest_size=8).hexdigest()
+        if self._dirty:
+            tag += f"-{self._instance}-{self.data_version}"
+        return tag
+    
+    def _persist(self, change: Dict):
+        """Record a mutation, either as a journal append or a full save"""
+        self.data_version += 1
+        self.last_modified = time.time()
+        # The file stamps can't tell this change apart until it is on disk
+        self._dirty = True
+        if not self.journal:
+            if self.save_delay > 0:
+                self._schedule_save()
+            else:
+                self._save_data()
+            return
+        self._journal.append(change)
+        self._dirty = False
+        if self._journal.entries >= self.compact_threshold:
+            self._compact(background=self.background_compaction)
+    
+    def _schedule_save(self):
+        """Mark the inventory unsaved and make sure a save is coming"""
+        self._dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush(self):
+        """Write out mutations still waiting for a coalesced save"""
+        with self._file_lock:
+            with self._rwlock.read():
+                self._save_timer = None
+                if not self._dirty:
+                    return
+                self._save_data()
+                self._stamp = self._file_stamp()
+    
+    @_writes
+    def compact(self, background: bool = False, force: bool = False):
+        """Fold the change journal back into the JSON snapshot; ``force``
+        rewrites the snapshot even when the journal is empty"""
+        self._compact(background, force)
+    
+    def _compact(self, background: bool = False, force: bool = False):
+        """Fold the journal into the snapshot; the caller holds both locks"""
+        if background:
+            # Starts writing once the current writer lets go of the file lock
+            if self._compact_lock.acquire(blocking=False):
+                threading.Thread(target=self._background_compact, daemon=True).start()
+            return
+        # Waits for a background compaction that is still writing
+        with self._compaction_file_lock:
+            if not self._journal.rotate() and not force:
+                return
+            self._write_snapshot(self._records, self._next_id)
+        self._dirty = False
+    
+    def _background_compact(self):
+        """Rotate the journal under the file lock, then write the snapshot
+        without it: writers wait for the copy of the records, not the dump"""
+        try:
+            with self._file_lock:
+                if not self._compaction_file_lock.acquire(blocking=False):
+                    # Another process is writing a snapshot; the journal
+                    # stays over the threshold, so a later append retries
+                    return
+                try:
+                    self._refresh()
+                    with self._rwlock.read():
+                        rotated = self._journal.rotate()
+                        if rotated:
+                            # Copy the records now so later mutations don't race the writer
+                            snapshot = self._copy_records()
+                            next_id = self._next_id
+                            self._stamp = self._file_stamp()
+                            self._compaction_stamp = self._stamp
+                except BaseException:
+                    self._compaction_file_lock.release()
+                    raise
+                if not rotated:
+                    self._compaction_file_lock.release()
+                    return
+            try:
+                self._write_snapshot(snapshot, next_id)
+            finally:
+                self._compaction_file_lock.release()
+                with self._file_lock:
+                    self._compaction_stamp = None
+                    # Adopt the new data file; journal lines appended
+                    # meanwhile are still picked up by the next _sync
+                    self._stamp = self._file_stamp()[:2] + self._stamp[2:]
+        finally:
+            self._compact_lock.release()
+    
+    def _copy_records(self) -> Mapping:
+        """The inventory as it is now, for writing out while it changes"""
+        if isinstance(self._records, ColumnarStore):
+            return self._records.copy()  # whole columns, no per-record work
+        return {equipment_id: dict(item) for equipment_id, item in self._records.items()}
+    
+    def _write_snapshot(self, snapshot: Mapping, next_id: int):
+        """Write a compacted snapshot and drop the journal it replaces"""
+        # The journal's add records are about to go, so the high-water
+        # mark has to survive on its own first.
+        self._save_meta(next_id)
+        self._write_data_file(snapshot)
+        self._journal.discard_rotated()
+    
+    def _write_data_file(self, records: Mapping):
+        """Atomically replace the data file with an id -> record mapping,
+        in whichever format it uses"""
+        if self.binary:
+            write_snapshot(self.data_file, records)
+        else:
+            _write_json_atomic(self.data_file, list(records.values()), indent=2,
+                               default=_json_default)
+    
+    def _index_record(self, equipment: Dict):
+        """Add a record to the search indexes and running totals"""
+        if self._token_index is not None:
+            self._token_index.add(equipment)
+        if self._trigram_index is not None:
+            self._trigram_index.add(equipment)
+        if self._index_log is not None:
+            self._index_log.append((True, dict(equipment)))
+        self.analytics.invalidate()
+        for field, key in TOTAL_FIELDS.items():
+            self._totals[key] += equipment[field]
+    
+    def _unindex_record(self, equipment: Dict):
+        """Remove a record from the search indexes and running totals"""
+        if self._token_index is not None:
+            self._token_index.remove(equipment)
+        if self._trigram_index is not None:
+            self._trigram_index.remove(equipment)
+        if self._index_log is not None:
+            self._index_log.append((False, dict(equipment)))
+        self.analytics.invalidate()
+        for field, key in TOTAL_FIELDS.items():
+            self._totals[key] -= equipment[field]
+    
+    def _ensure_index(self, mode: str):
+        """Build the index behind a search mode on its first use. The caller
+        must not hold the read or write lock"""
+        if mode == 'token' and self._token_index is None:
+            self._build_index('_token_index', TokenIndex)
+        elif mode == 'substring' and self._trigram_index is None:
+            self._build_index('_trigram_index', TrigramIndex)
+    
+    def _build_index(self, attribute: str, factory):
+        """Fill a new index and install it as ``attribute``.
+
+        Records are copied a chunk at a time under the read lock and indexed
+        without it, so writers never wait for more than one chunk. What they
+        change meanwhile is logged by _index_record/_unindex_record and
+        replayed onto the new index before it goes live.
+        """
+        with self._index_lock:
+            if getattr(self, attribute) is not None:
+                return
+            index = factory()
+            with self._rwlock.read():
+                ids = list(self._sorted_ids)
+                self._index_log = []
+            try:
+                for start in range(0, len(ids), INDEX_CHUNK):
+                    with self._rwlock.read():
+                        chunk = [dict(self._records[equipment_id])
+                                 for equipment_id in ids[start:start + INDEX_CHUNK]
+                                 if equipment_id in self._records]
+                    for equipment in chunk:
+                        index.add(equipment)
+                with self._rwlock.write():
+                    # Every logged record ends with its latest version added
+                    # (or removed), whichever version the chunk copied
+                    for added, equipment in self._index_log:
+                        if added:
+                            index.add(equipment)
+                        else:
+                            index.remove(equipment)
+                    setattr(self, attribute, index)
+                    self._index_log = None
+            finally:
+                if self._index_log is not None:
+                    with self._rwlock.write():
+                        self._index_log = None
+    
+    def build_indexes(self, substring: bool = False):
+        """Build the token index now rather than on the first search, and
+        the trigram index too with ``substring``"""
+        self._ensure_index('token')
+        if substring:
+            self._ensure_index('substring')
     
     def _get_next_id(self) -> int:
-        """Get the next available ID"""
-        if not self.equipment_list:
-            return 1
-        return max(item['id'] for item in self.equipment_list) + 1
+        """Allocate the next ID from the high-water mark"""
+        equipment_id = self._next_id
+        self._next_id += 1
+        return equipment_id
     
+    @_writes
     def add_equipment(self, description: str, cost: float, purchase_date: str = None,
                      current_retail: float = 0.0, current_resale: float = 0.0,
                      resale_location: str = "", condition: str = "Good"):
         """Add new equipment to the tracker"""
+        equipment, change = self._insert(description, cost, purchase_date, current_retail,
+                                         current_resale, resale_location, condition)
+        self._persist(change)
+        return equipment['id']
+    
+    def _insert(self, description: str, cost: float, purchase_date: str = None,
+                current_retail: float = 0.0, current_resale: float = 0.0,
+                resale_location: str = "", condition: str = "Good") -> Tuple[Dict, Dict]:
+        """Add a record in memory; returns it and its journal change"""
         if purchase_date is None or purchase_date == "":
             purchase_date = datetime.now().strftime("%Y-%m-%d")
         
@@ -53,81 +669,634 @@ class EquipmentTracker:
             "date_added": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
-        self.equipment_list.append(equipment)
-        self._save_data()
-        return equipment['id']
+        equipment = self._insert_record(equipment)
+        return equipment, {'op': 'add', 'item': dict(equipment)}
     
+    def _insert_record(self, equipment: Dict) -> Dict:
+        """Store and index a complete record; returns the stored view"""
+        equipment_id = equipment['id']
+        self._records[equipment_id] = equipment
+        if self._sorted_ids and equipment_id < self._sorted_ids[-1]:
+            # Only imports bring back ids below the newest one
+            self._sorted_ids.insert(bisect_left(self._sorted_ids, equipment_id), equipment_id)
+        else:
+            self._sorted_ids.append(equipment_id)
+        equipment = self._records[equipment_id]
+        self._index_record(equipment)
+        return equipment
+    
+    @_writes
     def update_equipment(self, equipment_id: int, **kwargs):
         """Update existing equipment"""
-        for equipment in self.equipment_list:
-            if equipment['id'] == equipment_id:
-                for key, value in kwargs.items():
-                    if key in equipment and value is not None and value != "":
-                        if key in ['cost', 'current_retail', 'current_resale']:
-                            equipment[key] = float(value)
-                        else:
-                            equipment[key] = value
-                equipment['last_updated'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                self._save_data()
-                return True
-        return False
+        change = self._update(equipment_id, kwargs)
+        if change is None:
+            return False
+        self._persist(change)
+        return True
+    
+    def _update(self, equipment_id: int, kwargs: Dict) -> Optional[Dict]:
+        """Update a record in memory; returns its journal change"""
+        equipment = self._records.get(equipment_id)
+        if equipment is None:
+            return None
+        fields = {}
+        for key, value in kwargs.items():
+            if key in equipment and value is not None and value != "":
+                if key in ['cost', 'current_retail', 'current_resale']:
+                    fields[key] = float(value)
+                else:
+                    fields[key] = value
+        fields['last_updated'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._unindex_record(equipment)
+        if isinstance(equipment, EquipmentRecord):
+            equipment.update(fields)  # columns are updated in place
+        else:
+            equipment = dict(equipment, **fields)
+            self._records[equipment_id] = equipment
+        self._index_record(equipment)
+        return {'op': 'update', 'id': equipment_id, 'fields': fields}
     
+    @_writes
     def delete_equipment(self, equipment_id: int):
         """Delete equipment by ID"""
-        for i, equipment in enumerate(self.equipment_list):
-            if equipment['id'] == equipment_id:
-                self.equipment_list.pop(i)
-                self._save_data()
-                return True
-        return False
+        change = self._delete(equipment_id)
+        if change is None:
+            return False
+        self._persist(change)
+        return True
+    
+    def _delete(self, equipment_id: int) -> Optional[Dict]:
+        """Delete a record in memory; returns its journal change"""
+        equipment = self._records.get(equipment_id)
+        if equipment is None:
+            return None
+        self._unindex_record(equipment)
+        del self._records[equipment_id]
+        del self._sorted_ids[bisect_left(self._sorted_ids, equipment_id)]
+        return {'op': 'delete', 'id': equipment_id}
+    
+    @_writes
+    def apply_batch(self, operations: List[Dict]) -> List[Dict]:
+        """Apply operations from bulk.parse_operations all-or-nothing and
+        persist them with a single save (or one journal line)"""
+        check_ids(operations, lambda equipment_id: equipment_id in self._records)
+        changes, results = [], []
+        for operation in operations:
+            if operation['op'] == 'create':
+                equipment, change = self._insert(**operation['fields'])
+                results.append({'op': 'create', 'id': equipment['id']})
+            elif operation['op'] == 'update':
+                change = self._update(operation['id'], operation['fields'])
+                results.append({'op': 'update', 'id': operation['id']})
+            else:
+                change = self._delete(operation['id'])
+                results.append({'op': 'delete', 'id': operation['id']})
+            changes.append(change)
+        if changes:
+            self._persist({'op': 'batch', 'changes': changes})
+        return results
+    
+    def import_records(self, chunks: Iterable[List[Dict]]) -> Dict[str, int]:
+        """Create or update records from imports.read_csv chunks, then
+        persist everything with one snapshot write.
+
+        Rows whose id exists update that item; rows with a new id are
+        created under it, and rows without one get the next free id. If
+        reading the chunks fails partway, the chunks already applied are
+        undone and nothing is saved, like the SQLite backend's transaction.
+        """
+        created = updated = 0
+        # Records as they were before the import (None: created by it)
+        originals: Dict[int, Optional[Dict]] = {}
+        # Other processes wait for the whole import; readers here only
+        # wait for one chunk at a time
+        with self._file_lock:
+            self._refresh()
+            next_id, dirty = self._next_id, self._dirty
+            try:
+                for chunk in chunks:
+                    # Lock per chunk so reads carry on between chunks of a big file
+                    with self._rwlock.write():
+                        for record in chunk:
+                            equipment_id = record.get('id')
+                            if equipment_id in self._records:
+                                originals.setdefault(equipment_id, dict(self._records[equipment_id]))
+                                fields = {key: value for key, value in record.items() if key != 'id'}
+                                self._update(equipment_id, fields)
+                                updated += 1
+                                continue
+                            if equipment_id is None:
+                                record['id'] = self._get_next_id()
+                            else:
+                                self._next_id = max(self._next_id, equipment_id + 1)
+                            if not record.get('purchase_date'):
+                                record['purchase_date'] = datetime.now().strftime("%Y-%m-%d")
+                            if not record.get('date_added'):
+                                record['date_added'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                            self._insert_record({key: record[key] for key in FIELD_ORDER if key in record})
+                            originals.setdefault(record['id'], None)
+                            created += 1
+                        if chunk:
+                            # Readers between chunks must not get the old tag
+                            self.data_version += 1
+                            self._dirty = True
+            except BaseException:
+                with self._rwlock.write():
+                    self._restore(originals)
+                    self._next_id, self._dirty = next_id, dirty
+                    # Readers between chunks must not keep the partial tag
+                    self.data_version += 1
+                raise
+            if created or updated:
+                with self._rwlock.write():
+                    self.data_version += 1
+                    self.last_modified = time.time()
+                    if self.journal:
+                        # One snapshot instead of a journal line per row
+                        self._compact(background=False, force=True)
+                    else:
+                        self._save_data()
+                    self._stamp = self._file_stamp()
+        return {'created': created, 'updated': updated}
+    
+    def _restore(self, originals: Dict[int, Optional[Dict]]):
+        """Put records back as they were (None: remove them)"""
+        for equipment_id, original in originals.items():
+            if equipment_id in self._records:
+                self._delete(equipment_id)
+            if original is not None:
+                self._insert_record(original)
     
-    def search_equipment(self, query: str) -> List[Dict]:
-        """Search equipment by description"""
+    @_searches
+    @_reads
+    def search_equipment(self, query: str, mode: str = 'token') -> List[Dict]:
+        """Search equipment by description, condition or location.
+
+        ``mode`` picks the strategy: 'token' (word-prefix matches, best match
+        first), 'substring' (exact substring matches via the trigram index)
+        or 'scan' (exact substring matches by checking every record).
+        """
+        return [self._snapshot(equipment) for equipment in self._search(query, mode)]
+    
+    def _search(self, query: str, mode: str) -> List[Dict]:
         if not query:
-            return self.equipment_list
-        results = []
+            return list(self._records.values())
+        if mode == 'scan':
+            return self._scan_search(query)
+        if mode not in ('token', 'substring'):
+            raise ValueError(f"Unknown search mode: {mode}")
+        if mode == 'substring':
+            return self._substring_search(query)
+        ranked = self._token_index.search(query)
+        if ranked is None:
+            # Nothing word-like to look up (e.g. "/"); fall back to a scan
+            return self._scan_search(query)
+        return [self._records[equipment_id] for equipment_id, _ in ranked]
+    
+    @staticmethod
+    def _contains(equipment: Dict, query_lower: str) -> bool:
+        return any(query_lower in str(equipment.get(field) or '').lower()
+                   for field in SEARCH_FIELDS)
+    
+    def _scan_search(self, query: str) -> List[Dict]:
+        """Substring search over every record"""
         query_lower = query.lower()
-        for equipment in self.equipment_list:
-            if (query_lower in equipment['description'].lower() or 
-                query_lower in equipment['condition'].lower() or
-                query_lower in equipment['resale_location'].lower()):
+        return [equipment for equipment in self._records.values()
+                if self._contains(equipment, query_lower)]
+    
+    def _substring_search(self, query: str) -> List[Dict]:
+        """Substring search, checking only trigram-index candidates"""
+        candidates = self._trigram_index.candidates(query)
+        if candidates is None:
+            return self._scan_search(query)
+        query_lower = query.lower()
+        results = []
+        for equipment_id in sorted(candidates):
+            equipment = self._records[equipment_id]
+            if self._contains(equipment, query_lower):
                 results.append(equipment)
         return results
     
+    @_reads
     def get_all_equipment(self) -> List[Dict]:
         """Get all equipment"""
-        return sorted(self.equipment_list, key=lambda x: x['id'], reverse=True)
+        return sorted((self._snapshot(equipment) for equipment in self._records.values()),
+                      key=lambda x: x['id'], reverse=True)
+    
+    def iter_equipment(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """Yield all equipment newest first without building a sorted list.
+
+        The lock is only held while taking the snapshot, never across a
+        yield, so a slow consumer such as a streamed export doesn't hold up
+        edits. Dict records are snapshotted as of the call; columnar rows
+        are copied a batch at a time.
+        """
+        self._sync()
+        with self._rwlock.read():
+            if not isinstance(self._records, ColumnarStore):
+                snapshot = [self._records[equipment_id]
+                            for equipment_id in reversed(self._sorted_ids)]
+            else:
+                snapshot = None
+                ids = self._sorted_ids[::-1]
+        if snapshot is not None:
+            yield from snapshot
+            return
+        for start in range(0, len(ids), batch_size):
+            with self._rwlock.read():
+                batch = [dict(self._records[equipment_id])
+                         for equipment_id in ids[start:start + batch_size]
+                         if equipment_id in self._records]  # skip rows deleted since
+            yield from batch
+    
+    @_reads
+    def get_equipment_page(self, limit: int = DEFAULT_PAGE_SIZE,
+                           cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Get one page of equipment, newest first.
+
+        ``cursor`` is the value returned with the previous page (the last id
+        shown); returns the page and the cursor for the next one, or None.
+        """
+        page, next_cursor = self._equipment_page(limit, cursor)
+        return [self._snapshot(equipment) for equipment in page], next_cursor
     
+    def _equipment_page(self, limit: int, cursor: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+        end = len(self._sorted_ids)
+        if cursor:
+            end = bisect_left(self._sorted_ids, int(cursor))
+        start = max(0, end - limit)
+        page = [self._records[equipment_id]
+                for equipment_id in reversed(self._sorted_ids[start:end])]
+        next_cursor = str(page[-1]['id']) if page and start > 0 else None
+        return page, next_cursor
+    
+    @_searches
+    @_reads
+    def search_page(self, query: str, mode: str = 'token', limit: int = DEFAULT_PAGE_SIZE,
+                    cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Get one page of search results.
+
+        Token searches page through the ranking with "score:id" cursors;
+        substring and scan searches page newest first with id cursors.
+        """
+        page, next_cursor = self._search_page(query, mode, limit, cursor)
+        return [self._snapshot(equipment) for equipment in page], next_cursor
+    
+    def _search_page(self, query: str, mode: str, limit: int,
+                     cursor: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+        if not query:
+            return self._equipment_page(limit, cursor)
+        if mode == 'token':
+            ranked = self._token_index.search(query)
+            if ranked is not None:
+                keys = [(-score, -equipment_id) for equipment_id, score in ranked]
+                start = 0
+                if cursor:
+                    score, equipment_id = cursor.split(':')
+                    start = bisect_right(keys, (-int(score), -int(equipment_id)))
+                hits = ranked[start:start + limit]
+                next_cursor = None
+                if hits and start + limit < len(ranked):
+                    next_cursor = f"{hits[-1][1]}:{hits[-1][0]}"
+                return [self._records[equipment_id] for equipment_id, _ in hits], next_cursor
+            matches = self._scan_search(query)
+        else:
+            matches = self._search(query, mode)
+        ids = sorted((item['id'] for item in matches), reverse=True)
+        if cursor:
+            before = int(cursor)
+            ids = [equipment_id for equipment_id in ids if equipment_id < before]
+        page = [self._records[equipment_id] for equipment_id in ids[:limit]]
+        next_cursor = str(page[-1]['id']) if len(ids) > limit else None
+        return page, next_cursor
+    
+    @_reads
     def get_equipment_by_id(self, equipment_id: int) -> Optional[Dict]:
         """Get equipment by ID"""
-        for equipment in self.equipment_list:
-            if equipment['id'] == equipment_id:
-                return equipment
-        return None
+        equipment = self._records.get(equipment_id)
+        return self._snapshot(equipment) if equipment is not None else None
+    
+    @_reads
+    def get_analytics(self, top: int = 10) -> Dict:
+        """Grouped valuation statistics; see InventoryAnalytics.summary"""
+        return self.analytics.summary(top=top)
     
+    @_reads
     def get_total_value(self) -> Dict[str, float]:
         """Calculate total values"""
-        total_cost = sum(item['cost'] for item in self.equipment_list)
-        total_retail = sum(item['current_retail'] for item in self.equipment_list)
-        total_resale = sum(item['current_resale'] for item in self.equipment_list)
+        total_cost = self._totals['total_cost']
+        total_retail = self._totals['total_retail']
+        total_resale = self._totals['total_resale']
         
         return {
             'total_cost': total_cost,
             'total_retail': total_retail,
             'total_resale': total_resale,
             'profit_loss': total_resale - total_cost,
-            'count': len(self.equipment_list)
+            'count': len(self._records)
         }
+    
+    def _exact_sum(self, field: str) -> float:
+        if isinstance(self._records, ColumnarStore):
+            return self._records.column_sum(field)
+        return math.fsum(item[field] for item in self._records.values())
+    
+    @_writes
+    def check_totals(self, repair: bool = False, tolerance: float = 1e-6,
+                     rel_tolerance: float = 1e-9) -> Dict[str, float]:
+        """Recompute totals from scratch and report drift in the running sums.
+
+        Returns {key: running - recomputed} for every sum that is off by
+        more than ``tolerance`` and by more than ``rel_tolerance`` of its
+        size. Rounding alone leaves large sums a little off, so only real
+        drift counts. With ``repair`` the running sums are reset as well.
+        """
+        drift = {}
+        for field, key in TOTAL_FIELDS.items():
+            actual = self._exact_sum(field)
+            if not math.isclose(self._totals[key], actual,
+                                rel_tol=rel_tolerance, abs_tol=tolerance):
+                drift[key] = self._totals[key] - actual
+            if repair:
+                self._totals[key] = actual
+        return drift
+
+def _create_tracker():
+    """Build the tracker selected by the environment"""
+    if os.environ.get('EQUIPMENT_DB'):
+        store = SQLiteEquipmentTracker(os.environ['EQUIPMENT_DB'])
+    else:
+        store = EquipmentTracker(
+            os.environ.get('EQUIPMENT_DATA_FILE', 'equipment_data.json'),
+            journal=_env_flag('EQUIPMENT_JOURNAL'),
+            compact_threshold=int(os.environ.get('EQUIPMENT_COMPACT_THRESHOLD', 1000)),
+            columnar=_env_flag('EQUIPMENT_COLUMNAR'),
+            save_delay=float(os.environ.get('EQUIPMENT_SAVE_DELAY', 0))
+        )
+    if _env_flag('EQUIPMENT_SELF_CHECK'):
+        drift = store.check_totals(repair=True)
+        if drift:
+            app.logger.warning('Running totals drifted from recomputed values: %s', drift)
+    return store
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+def get_tracker():
+    """Return the tracker, loading the inventory on first use"""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = _create_tracker()
+    return _tracker
+
+# Importing the app stays cheap; the data file is read by the first request
+tracker = LocalProxy(get_tracker)
+
+def preload():
+    """Load the inventory and compile the templates in a forking server's
+    master process (see gunicorn.conf.py), so every worker starts with them.
+
+    The loaded objects are moved out of the garbage collector's reach with
+    gc.freeze(); otherwise the first collection in each worker would write
+    to every one of them and copy the shared pages.
+    """
+    global _preloaded
+    store = get_tracker()
+    if hasattr(store, 'build_indexes'):
+        store.build_indexes()
+    precompile_templates()
+    if not _preloaded:
+        os.register_at_fork(after_in_child=_after_fork)
+        _preloaded = True
+    gc.collect()
+    gc.freeze()
+    return store
+
+_preloaded = False
+
+def _after_fork():
+    if _tracker is not None:
+        _tracker.reset_after_fork()
+
+def flush():
+    """Write out saves still being coalesced (EQUIPMENT_SAVE_DELAY) before
+    the process exits; gunicorn.conf.py calls it from worker_exit"""
+    if _tracker is not None and hasattr(_tracker, 'flush'):
+        _tracker.flush()
+
+# Latency histograms, call counts and save sizes, served at /metrics.
+# Off by default: nothing is wrapped or recorded unless EQUIPMENT_METRICS is set.
+METRICS_ENABLED = _env_flag('EQUIPMENT_METRICS')
+metrics = MetricsRegistry()
+
+# Tracker methods timed per call (the SQLite backend has most of them)
+TIMED_METHODS = (
+    '_load_records', '_load_data', '_save_data', '_write_snapshot', '_refresh', '_compact',
+    'add_equipment', 'update_equipment', 'delete_equipment', 'apply_batch',
+    'import_records', 'search_equipment', 'search_page', 'get_all_equipment',
+    'get_equipment_page', 'get_equipment_by_id', 'get_total_value',
+    'get_analytics', 'check_totals',
+)
+
+def _record_save_size(method):
+    """Observe the size of the snapshot a save just wrote"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        size = file_size(self.data_file)
+        if size is not None:
+            metrics.observe('equipment_save_bytes', size, (('kind', 'snapshot'),))
+        return result
+    return wrapper
+
+def _record_append_size(method):
+    """Observe the size of each journal line"""
+    @wraps(method)
+    def wrapper(self, change):
+        written = method(self, change)
+        metrics.observe('equipment_save_bytes', written, (('kind', 'journal'),))
+        return written
+    return wrapper
+
+def _data_file_size() -> Optional[int]:
+    if isinstance(_tracker, EquipmentTracker):
+        return file_size(_tracker.data_file)
+    if isinstance(_tracker, SQLiteEquipmentTracker):
+        return file_size(_tracker.db_file)
+    return None
+
+def _journal_size() -> Optional[int]:
+    if isinstance(_tracker, EquipmentTracker):
+        return file_size(_tracker._journal.path)
+    return None
+
+def _enable_metrics():
+    metrics.histogram('equipment_tracker_call_seconds',
+                      'Time spent in tracker methods, by method')
+    metrics.counter('equipment_tracker_errors_total',
+                    'Tracker method calls that raised, by method')
+    metrics.histogram('equipment_http_request_seconds',
+                      'Time to build the response, by route and HTTP method')
+    metrics.counter('equipment_http_requests_total',
+                    'Requests served, by route, HTTP method and status')
+    metrics.histogram('equipment_save_bytes',
+                      'Bytes written per save: full snapshots or journal lines',
+                      buckets=SIZE_BUCKETS)
+    metrics.gauge('equipment_data_file_bytes', 'Size of the data file or database',
+                  _data_file_size)
+    metrics.gauge('equipment_journal_bytes', 'Size of the live change journal',
+                  _journal_size)
+
+    EquipmentTracker._save_data = _record_save_size(EquipmentTracker._save_data)
+    EquipmentTracker._write_snapshot = _record_save_size(EquipmentTracker._write_snapshot)
+    ChangeJournal.append = _record_append_size(ChangeJournal.append)
+    for cls in (EquipmentTracker, SQLiteEquipmentTracker):
+        instrument(cls, TIMED_METHODS, metrics, 'equipment_tracker_call_seconds',
+                   'equipment_tracker_errors_total')
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            # Streamed exports are timed to their first byte, not the last
+            route = request.endpoint or 'unmatched'
+            labels = (('route', route), ('method', request.method))
+            metrics.observe('equipment_http_request_seconds',
+                            time.perf_counter() - start, labels)
+            metrics.inc('equipment_http_requests_total',
+                        labels + (('status', str(response.status_code)),))
+        return response
+
+if METRICS_ENABLED:
+    _enable_metrics()
 
-# Initialize tracker
-tracker = EquipmentTracker()
+# Per-request cProfile reports, for requests sent with an X-Profile header
+# or ?profile= flag. Off unless EQUIPMENT_PROFILE_DIR names a directory.
+PROFILE_DIR = os.environ.get('EQUIPMENT_PROFILE_DIR')
+
+def _tracker_entry_points() -> set:
+    """pstats keys of the public tracker methods, undecorated, and of each
+    wrapper around them (_reads, _searches, _writes, metrics timing)"""
+    keys = set()
+    for cls in (EquipmentTracker, SQLiteEquipmentTracker):
+        for name, attr in vars(cls).items():
+            if name.startswith('_'):
+                continue
+            if isinstance(attr, property):
+                attr = attr.fget
+            attr = getattr(attr, '__func__', attr)  # staticmethod
+            while attr is not None:
+                key = code_key(attr)
+                if key is not None:
+                    keys.add(key)
+                attr = getattr(attr, '__wrapped__', None)
+    return keys
+
+def _profile_sections(stats) -> Dict[str, float]:
+    """Split a profiled request into tracker, template and CSV time"""
+    exports_file = code_key(stream_csv)[0]
+    return {
+        # Methods call one another (_searches into _reads, SQLite's
+        # get_equipment_page into search_page); count the outermost only
+        'tracker': outermost(stats, _tracker_entry_points()),
+        'templates': cumulative(stats, [code_key(Template.render)]),
+        # The CSV writer's own work, not the tracker feeding it records
+        'csv': exclusive(stats, code_key(stream_csv),
+                         lambda callee: callee[0] in ('~', exports_file)),
+    }
+
+if PROFILE_DIR:
+    app.wsgi_app = RequestProfiler(
+        app.wsgi_app, PROFILE_DIR,
+        keep=int(os.environ.get('EQUIPMENT_PROFILE_KEEP', 20)),
+        token=os.environ.get('EQUIPMENT_PROFILE_TOKEN', ''),
+        sections=_profile_sections)
+
+# Rendered dashboard/search pages for the current data version
+page_cache = PageCache(max_entries=int(os.environ.get('EQUIPMENT_PAGE_CACHE_SIZE', 128)))
+
+def conditional(view):
+    """Serve a read-only view with ETag/Last-Modified from the tracker's
+    data version, answering 304 when the client's copy is still current"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if session.get('_flashes'):
+            # The page carries one-off flash messages; always render it
+            return view(*args, **kwargs)
+        etag = tracker.version_tag
+        modified = tracker.last_modified
+        last_modified = datetime.fromtimestamp(int(modified), timezone.utc)
+        # Last-Modified only has whole seconds. Until the second of the last
+        # change is over, another change could land in it unnoticed, so the
+        # date is neither sent nor trusted; the ETag still works meanwhile.
+        settled = time.time() >= int(modified) + 1
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains(etag)
+        else:
+            since = request.if_modified_since
+            not_modified = settled and since is not None and last_modified <= since
+        if not_modified:
+            response = app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        if settled:
+            response.last_modified = last_modified
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
+
+def cached_page(view):
+    """Serve a rendered page from page_cache while the data is unchanged"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if session.get('_flashes'):
+            # Flash messages are rendered into the page; don't cache them
+            return view(*args, **kwargs)
+        version = tracker.version_tag
+        key = (request.endpoint, tuple(sorted(request.args.items(multi=True))))
+        page = page_cache.get(version, key)
+        if page is None:
+            page = view(*args, **kwargs)
+            if isinstance(page, str):
+                page_cache.put(version, key, page)
+        return page
+    return wrapper
+
+def _page_args() -> Tuple[int, Optional[str]]:
+    """Read page size and cursor from the query string"""
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    return max(1, min(limit, MAX_PAGE_SIZE)), request.args.get('cursor') or None
+
+def _search_args() -> Tuple[str, str]:
+    """Read search query and mode from the query string"""
+    query = request.args.get('q', '').strip()
+    mode = request.args.get('mode', 'token')
+    if mode not in SEARCH_MODES:
+        mode = 'token'
+    return query, mode
 
 @app.route('/')
+@conditional
+@cached_page
 def index():
     """Main dashboard"""
-    equipment_list = tracker.get_all_equipment()
+    limit, cursor = _page_args()
+    try:
+        equipment_list, next_cursor = tracker.get_equipment_page(limit, cursor)
+    except ValueError:
+        abort(400, 'Invalid page cursor')
     summary = tracker.get_total_value()
-    return render_template('index.html', equipment_list=equipment_list, summary=summary)
+    return render_template('index.html', equipment_list=equipment_list, summary=summary,
+                           page_size=limit, cursor=cursor, next_cursor=next_cursor)
 
 @app.route('/add', methods=['GET', 'POST'])
 def add_equipment():
@@ -212,444 +1381,86 @@ def delete_equipment(equipment_id):
     return redirect(url_for('index'))
 
 @app.route('/search')
+@conditional
+@cached_page
 def search():
     """Search equipment"""
-    query = request.args.get('q', '').strip()
-    equipment_list = tracker.search_equipment(query)
+    query, mode = _search_args()
+    limit, cursor = _page_args()
+    try:
+        equipment_list, next_cursor = tracker.search_page(query, mode, limit, cursor)
+    except ValueError:
+        abort(400, 'Invalid page cursor')
     summary = tracker.get_total_value()
-    return render_template('index.html', equipment_list=equipment_list, summary=summary, search_query=query)
+    return render_template('index.html', equipment_list=equipment_list, summary=summary,
+                           search_query=query, search_mode=mode, page_size=limit,
+                           cursor=cursor, next_cursor=next_cursor)
 
 @app.route('/api/summary')
+@conditional
 def api_summary():
     """API endpoint for summary data"""
     return jsonify(tracker.get_total_value())
 
+@app.route('/api/equipment')
+@conditional
+def api_equipment():
+    """API endpoint for one page of equipment, newest first"""
+    limit, cursor = _page_args()
+    try:
+        equipment_list, next_cursor = tracker.get_equipment_page(limit, cursor)
+    except ValueError:
+        abort(400, 'Invalid page cursor')
+    return jsonify({'items': [dict(item) for item in equipment_list],
+                    'next_cursor': next_cursor})
+
+@app.route('/api/equipment', methods=['POST'])
+def api_equipment_bulk():
+    """API endpoint for a batch of creates, updates and deletes"""
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return jsonify({'error': 'Expected a JSON request body'}), 400
+    try:
+        results = tracker.apply_batch(parse_operations(payload))
+    except BulkOperationError as e:
+        return jsonify({'error': str(e), 'index': e.index}), 400
+    return jsonify({'results': results, 'count': len(results)})
+
+@app.route('/api/search')
+@conditional
+def api_search():
+    """API endpoint for one page of search results"""
+    query, mode = _search_args()
+    limit, cursor = _page_args()
+    try:
+        equipment_list, next_cursor = tracker.search_page(query, mode, limit, cursor)
+    except ValueError:
+        abort(400, 'Invalid page cursor')
+    return jsonify({'items': [dict(item) for item in equipment_list],
+                    'next_cursor': next_cursor})
+
+@app.route('/api/cache')
+def api_cache():
+    """API endpoint for page cache hit/miss counters"""
+    return jsonify(page_cache.stats())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics for this process (EQUIPMENT_METRICS=1)"""
+    if not METRICS_ENABLED:
+        abort(404)
+    return app.response_class(metrics.render(),
+                              content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/analytics')
+@conditional
+def api_analytics():
+    """API endpoint for grouped valuation analytics"""
+    if not InventoryAnalytics.available():
+        return jsonify({'error': 'Analytics require NumPy: pip install numpy'}), 501
+    top = max(0, min(request.args.get('top', 10, type=int), 100))
+    return jsonify(tracker.get_analytics(top=top))
+
 if __name__ == '__main__':
-    # Create templates directory if it doesn't exist
-    os.makedirs('templates', exist_ok=True)
-    
-    # Create base template
-    with open('templates/base.html', 'w') as f:
-        f.write('''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{% block title %}Equipment Tracker{% endblock %}</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    <style>
-        .card-stats { border-left: 4px solid #007bff; }
-        .profit-positive { color: #28a745; }
-        .profit-negative { color: #dc3545; }
-        .table-actions { width: 120px; }
-        .search-box { max-width: 400px; }
-    </style>
-</head>
-<body class="bg-light">
-    <nav class="navbar navbar-expand-lg navbar-dark bg-primary">
-        <div class="container">
-            <a class="navbar-brand" href="{{ url_for('index') }}">
-                <i class="fas fa-tools me-2"></i>Equipment Tracker
-            </a>
-            <div class="navbar-nav ms-auto">
-                <a class="nav-link" href="{{ url_for('index') }}">
-                    <i class="fas fa-home me-1"></i>Dashboard
-                </a>
-                <a class="nav-link" href="{{ url_for('add_equipment') }}">
-                    <i class="fas fa-plus me-1"></i>Add Equipment
-                </a>
-            </div>
-        </div>
-    </nav>
-
-    <div class="container mt-4">
-        {% with messages = get_flashed_messages(with_categories=true) %}
-            {% if messages %}
-                {% for category, message in messages %}
-                    <div class="alert alert-{{ 'danger' if category == 'error' else 'success' }} alert-dismissible fade show" role="alert">
-                        {{ message }}
-                        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                    </div>
-                {% endfor %}
-            {% endif %}
-        {% endwith %}
-
-        {% block content %}{% endblock %}
-    </div>
-
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-    {% block scripts %}{% endblock %}
-</body>
-</html>''')
-    
-    # Create index template
-    with open('templates/index.html', 'w') as f:
-        f.write('''{% extends "base.html" %}
-
-{% block content %}
-<div class="row mb-4">
-    <div class="col-md-3">
-        <div class="card card-stats">
-            <div class="card-body">
-                <div class="d-flex justify-content-between">
-                    <div>
-                        <p class="card-category text-muted">Total Items</p>
-                        <h3 class="card-title">{{ summary.count }}</h3>
-                    </div>
-                    <div class="icon">
-                        <i class="fas fa-boxes fa-2x text-primary"></i>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-    <div class="col-md-3">
-        <div class="card card-stats">
-            <div class="card-body">
-                <div class="d-flex justify-content-between">
-                    <div>
-                        <p class="card-category text-muted">Total Cost</p>
-                        <h3 class="card-title">${{ "%.2f"|format(summary.total_cost) }}</h3>
-                    </div>
-                    <div class="icon">
-                        <i class="fas fa-dollar-sign fa-2x text-success"></i>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-    <div class="col-md-3">
-        <div class="card card-stats">
-            <div class="card-body">
-                <div class="d-flex justify-content-between">
-                    <div>
-                        <p class="card-category text-muted">Current Retail</p>
-                        <h3 class="card-title">${{ "%.2f"|format(summary.total_retail) }}</h3>
-                    </div>
-                    <div class="icon">
-                        <i class="fas fa-tag fa-2x text-info"></i>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-    <div class="col-md-3">
-        <div class="card card-stats">
-            <div class="card-body">
-                <div class="d-flex justify-content-between">
-                    <div>
-                        <p class="card-category text-muted">Profit/Loss</p>
-                        <h3 class="card-title {{ 'profit-positive' if summary.profit_loss >= 0 else 'profit-negative' }}">
-                            ${{ "%.2f"|format(summary.profit_loss) }}
-                        </h3>
-                    </div>
-                    <div class="icon">
-                        <i class="fas fa-chart-line fa-2x {{ 'text-success' if summary.profit_loss >= 0 else 'text-danger' }}"></i>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-</div>
-
-<div class="card">
-    <div class="card-header d-flex justify-content-between align-items-center">
-        <h5 class="mb-0">
-            <i class="fas fa-list me-2"></i>Equipment Inventory
-            {% if search_query %}
-                <small class="text-muted">(Search: "{{ search_query }}")</small>
-            {% endif %}
-        </h5>
-        <div class="d-flex gap-2">
-            <form method="GET" action="{{ url_for('search') }}" class="d-flex search-box">
-                <input type="text" name="q" class="form-control" placeholder="Search equipment..." 
-                       value="{{ search_query or '' }}">
-                <button type="submit" class="btn btn-outline-primary">
-                    <i class="fas fa-search"></i>
-                </button>
-            </form>
-            <a href="{{ url_for('add_equipment') }}" class="btn btn-primary">
-                <i class="fas fa-plus me-1"></i>Add Equipment
-            </a>
-        </div>
-    </div>
-    <div class="card-body p-0">
-        {% if equipment_list %}
-        <div class="table-responsive">
-            <table class="table table-hover mb-0">
-                <thead class="table-light">
-                    <tr>
-                        <th>ID</th>
-                        <th>Description</th>
-                        <th>Cost</th>
-                        <th>Purchase Date</th>
-                        <th>Current Retail</th>
-                        <th>Current Resale</th>
-                        <th>Location</th>
-                        <th>Condition</th>
-                        <th class="table-actions">Actions</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {% for equipment in equipment_list %}
-                    <tr>
-                        <td><span class="badge bg-secondary">{{ equipment.id }}</span></td>
-                        <td>
-                            <strong>{{ equipment.description }}</strong>
-                            {% if equipment.date_added %}
-                            <br><small class="text-muted">Added: {{ equipment.date_added[:10] }}</small>
-                            {% endif %}
-                        </td>
-                        <td class="text-success">${{ "%.2f"|format(equipment.cost) }}</td>
-                        <td>{{ equipment.purchase_date }}</td>
-                        <td class="text-info">${{ "%.2f"|format(equipment.current_retail) }}</td>
-                        <td class="text-warning">${{ "%.2f"|format(equipment.current_resale) }}</td>
-                        <td>{{ equipment.resale_location or '-' }}</td>
-                        <td>
-                            <span class="badge 
-                                {% if equipment.condition == 'Excellent' %}bg-success
-                                {% elif equipment.condition == 'Good' %}bg-primary
-                                {% elif equipment.condition == 'Fair' %}bg-warning
-                                {% else %}bg-danger{% endif %}">
-                                {{ equipment.condition }}
-                            </span>
-                        </td>
-                        <td>
-                            <div class="btn-group btn-group-sm">
-                                <a href="{{ url_for('edit_equipment', equipment_id=equipment.id) }}" 
-                                   class="btn btn-outline-primary" title="Edit">
-                                    <i class="fas fa-edit"></i>
-                                </a>
-                                <a href="{{ url_for('delete_equipment', equipment_id=equipment.id) }}" 
-                                   class="btn btn-outline-danger" title="Delete"
-                                   onclick="return confirm('Are you sure you want to delete this equipment?')">
-                                    <i class="fas fa-trash"></i>
-                                </a>
-                            </div>
-                        </td>
-                    </tr>
-                    {% endfor %}
-                </tbody>
-            </table>
-        </div>
-        {% else %}
-        <div class="text-center py-5">
-            <i class="fas fa-inbox fa-3x text-muted mb-3"></i>
-            <h5 class="text-muted">No equipment found</h5>
-            <p class="text-muted">
-                {% if search_query %}
-                    No equipment matches your search criteria.
-                    <a href="{{ url_for('index') }}">Show all equipment</a>
-                {% else %}
-                    Start by adding your first piece of equipment.
-                {% endif %}
-            </p>
-            {% if not search_query %}
-            <a href="{{ url_for('add_equipment') }}" class="btn btn-primary">
-                <i class="fas fa-plus me-1"></i>Add First Equipment
-            </a>
-            {% endif %}
-        </div>
-        {% endif %}
-    </div>
-</div>
-{% endblock %}''')
-    
-    # Create add template
-    with open('templates/add.html', 'w') as f:
-        f.write('''{% extends "base.html" %}
-
-{% block title %}Add Equipment - Equipment Tracker{% endblock %}
-
-{% block content %}
-<div class="row justify-content-center">
-    <div class="col-lg-8">
-        <div class="card">
-            <div class="card-header">
-                <h5 class="mb-0">
-                    <i class="fas fa-plus me-2"></i>Add New Equipment
-                </h5>
-            </div>
-            <div class="card-body">
-                <form method="POST">
-                    <div class="row">
-                        <div class="col-md-8 mb-3">
-                            <label for="description" class="form-label">Description *</label>
-                            <input type="text" class="form-control" id="description" name="description" 
-                                   placeholder="Enter equipment description" required>
-                        </div>
-                        <div class="col-md-4 mb-3">
-                            <label for="cost" class="form-label">Purchase Cost *</label>
-                            <div class="input-group">
-                                <span class="input-group-text">$</span>
-                                <input type="number" class="form-control" id="cost" name="cost" 
-                                       step="0.01" min="0" placeholder="0.00" required>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="row">
-                        <div class="col-md-6 mb-3">
-                            <label for="purchase_date" class="form-label">Purchase Date</label>
-                            <input type="date" class="form-control" id="purchase_date" name="purchase_date">
-                        </div>
-                        <div class="col-md-6 mb-3">
-                            <label for="condition" class="form-label">Condition</label>
-                            <select class="form-select" id="condition" name="condition">
-                                <option value="Excellent">Excellent</option>
-                                <option value="Good" selected>Good</option>
-                                <option value="Fair">Fair</option>
-                                <option value="Poor">Poor</option>
-                            </select>
-                        </div>
-                    </div>
-                    
-                    <div class="row">
-                        <div class="col-md-6 mb-3">
-                            <label for="current_retail" class="form-label">Current Retail Price</label>
-                            <div class="input-group">
-                                <span class="input-group-text">$</span>
-                                <input type="number" class="form-control" id="current_retail" name="current_retail" 
-                                       step="0.01" min="0" placeholder="0.00">
-                            </div>
-                        </div>
-                        <div class="col-md-6 mb-3">
-                            <label for="current_resale" class="form-label">Current Resale Price</label>
-                            <div class="input-group">
-                                <span class="input-group-text">$</span>
-                                <input type="number" class="form-control" id="current_resale" name="current_resale" 
-                                       step="0.01" min="0" placeholder="0.00">
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="mb-3">
-                        <label for="resale_location" class="form-label">Resale Location</label>
-                        <input type="text" class="form-control" id="resale_location" name="resale_location" 
-                               placeholder="e.g., eBay, Craigslist, Local store">
-                    </div>
-                    
-                    <div class="d-flex gap-2">
-                        <button type="submit" class="btn btn-primary">
-                            <i class="fas fa-save me-1"></i>Add Equipment
-                        </button>
-                        <a href="{{ url_for('index') }}" class="btn btn-secondary">
-                            <i class="fas fa-times me-1"></i>Cancel
-                        </a>
-                    </div>
-                </form>
-            </div>
-        </div>
-    </div>
-</div>
-{% endblock %}
-
-{% block scripts %}
-<script>
-// Set today's date as default
-document.getElementById('purchase_date').valueAsDate = new Date();
-</script>
-{% endblock %}''')
-    
-    # Create edit template
-    with open('templates/edit.html', 'w') as f:
-        f.write('''{% extends "base.html" %}
-
-{% block title %}Edit Equipment - Equipment Tracker{% endblock %}
-
-{% block content %}
-<div class="row justify-content-center">
-    <div class="col-lg-8">
-        <div class="card">
-            <div class="card-header">
-                <h5 class="mb-0">
-                    <i class="fas fa-edit me-2"></i>Edit Equipment
-                </h5>
-            </div>
-            <div class="card-body">
-                <form method="POST">
-                    <div class="row">
-                        <div class="col-md-8 mb-3">
-                            <label for="description" class="form-label">Description *</label>
-                            <input type="text" class="form-control" id="description" name="description" 
-                                   value="{{ equipment.description }}" required>
-                        </div>
-                        <div class="col-md-4 mb-3">
-                            <label for="cost" class="form-label">Purchase Cost *</label>
-                            <div class="input-group">
-                                <span class="input-group-text">$</span>
-                                <input type="number" class="form-control" id="cost" name="cost" 
-                                       step="0.01" min="0" value="{{ equipment.cost }}" required>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="row">
-                        <div class="col-md-6 mb-3">
-                            <label for="purchase_date" class="form-label">Purchase Date</label>
-                            <input type="date" class="form-control" id="purchase_date" name="purchase_date" 
-                                   value="{{ equipment.purchase_date }}">
-                        </div>
-                        <div class="col-md-6 mb-3">
-                            <label for="condition" class="form-label">Condition</label>
-                            <select class="form-select" id="condition" name="condition">
-                                <option value="Excellent" {{ 'selected' if equipment.condition == 'Excellent' else '' }}>Excellent</option>
-                                <option value="Good" {{ 'selected' if equipment.condition == 'Good' else '' }}>Good</option>
-                                <option value="Fair" {{ 'selected' if equipment.condition == 'Fair' else '' }}>Fair</option>
-                                <option value="Poor" {{ 'selected' if equipment.condition == 'Poor' else '' }}>Poor</option>
-                            </select>
-                        </div>
-                    </div>
-                    
-                    <div class="row">
-                        <div class="col-md-6 mb-3">
-                            <label for="current_retail" class="form-label">Current Retail Price</label>
-                            <div class="input-group">
-                                <span class="input-group-text">$</span>
-                                <input type="number" class="form-control" id="current_retail" name="current_retail" 
-                                       step="0.01" min="0" value="{{ equipment.current_retail }}">
-                            </div>
-                        </div>
-                        <div class="col-md-6 mb-3">
-                            <label for="current_resale" class="form-label">Current Resale Price</label>
-                            <div class="input-group">
-                                <span class="input-group-text">$</span>
-                                <input type="number" class="form-control" id="current_resale" name="current_resale" 
-                                       step="0.01" min="0" value="{{ equipment.current_resale }}">
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="mb-3">
-                        <label for="resale_location" class="form-label">Resale Location</label>
-                        <input type="text" class="form-control" id="resale_location" name="resale_location" 
-                               value="{{ equipment.resale_location }}" placeholder="e.g., eBay, Craigslist, Local store">
-                    </div>
-                    
-                    <div class="d-flex gap-2">
-                        <button type="submit" class="btn btn-primary">
-                            <i class="fas fa-save me-1"></i>Update Equipment
-                        </button>
-                        <a href="{{ url_for('index') }}" class="btn btn-secondary">
-                            <i class="fas fa-times me-1"></i>Cancel
-                        </a>
-                    </div>
-                </form>
-            </div>
-        </div>
-    </div>
-</div>
-{% endblock %}''')
-    
-    print("Equipment Tracker Web Application")
-    print("=" * 40)
-    print("Templates created successfully!")
-    print("\nTo run the application:")
-    print("1. Install Flask: pip install flask")
-    print("2. Run: python app.py")
-    print("3. Open: http://localhost:5000")
-    print("\nStarting development server...")
-    
+    # Templates ship in templates/; this is the development server
     app.run(debug=True, host='0.0.0.0', port=5000)
-    
\ No newline at end of file
@@ -0,0 +1,119 @@
+# exports.py
+import csv
+import io
+import json
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+CSV_HEADER = [
+    'ID', 'Description', 'Purchase Cost', 'Purchase Date',
+    'Current Retail', 'Current Resale', 'Resale Location',
+    'Condition', 'Date Added', 'Last Updated', 'Profit/Loss'
+]
+
+# Flush the CSV buffer to the client once it holds this many characters;
+# yielding row by row would cost one WSGI write per item.
+CHUNK_SIZE = 64 * 1024
+
+
+def csv_row(equipment: Dict) -> List:
+    """One export row in CSV_HEADER order"""
+    profit_loss = equipment.get('current_resale', 0) - equipment.get('cost', 0)
+    return [
+        equipment.get('id', ''),
+        equipment.get('description', ''),
+        equipment.get('cost', 0),
+        equipment.get('purchase_date', ''),
+        equipment.get('current_retail', 0),
+        equipment.get('current_resale', 0),
+        equipment.get('resale_location', ''),
+        equipment.get('condition', ''),
+        equipment.get('date_added', ''),
+        equipment.get('last_updated', ''),
+        profit_loss
+    ]
+
+
+def stream_csv(equipment_list: Iterable[Dict]) -> Iterator[bytes]:
+    """Yield the CSV export in chunks as rows are produced"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CSV_HEADER)
+    for equipment in equipment_list:
+        writer.writerow(csv_row(equipment))
+        if output.tell() >= CHUNK_SIZE:
+            yield output.getvalue().encode('utf-8')
+            output.seek(0)
+            output.truncate()
+    if output.tell():
+        yield output.getvalue().encode('utf-8')
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip-compress a byte stream chunk by chunk"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_ndjson(equipment_list: Iterable[Dict]) -> Iterator[bytes]:
+    """Yield records as newline-delimited JSON, in the equipment_data.json shape"""
+    chunk: List[str] = []
+    size = 0
+    for equipment in equipment_list:
+        line = json.dumps(dict(equipment), separators=(',', ':'), default=str)
+        chunk.append(line)
+        size += len(line) + 1
+        if size >= CHUNK_SIZE:
+            yield ('\n'.join(chunk) + '\n').encode('utf-8')
+            chunk, size = [], 0
+    if chunk:
+        yield ('\n'.join(chunk) + '\n').encode('utf-8')
+
+
+def build_filter(args) -> Optional[Callable[[Dict], bool]]:
+    """Turn export query parameters into a record predicate.
+
+    Supported parameters (all optional, combined with AND):
+    ``condition`` (repeatable, exact), ``resale_location`` (substring),
+    ``purchased_after``/``purchased_before`` (inclusive YYYY-MM-DD),
+    ``min_cost``/``max_cost`` and ``changed_since`` (added or last updated
+    on or after a date or timestamp). Returns None when nothing is set.
+    Raises ValueError for malformed numbers.
+    """
+    checks: List[Callable[[Dict], bool]] = []
+
+    conditions = {value.lower() for value in args.getlist('condition') if value}
+    if conditions:
+        checks.append(lambda e: str(e.get('condition', '')).lower() in conditions)
+
+    location = args.get('resale_location', '').strip().lower()
+    if location:
+        checks.append(lambda e: location in str(e.get('resale_location', '')).lower())
+
+    purchased_after = args.get('purchased_after', '').strip()
+    if purchased_after:
+        checks.append(lambda e: str(e.get('purchase_date', '')) >= purchased_after)
+    purchased_before = args.get('purchased_before', '').strip()
+    if purchased_before:
+        # Compare the date part only so the bound is inclusive
+        checks.append(lambda e: str(e.get('purchase_date', ''))[:10] <= purchased_before)
+
+    if args.get('min_cost'):
+        min_cost = float(args['min_cost'])
+        checks.append(lambda e: e.get('cost', 0) >= min_cost)
+    if args.get('max_cost'):
+        max_cost = float(args['max_cost'])
+        checks.append(lambda e: e.get('cost', 0) <= max_cost)
+
+    changed_since = args.get('changed_since', '').strip()
+    if changed_since:
+        checks.append(lambda e: max(str(e.get('date_added') or ''),
+                                    str(e.get('last_updated') or '')) >= changed_since)
+
+    if not checks:
+        return None
+    return lambda equipment: all(check(equipment) for check in checks)
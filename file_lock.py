@@ -0,0 +1,72 @@
+# file_lock.py
+import os
+import threading
+from typing import Iterable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in this process are serialized
+    fcntl = None
+
+# (inode, size, mtime in ns) of a file, or None if it doesn't exist
+Stamp = Optional[Tuple[int, int, int]]
+
+
+def file_stamp(paths: Iterable[str]) -> Tuple[Stamp, ...]:
+    """Cheap fingerprint of a set of files; changes whenever any of them is
+    written, replaced, created or removed"""
+    stamps = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            stamps.append(None)
+        else:
+            stamps.append((st.st_ino, st.st_size, st.st_mtime_ns))
+    return tuple(stamps)
+
+
+class FileLock:
+    """Exclusive lock shared by every thread and process using ``path``.
+
+    Backed by ``flock`` on a lock file next to the data, so separate worker
+    processes serving the same inventory take turns writing it. Not
+    reentrant.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd: Optional[int] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock; with ``blocking`` false, return False instead of
+        waiting when another thread or process holds it"""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if fcntl is not None:
+            try:
+                if self._fd is None:
+                    self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._thread_lock.release()
+                return False
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        return True
+
+    def release(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,24 @@
+# gunicorn.conf.py
+"""Settings for ``gunicorn wsgi:app`` with several workers on one box.
+
+The app is imported and the inventory loaded once in the master; forked
+workers share those memory pages copy-on-write until they write to them.
+"""
+import os
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master after the app is imported, before any worker forks
+    from equipment import preload
+    preload()
+
+
+def worker_exit(server, worker):
+    # gunicorn handles SIGTERM itself, so write out coalesced saves here
+    from equipment import flush
+    flush()
@@ -0,0 +1,176 @@
+# imports.py
+import csv
+import io
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List
+
+from exports import CSV_HEADER
+
+# Export column -> record field; Profit/Loss is derived and ignored on import
+COLUMN_FIELDS = {
+    'ID': 'id', 'Description': 'description', 'Purchase Cost': 'cost',
+    'Purchase Date': 'purchase_date', 'Current Retail': 'current_retail',
+    'Current Resale': 'current_resale', 'Resale Location': 'resale_location',
+    'Condition': 'condition', 'Date Added': 'date_added', 'Last Updated': 'last_updated',
+}
+REQUIRED_COLUMNS = ('Description', 'Purchase Cost')
+NUMERIC_FIELDS = ('cost', 'current_retail', 'current_resale')
+
+# Rows validated per chunk handed to the tracker
+CHUNK_ROWS = 1000
+# Errors listed in a report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+class CSVImportError(ValueError):
+    """The file as a whole can't be imported (e.g. a missing column or
+    malformed CSV); nothing from it is kept"""
+
+
+class ImportReport:
+    """Counts and per-row errors collected while an import runs"""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors: List[Dict] = []
+
+    def add_error(self, line: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def to_dict(self) -> Dict:
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'skipped': self.error_count,
+            'errors': self.errors,
+        }
+
+
+def _number(value: str) -> float:
+    # Tolerate the currency formatting spreadsheets add on the way back
+    return float(value.replace(',', '').replace('$', '').strip())
+
+
+def coerce_row(row: Dict[str, str]) -> Dict:
+    """Turn one CSV row into a record; raises ValueError with a message"""
+    record = {}
+    for column, field in COLUMN_FIELDS.items():
+        value = (row.get(column) or '').strip()
+        if field == 'id':
+            if value:
+                try:
+                    record['id'] = int(value)
+                except ValueError:
+                    raise ValueError(f"ID must be an integer, got {value!r}")
+        elif field in NUMERIC_FIELDS:
+            if value:
+                try:
+                    record[field] = _number(value)
+                except ValueError:
+                    raise ValueError(f"{column} must be a number, got {value!r}")
+            elif field != 'cost':
+                record[field] = 0.0
+        elif field == 'purchase_date' and value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise ValueError(f"Purchase Date must be YYYY-MM-DD, got {value!r}")
+            record[field] = value
+        elif value or field in ('resale_location', 'description'):
+            record[field] = value
+    if not record['description']:
+        raise ValueError("Description is required")
+    if 'cost' not in record:
+        raise ValueError("Purchase Cost is required")
+    record.setdefault('condition', 'Good')
+    return record
+
+
+def read_csv(lines: Iterable[str], report: ImportReport,
+             chunk_rows: int = CHUNK_ROWS) -> Iterator[List[Dict]]:
+    """Parse an export-format CSV lazily, yielding chunks of valid records.
+
+    Invalid rows are skipped and recorded in ``report``; only one chunk is
+    held in memory at a time. Raises CSVImportError if the header lacks a
+    required column or the file isn't valid CSV (e.g. a field over the csv
+    module's size limit), possibly after some chunks were yielded.
+    """
+    reader = csv.DictReader(lines)
+    try:
+        header = reader.fieldnames or []
+    except csv.Error as e:
+        raise CSVImportError(f"Line {reader.line_num}: {e}") from e
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise CSVImportError(f"Missing column(s): {', '.join(missing)}; "
+                             f"expected the export header {', '.join(CSV_HEADER)}")
+    chunk = []
+    for row in _rows(reader):
+        report.rows += 1
+        try:
+            chunk.append(coerce_row(row))
+        except ValueError as e:
+            report.add_error(reader.line_num, str(e))
+            continue
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _rows(reader: csv.DictReader) -> Iterator[Dict[str, str]]:
+    try:
+        yield from reader
+    except csv.Error as e:
+        raise CSVImportError(f"Line {reader.line_num}: {e}") from e
+
+
+def import_csv(tracker, lines: Iterable[str], chunk_rows: int = CHUNK_ROWS) -> ImportReport:
+    """Stream a CSV into ``tracker`` and persist it in a single step; on
+    CSVImportError nothing is imported"""
+    report = ImportReport()
+    counts = tracker.import_records(read_csv(lines, report, chunk_rows))
+    report.created = counts['created']
+    report.updated = counts['updated']
+    return report
+
+
+def open_text(stream) -> io.TextIOWrapper:
+    """Wrap a binary upload for csv, dropping a spreadsheet's UTF-8 BOM;
+    undecodable bytes become U+FFFD rather than aborting the import"""
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python imports.py <export.csv> [equipment_data.json | equipment.db]")
+        sys.exit(1)
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else os.environ.get('EQUIPMENT_DB', "equipment_data.json")
+    if target.endswith('.db'):
+        from sqlite_store import SQLiteEquipmentTracker
+        store = SQLiteEquipmentTracker(target)
+    else:
+        from equipment import EquipmentTracker
+        store = EquipmentTracker(target)
+    with open(source, 'r', encoding='utf-8-sig', newline='') as f:
+        try:
+            result = import_csv(store, f)
+        except CSVImportError as e:
+            print(f"Import failed: {e}")
+            sys.exit(1)
+    print(f"Imported {source} into {target}: {result.created} created, "
+          f"{result.updated} updated, {result.error_count} skipped")
+    for error in result.errors:
+        print(f"  line {error['line']}: {error['error']}")
+    if result.error_count > len(result.errors):
+        print(f"  ... and {result.error_count - len(result.errors)} more")
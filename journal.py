@@ -0,0 +1,176 @@
+# journal.py
+import json
+import os
+from typing import Dict, Iterator, List, MutableMapping
+
+
+class ChangeJournal:
+    """Append-only log of equipment mutations kept next to the JSON snapshot.
+
+    Every add/update/delete is written as one compact JSON line, so a save
+    costs a single append instead of rewriting the whole inventory. The
+    journal is folded back into the snapshot by ``EquipmentTracker.compact``.
+    """
+
+    def __init__(self, data_file: str):
+        self.path = data_file + ".journal"
+        # While a compaction is writing the new snapshot, the entries it is
+        # folding in live here; new appends keep going to ``path``.
+        self.rotated_path = self.path + ".compacting"
+        self.entries = 0
+        # Largest id ever added according to the journal, including ids
+        # that were deleted again before the last compaction.
+        self.high_water = 0
+        # Bytes of the live journal applied so far; other processes append
+        # after it, and ``read_new`` picks up from here.
+        self.offset = 0
+
+    def append(self, change: Dict) -> int:
+        """Append one change record and fsync it, so a change that was
+        confirmed survives a power loss; returns the number of bytes written"""
+        data = (json.dumps(change, separators=(',', ':'), default=str) + "\n").encode('utf-8')
+        with open(self.path, 'a+b') as f:
+            _drop_torn_line(f)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            self.offset = f.tell()
+        self.entries += 1
+        return len(data)
+
+    def _read(self, path: str, start: int = 0) -> Iterator[Dict]:
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            f.seek(start)
+            for raw in iter(f.readline, b''):
+                line = raw.strip()
+                try:
+                    change = json.loads(line) if line else None
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append; everything
+                    # before it was flushed and is still valid.
+                    break
+                if path == self.path:
+                    self.offset = f.tell()
+                if change is not None:
+                    yield change
+
+    def _track(self, change: Dict):
+        for added in iter_changes(change):
+            if added.get('op') == 'add':
+                self.high_water = max(self.high_water, added['item']['id'])
+
+    def replay(self, equipment_list: List[Dict]) -> List[Dict]:
+        """Apply rotated and live journal entries on top of a snapshot"""
+        by_id = {item['id']: item for item in equipment_list}
+        self.replay_into(by_id)
+        return list(by_id.values())
+
+    def replay_into(self, by_id: MutableMapping):
+        """Apply rotated and live journal entries to an id-keyed mapping in
+        place, e.g. a ColumnarStore loaded straight from a binary snapshot"""
+        for change in self.read_all():
+            apply_change(by_id, change)
+
+    def read_all(self) -> List[Dict]:
+        """Every rotated and live journal entry, reading from the start"""
+        changes = []
+        self.offset = 0
+        for path in (self.rotated_path, self.path):
+            for change in self._read(path):
+                self._track(change)
+                changes.append(change)
+        self.entries = len(changes)
+        return changes
+
+    def read_new(self) -> List[Dict]:
+        """Entries appended to the live journal since the last read or append"""
+        changes = list(self._read(self.path, self.offset))
+        for change in changes:
+            self._track(change)
+        self.entries += len(changes)
+        return changes
+
+    def rotate(self) -> bool:
+        """Move the live journal aside so a snapshot can absorb it"""
+        if os.path.exists(self.rotated_path):
+            # A previous compaction never finished; its entries are still
+            # needed, so fold the live journal into it instead of replacing.
+            if os.path.exists(self.path):
+                with open(self.path, 'rb') as src, open(self.rotated_path, 'a+b') as dst:
+                    _drop_torn_line(dst)
+                    dst.write(src.read())
+                    # On disk before the only other copy goes away
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.remove(self.path)
+        elif os.path.exists(self.path):
+            os.replace(self.path, self.rotated_path)
+        else:
+            return False
+        self.entries = 0
+        self.offset = 0
+        return True
+
+    def discard_rotated(self):
+        """Drop the rotated journal once its snapshot is safely on disk"""
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+
+
+def _drop_torn_line(f):
+    """Cut a torn final line, left by a crash mid-append, off a journal
+    opened with 'a+b', so the next append starts on a line of its own
+    instead of merging into the garbage. Callers hold the file lock, so
+    an incomplete line can't be another process's append in progress.
+    """
+    end = f.seek(0, os.SEEK_END)
+    position = end
+    while position > 0:
+        start = max(0, position - 4096)
+        f.seek(start)
+        newline = f.read(position - start).rfind(b'\n')
+        if newline != -1:
+            position = start + newline + 1
+            break
+        position = start
+    if position < end:
+        f.truncate(position)
+
+
+def changed_id(change: Dict) -> int:
+    """Id of the record a single (non-batch) change touches"""
+    return change['item']['id'] if change.get('op') == 'add' else change['id']
+
+
+def iter_changes(change: Dict) -> Iterator[Dict]:
+    """Flatten a batch record into the single changes it contains"""
+    if change.get('op') == 'batch':
+        for inner in change['changes']:
+            yield from iter_changes(inner)
+    else:
+        yield change
+
+
+def apply_change(by_id: Dict[int, Dict], change: Dict):
+    """Apply one journal record to an id-keyed view of the inventory.
+
+    Replay must be idempotent: a crash between writing a compacted snapshot
+    and removing the rotated journal replays entries the snapshot already
+    contains.
+    """
+    op = change.get('op')
+    if op == 'batch':
+        # Written as one line, so a batch is replayed entirely or not at all
+        for inner in change['changes']:
+            apply_change(by_id, inner)
+    elif op == 'add':
+        item = change['item']
+        by_id[item['id']] = item
+    elif op == 'update':
+        item = by_id.get(change['id'])
+        if item is not None:
+            item.update(change['fields'])
+    elif op == 'delete':
+        by_id.pop(change['id'], None)
@@ -0,0 +1,168 @@
+# metrics.py
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds in seconds; the last bucket (+Inf) catches the rest
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds in bytes for the size of one save
+SIZE_BUCKETS = tuple(4 ** power * 1024 for power in range(11))  # 1 KiB .. 1 GiB
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense, for one label set"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"'
+                          for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms for this process, rendered in the
+    Prometheus text exposition format.
+
+    Metrics are created on first use. Gauges registered with a callback
+    are read at scrape time, so nothing is tracked between scrapes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}  # name -> (type, help)
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._gauges: Dict[str, Callable[[], Optional[float]]] = {}
+
+    def counter(self, name: str, help_text: str):
+        self._help.setdefault(name, ('counter', help_text))
+        self._counters.setdefault(name, {})
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self._help.setdefault(name, ('histogram', help_text))
+        self._histograms.setdefault(name, {})
+        self._buckets[name] = buckets
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], Optional[float]]):
+        """Register a gauge whose value ``read`` returns at scrape time
+        (None leaves it out)"""
+        self._help[name] = ('gauge', help_text)
+        self._gauges[name] = read
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1):
+        with self._lock:
+            series = self._counters[name]
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Labels = ()):
+        with self._lock:
+            series = self._histograms[name]
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(self._buckets[name])
+            histogram.observe(value)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)"""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in self._counters.items():
+                self._header(lines, name)
+                for labels, value in sorted(series.items()):
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+            for name, series in self._histograms.items():
+                self._header(lines, name)
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    bounds = histogram.buckets + (float('inf'),)
+                    for bound, count in zip(bounds, histogram.counts):
+                        cumulative += count
+                        le = ('le', _format_value(float(bound)))
+                        lines.append(f'{name}_bucket{_format_labels(labels, le)} {cumulative}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+        for name, read in self._gauges.items():
+            try:
+                value = read()
+            except OSError:
+                value = None
+            if value is None:
+                continue
+            self._header(lines, name)
+            lines.append(f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines: List[str], name: str):
+        kind, help_text = self._help[name]
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+
+def instrument(cls, method_names: Iterable[str], registry: MetricsRegistry,
+               histogram: str, counter: str, label: str = 'method'):
+    """Wrap the named methods of ``cls`` to record their latency and any
+    exceptions they raise; names ``cls`` doesn't define are skipped.
+
+    Only called when metrics are enabled, so disabled metrics leave the
+    methods untouched and cost nothing.
+    """
+    for method_name in method_names:
+        method = cls.__dict__.get(method_name)
+        if method is None or not callable(method):
+            continue
+        setattr(cls, method_name, _timed(method, method_name, registry, histogram, counter, label))
+
+
+def _timed(method, method_name: str, registry: MetricsRegistry,
+           histogram: str, counter: str, label: str):
+    labels = ((label, method_name),)
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            registry.inc(counter, labels)
+            raise
+        finally:
+            registry.observe(histogram, time.perf_counter() - start, labels)
+    return wrapper
+
+
+def file_size(path: str) -> Optional[int]:
+    """Size of ``path`` in bytes, or None if it doesn't exist"""
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,66 @@
+# page_cache.py
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+
+class PageCache:
+    """Bounded LRU cache of rendered pages for one data version.
+
+    Entries are only valid for the data version they were rendered at;
+    the first lookup after the version moves on empties the cache, so
+    add/update/delete invalidate it without the tracker knowing about it.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, str]' = OrderedDict()
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version: str):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, version: str, key: Hashable) -> Optional[str]:
+        """Return the cached page, counting the hit or miss"""
+        with self._lock:
+            self._check_version(version)
+            page = self._entries.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return page
+
+    def put(self, version: str, key: Hashable, page: str):
+        """Store a page rendered at ``version``, evicting the least recently used"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = page
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,206 @@
+# profiler.py
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# pstats key: (filename, first line, function name)
+FuncKey = Tuple[str, int, str]
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = 'profile'
+
+# Only one cProfile can be active per process (Python 3.12 raises on a
+# second), so a profile is held from the request until its report is written
+_active = threading.Lock()
+
+
+def code_key(func) -> Optional[FuncKey]:
+    """The pstats key cProfile files ``func``'s calls under"""
+    code = getattr(func, '__code__', None)
+    if code is None:
+        return None
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+def cumulative(stats: pstats.Stats, keys: Iterable[FuncKey]) -> float:
+    """Total inclusive time of the given functions"""
+    return sum(stats.stats[key][3] for key in keys if key in stats.stats)
+
+
+def outermost(stats: pstats.Stats, keys: Iterable[FuncKey]) -> float:
+    """Total inclusive time of the given functions, counting only calls
+    made from outside them, so time spent in one of them nested inside
+    another is counted once"""
+    keys = set(keys)
+    total = 0.0
+    for key in keys:
+        if key not in stats.stats:
+            continue
+        _, _, _, inclusive, callers = stats.stats[key]
+        if not callers:
+            total += inclusive  # where profiling started
+            continue
+        total += sum(timing[3] for caller, timing in callers.items() if caller not in keys)
+    return total
+
+
+def exclusive(stats: pstats.Stats, key: FuncKey,
+              include: Callable[[FuncKey], bool]) -> float:
+    """Time spent in ``key`` itself plus the callees ``include`` accepts,
+    leaving out whatever else it called"""
+    if key not in stats.stats:
+        return 0.0
+    total = stats.stats[key][2]
+    for callee, (_, _, _, _, callers) in stats.stats.items():
+        if key in callers and include(callee):
+            total += callers[key][3]
+    return total
+
+
+class RequestProfiler:
+    """WSGI middleware that runs cProfile over single requests on demand.
+
+    A request is profiled when it carries ``X-Profile: <token>`` or
+    ``?profile=<token>`` (any non-empty value when no token is set). The
+    profile covers the view and every chunk of a streamed body, and is
+    written to ``directory`` as a ``.prof`` file for ``python -m pstats``
+    plus a ``.txt`` report sorted by cumulative time. Only the newest
+    ``keep`` reports are kept. Other requests only pay for the header check.
+    A request asking for a profile while another one is being profiled is
+    served without one.
+    """
+
+    def __init__(self, wsgi_app, directory: str, keep: int = 20, token: str = '',
+                 sections: Optional[Callable[[pstats.Stats], Dict[str, float]]] = None,
+                 limit: int = 40):
+        self.wsgi_app = wsgi_app
+        self.directory = directory
+        self.keep = keep
+        self.token = token
+        self.sections = sections
+        self.limit = limit
+        self._prune_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _triggered(self, environ) -> bool:
+        value = environ.get('HTTP_X_PROFILE')
+        if value is None:
+            query = environ.get('QUERY_STRING', '')
+            if PROFILE_PARAM not in query:
+                return False
+            match = re.search(r'(?:^|&)profile=([^&]*)', query)
+            value = match.group(1) if match else None
+        if not value:
+            return False
+        return not self.token or value == self.token
+
+    def __call__(self, environ, start_response):
+        if not self._triggered(environ) or not _active.acquire(blocking=False):
+            return self.wsgi_app(environ, start_response)
+        try:
+            report = _Report(self, environ)
+        except BaseException:
+            _active.release()
+            raise
+
+        def profiled_start_response(status, headers, exc_info=None):
+            report.status = status
+            headers = list(headers) + [('X-Profile-Report', report.name)]
+            return start_response(status, headers, exc_info)
+
+        report.profile.enable()
+        try:
+            body = self.wsgi_app(environ, profiled_start_response)
+        except BaseException:
+            report.profile.disable()
+            report.finish()
+            raise
+        report.profile.disable()
+        return _ProfiledBody(body, report)
+
+    def prune(self):
+        """Delete all but the newest ``keep`` reports"""
+        with self._prune_lock:
+            reports = sorted(entry for entry in os.listdir(self.directory)
+                             if entry.endswith('.prof'))
+            for entry in reports[:max(0, len(reports) - self.keep)]:
+                stem = os.path.join(self.directory, entry[:-len('.prof')])
+                for path in (stem + '.prof', stem + '.txt'):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+
+class _Report:
+    """One profiled request and the files it ends up in"""
+
+    def __init__(self, profiler: RequestProfiler, environ):
+        self.profiler = profiler
+        self.method = environ.get('REQUEST_METHOD', 'GET')
+        self.path = environ.get('PATH_INFO', '/')
+        self.status = ''
+        self.profile = cProfile.Profile()
+        self.started = time.perf_counter()
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', self.path).strip('_') or 'index'
+        # Timestamp first so names sort oldest to newest for pruning
+        self.name = (f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+                     f"-{self.method.lower()}-{slug[:60]}-{os.getpid()}")
+
+    def finish(self):
+        try:
+            self._write()
+        finally:
+            _active.release()
+
+    def _write(self):
+        elapsed = time.perf_counter() - self.started
+        stem = os.path.join(self.profiler.directory, self.name)
+        self.profile.dump_stats(stem + '.prof')
+        out = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=out)
+        out.write(f"{self.method} {self.path} -> {self.status or 'no response'}\n")
+        out.write(f"wall time: {elapsed:.4f}s\n")
+        if self.profiler.sections:
+            for section, seconds in self.profiler.sections(stats).items():
+                out.write(f"{section}: {seconds:.4f}s\n")
+        out.write("\n")
+        stats.sort_stats('cumulative').print_stats(self.profiler.limit)
+        with open(stem + '.txt', 'w') as f:
+            f.write(out.getvalue())
+        self.profiler.prune()
+
+
+class _ProfiledBody:
+    """Response body that keeps profiling while the server pulls chunks,
+    so streamed exports are measured to the last byte"""
+
+    def __init__(self, body, report: _Report):
+        self._body = body
+        self._report = report
+
+    def __iter__(self):
+        iterator = iter(self._body)
+        while True:
+            self._report.profile.enable()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._report.profile.disable()
+            yield chunk
+
+    def close(self):
+        try:
+            close = getattr(self._body, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._report.finish()
@@ -0,0 +1,50 @@
+# rwlock.py
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """Lock shared by any number of readers or held by one writer.
+
+    Writers take priority: once a writer is waiting, new readers queue
+    behind it, so a steady stream of page views can't starve edits. Not
+    reentrant; a method holding the lock must not call another locked one.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
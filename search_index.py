@@ -0,0 +1,160 @@
+# search_index.py
+import re
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set, Tuple
+
+# Fields covered by search, with how much a hit in each counts for ranking
+SEARCH_FIELDS = {'description': 3, 'condition': 1, 'resale_location': 1}
+# Strategies accepted by EquipmentTracker.search_equipment
+SEARCH_MODES = ('token', 'substring', 'scan')
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens"""
+    return _TOKEN_RE.findall(str(text or '').lower())
+
+
+class TokenIndex:
+    """Inverted index from word tokens to equipment ids.
+
+    Query terms match tokens by prefix ("yae" finds "Yaesu", "FT-" finds
+    "FT-DX10"), every term has to match, and results are ranked by which
+    field matched and whether the match was a whole word.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._vocab: List[str] = []  # sorted, for prefix range scans
+
+    @staticmethod
+    def _weights(equipment: Dict) -> Dict[str, int]:
+        weights: Dict[str, int] = {}
+        for field, weight in SEARCH_FIELDS.items():
+            for token in tokenize(equipment.get(field, '')):
+                weights[token] = max(weights.get(token, 0), weight)
+        return weights
+
+    def add(self, equipment: Dict):
+        """Index one record"""
+        equipment_id = equipment['id']
+        for token, weight in self._weights(equipment).items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                insort(self._vocab, token)
+            postings[equipment_id] = weight
+
+    def remove(self, equipment: Dict):
+        """Drop one record from the index, given its indexed contents"""
+        equipment_id = equipment['id']
+        for token in self._weights(equipment):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(equipment_id, None)
+            if not postings:
+                del self._postings[token]
+                del self._vocab[bisect_left(self._vocab, token)]
+
+    def _prefix_tokens(self, prefix: str) -> List[str]:
+        start = bisect_left(self._vocab, prefix)
+        end = start
+        while end < len(self._vocab) and self._vocab[end].startswith(prefix):
+            end += 1
+        return self._vocab[start:end]
+
+    def search(self, query: str) -> Optional[List[Tuple[int, int]]]:
+        """Return (id, score) pairs for records matching every query term,
+        best first; None if the query has no searchable tokens"""
+        terms = tokenize(query)
+        if not terms:
+            return None
+        scores: Optional[Dict[int, int]] = None
+        for term in terms:
+            term_scores: Dict[int, int] = {}
+            for token in self._prefix_tokens(term):
+                # A whole-word hit ranks above a prefix hit in the same field
+                bonus = 2 if token == term else 1
+                for equipment_id, weight in self._postings[token].items():
+                    score = weight * bonus
+                    if score > term_scores.get(equipment_id, 0):
+                        term_scores[equipment_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {equipment_id: score + term_scores[equipment_id]
+                          for equipment_id, score in scores.items()
+                          if equipment_id in term_scores}
+            if not scores:
+                return []
+        return sorted(scores.items(), key=lambda hit: (-hit[1], -hit[0]))
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _record_trigrams(equipment: Dict) -> Set[str]:
+    grams: Set[str] = set()
+    for field in SEARCH_FIELDS:
+        grams |= _trigrams(str(equipment.get(field) or '').lower())
+    return grams
+
+
+def _contains(ids: array, equipment_id: int) -> bool:
+    index = bisect_left(ids, equipment_id)
+    return index < len(ids) and ids[index] == equipment_id
+
+
+class TrigramIndex:
+    """Index from three-character substrings to equipment ids.
+
+    Used to narrow the candidates for plain substring search: any record
+    containing the query must contain every trigram of the query, so only
+    the intersection of those postings needs the final substring check.
+    Postings are sorted int64 arrays, a fraction of the size of sets.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, array] = {}
+
+    def add(self, equipment: Dict):
+        """Index one record"""
+        equipment_id = equipment['id']
+        for gram in _record_trigrams(equipment):
+            ids = self._postings.get(gram)
+            if ids is None:
+                self._postings[gram] = array('q', [equipment_id])
+            elif ids[-1] < equipment_id:
+                ids.append(equipment_id)  # new ids are the newest
+            elif not _contains(ids, equipment_id):
+                ids.insert(bisect_left(ids, equipment_id), equipment_id)
+
+    def remove(self, equipment: Dict):
+        """Drop one record from the index, given its indexed contents"""
+        equipment_id = equipment['id']
+        for gram in _record_trigrams(equipment):
+            ids = self._postings.get(gram)
+            if ids is None:
+                continue
+            index = bisect_left(ids, equipment_id)
+            if index < len(ids) and ids[index] == equipment_id:
+                del ids[index]
+                if not ids:
+                    del self._postings[gram]
+
+    def candidates(self, query: str) -> Optional[Set[int]]:
+        """Ids that may contain the query; None if it is too short to narrow"""
+        grams = _trigrams(query.lower())
+        if not grams:
+            return None
+        postings = sorted((self._postings.get(gram, array('q')) for gram in grams), key=len)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            if not result:
+                break
+            result = {equipment_id for equipment_id in result if _contains(ids, equipment_id)}
+        return result
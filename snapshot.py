@@ -0,0 +1,573 @@
+# snapshot.py
+"""Compact binary snapshot of the inventory, loaded by memory mapping.
+
+Layout (little-endian): the magic bytes, a 4-byte header length, a JSON
+header, then one 8-byte-aligned block per column:
+
+- ``id``: int64 per item
+- cost, current_retail, current_resale: float64 per item
+- condition, resale_location: uint32 codes into the header's symbol tables
+- description, purchase_date, date_added, last_updated: uint64 offsets
+  (count + 1) into a UTF-8 blob, plus a byte per item marking missing
+  values when the field has any
+- ``digest``: uint64 per item, a hash of its four text fields, so a
+  reload can find the changed items without decoding every string
+
+Numeric columns are copied out in one go. Strings are decoded from the
+mapping only when a record is read, so opening even a million-item file
+takes milliseconds. A ColumnarStore loaded from a snapshot is saved
+column by column, copying the strings it never changed straight from the
+old file. Files are never modified in place: saves write a new
+file and rename it over the old one, so a mapping stays valid until it is
+dropped.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from columnar import ColumnarStore, ENCODED_FIELDS, FIELD_ORDER, NUMERIC_FIELDS, TEXT_FIELDS
+
+MAGIC = b'HAMGEAR\x01'
+VERSION = 1
+# Every column but the optional "<field>.missing" flags
+_REQUIRED_COLUMNS = (['id', *NUMERIC_FIELDS, *ENCODED_FIELDS, 'digest']
+                     + [f'{field}.{part}' for field in TEXT_FIELDS for part in ('offsets', 'data')])
+SNAPSHOT_SUFFIX = '.snap'
+_HEADER_LENGTH = struct.Struct('<I')
+_ALIGN = 8
+_MISSING_LENGTH = b'\xff' * 4
+
+
+class SnapshotError(ValueError):
+    """The file is not a readable inventory snapshot"""
+
+
+def is_snapshot(path: str) -> bool:
+    """Whether ``path`` holds (or, if missing, should hold) a binary snapshot"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except FileNotFoundError:
+        return path.endswith(SNAPSHOT_SUFFIX)
+
+
+def _little_endian(column: array) -> array:
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column
+
+
+def _text_digest(values: Iterable[Optional[bytes]]) -> int:
+    """64-bit digest of one item's text fields as stored (None: missing).
+    A reload compares these instead of decoding every string."""
+    digest = hashlib.blake2b(digest_size=8)
+    for value in values:
+        if value is None:
+            digest.update(_MISSING_LENGTH)
+        else:
+            digest.update(len(value).to_bytes(4, 'little'))
+            digest.update(value)
+    return int.from_bytes(digest.digest(), 'little')
+
+
+def _gather(column: Sequence, rows: Sequence[int]) -> array:
+    return array(column.typecode, map(column.__getitem__, rows))
+
+
+class _TextColumn:
+    """A text column being assembled: UTF-8 blob, offsets, missing flags"""
+
+    __slots__ = ('offsets', 'data', 'missing')
+
+    def __init__(self):
+        self.offsets = array('Q', [0])
+        self.data = bytearray()
+        self.missing = bytearray()
+
+    def append(self, value: Optional[bytes]):
+        if value is not None:
+            self.data += value
+        self.missing.append(value is None)
+        self.offsets.append(len(self.data))
+
+
+def _encode_text(field: str, value, extras: Dict) -> Optional[bytes]:
+    if value is not None and not isinstance(value, str):
+        # e.g. a number typed into a hand-edited file; keep it as is
+        extras[field] = value
+        return None
+    return value.encode('utf-8') if value is not None else None
+
+
+def write_snapshot(path: str, records) -> int:
+    """Write an inventory to ``path`` as a snapshot, atomically; returns the
+    count. ``records`` is an id -> record mapping or an iterable of records.
+    A ColumnarStore is written column by column, copying the unchanged
+    strings of the snapshot it was loaded from without decoding them."""
+    if isinstance(records, ColumnarStore):
+        columns = _store_columns(records)
+    else:
+        if isinstance(records, Mapping):
+            records = records.values()
+        columns = _record_columns(records)
+    _write_columns(path, *columns)
+    return len(columns[0])
+
+
+def _record_columns(records: Iterable[Mapping]):
+    ids = array('q')
+    numeric = {field: array('d') for field in NUMERIC_FIELDS}
+    codes = {field: array('I') for field in ENCODED_FIELDS}
+    symbols: Dict[str, List] = {field: [] for field in ENCODED_FIELDS}
+    symbol_codes: Dict[str, Dict] = {field: {} for field in ENCODED_FIELDS}
+    text = {field: _TextColumn() for field in TEXT_FIELDS}
+    digests = array('Q')
+    extras: Dict[str, Dict] = {}
+
+    for record in records:
+        equipment_id = record['id']
+        ids.append(equipment_id)
+        record_extras = {}
+        for field in NUMERIC_FIELDS:
+            numeric[field].append(float(record[field]))
+        for field in ENCODED_FIELDS:
+            value = record.get(field)
+            code = symbol_codes[field].get(value)
+            if code is None:
+                code = symbol_codes[field][value] = len(symbols[field])
+                symbols[field].append(value)
+            codes[field].append(code)
+        values = [_encode_text(field, record.get(field), record_extras) for field in TEXT_FIELDS]
+        for field, value in zip(TEXT_FIELDS, values):
+            text[field].append(value)
+        digests.append(_text_digest(values))
+        for key, value in record.items():
+            if key not in FIELD_ORDER:
+                record_extras[key] = value
+        if record_extras:
+            extras[str(equipment_id)] = record_extras
+    return ids, numeric, codes, symbols, text, digests, extras
+
+
+def _base_snapshot(store: ColumnarStore) -> Optional['Snapshot']:
+    """The snapshot all of a store's text columns read from, if any"""
+    columns = [store.text_column(field) for field in TEXT_FIELDS]
+    if not all(isinstance(column, LazyTextColumn) for column in columns):
+        return None
+    snapshot = columns[0]._snapshot
+    return snapshot if all(column._snapshot is snapshot for column in columns) else None
+
+
+def _clean_runs(rows: List[int], dirty: Iterable[int], limit: int) -> List[Tuple[int, int, bool]]:
+    """Split positions in ``rows`` into (start, end, clean) segments. A clean
+    segment covers consecutive rows below ``limit`` that aren't ``dirty``,
+    i.e. strings that can be copied from the base snapshot in one piece."""
+    dirty = set(dirty)
+    count = len(rows)
+    if rows == list(range(count)):
+        # Nothing deleted: cut the one run at the dirty rows and the end of
+        # the base snapshot
+        end = min(count, limit)
+        segments, start = [], 0
+        for row in sorted(row for row in dirty if row < end):
+            if row > start:
+                segments.append((start, row, True))
+            segments.append((row, row + 1, False))
+            start = row + 1
+        if start < end:
+            segments.append((start, end, True))
+        segments.extend((row, row + 1, False) for row in range(end, count))
+        return segments
+    segments = []
+    position = 0
+    while position < count:
+        row = rows[position]
+        if row >= limit or row in dirty:
+            segments.append((position, position + 1, False))
+            position += 1
+            continue
+        end = position + 1
+        while (end < count and rows[end] == rows[end - 1] + 1 and rows[end] < limit
+               and rows[end] not in dirty):
+            end += 1
+        segments.append((position, end, True))
+        position = end
+    return segments
+
+
+def _store_columns(store: ColumnarStore):
+    rows = store.live_rows()
+    ids = _gather(store.id_column(), rows)
+    numeric = {field: _gather(store.column(field), rows) for field in NUMERIC_FIELDS}
+    codes, symbols = {}, {}
+    for field in ENCODED_FIELDS:
+        column, symbols[field] = store.encoded_column(field)
+        codes[field] = _gather(column, rows)
+    columns = {field: store.text_column(field) for field in TEXT_FIELDS}
+    text = {field: _TextColumn() for field in TEXT_FIELDS}
+    digests = array('Q')
+    extras = {str(equipment_id): dict(values)
+              for equipment_id, values in store.extra_fields().items()}
+
+    base = _base_snapshot(store)
+    if base is not None:
+        dirty = set().union(*(column._changed for column in columns.values()))
+        segments = _clean_runs(rows, dirty, base.count)
+        base_digests = base.digests()
+    else:
+        segments = [(position, position + 1, False) for position in range(len(rows))]
+    for start, end, clean in segments:
+        if clean:
+            first, last = rows[start], rows[end - 1] + 1
+            for field in TEXT_FIELDS:
+                offsets, data, missing = base._text[field]
+                target = text[field]
+                delta = len(target.data) - offsets[first]
+                target.data += data[offsets[first]:offsets[last]]
+                target.offsets.extend(map(delta.__add__, offsets[first + 1:last + 1]))
+                target.missing += missing[first:last] if missing is not None else bytes(last - first)
+            digests.extend(base_digests[first:last])
+            continue
+        row = rows[start]
+        record_extras = {}
+        values = [_encode_text(field, columns[field][row], record_extras) for field in TEXT_FIELDS]
+        for field, value in zip(TEXT_FIELDS, values):
+            text[field].append(value)
+        digests.append(_text_digest(values))
+        if record_extras:
+            key = str(ids[start])
+            extras[key] = dict(extras.get(key, {}), **record_extras)
+    return ids, numeric, codes, symbols, text, digests, extras
+
+
+def _write_columns(path: str, ids: array, numeric: Dict[str, array], codes: Dict[str, array],
+                   symbols: Dict[str, List], text: Dict[str, _TextColumn], digests: array,
+                   extras: Dict[str, Dict]):
+    blocks: List[Tuple[str, bytes]] = [('id', _little_endian(ids).tobytes())]
+    blocks += [(field, _little_endian(numeric[field]).tobytes()) for field in NUMERIC_FIELDS]
+    blocks += [(field, _little_endian(codes[field]).tobytes()) for field in ENCODED_FIELDS]
+    for field in TEXT_FIELDS:
+        blocks.append((f'{field}.offsets', _little_endian(text[field].offsets).tobytes()))
+        blocks.append((f'{field}.data', bytes(text[field].data)))
+        if any(text[field].missing):
+            blocks.append((f'{field}.missing', bytes(text[field].missing)))
+    blocks.append(('digest', _little_endian(digests).tobytes()))
+
+    # Column positions depend on the header's size, which depends on the
+    # positions; grow the header's room until they agree.
+    columns = {name: [0, len(data)] for name, data in blocks}
+    header = {'version': VERSION, 'count': len(ids), 'columns': columns,
+              'symbols': symbols, 'extras': extras}
+    prefix = len(MAGIC) + _HEADER_LENGTH.size
+    start = _aligned(prefix)
+    while True:
+        position = start
+        for name, data in blocks:
+            columns[name][0] = position
+            position = _aligned(position + len(data))
+        header_bytes = json.dumps(header).encode('utf-8')
+        if prefix + len(header_bytes) <= start:
+            break
+        start = _aligned(prefix + len(header_bytes))
+    header_bytes += b' ' * (start - prefix - len(header_bytes))
+
+    tmp_file = path + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        for name, data in blocks:
+            f.write(b'\0' * (columns[name][0] - f.tell()))
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+def _aligned(position: int) -> int:
+    return -(-position // _ALIGN) * _ALIGN
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # empty file
+                raise SnapshotError(f"{path} is empty") from e
+        try:
+            if self._mmap[:len(MAGIC)] != MAGIC:
+                raise SnapshotError(f"{path} is not an inventory snapshot")
+            start = len(MAGIC) + _HEADER_LENGTH.size
+            (length,) = _HEADER_LENGTH.unpack_from(self._mmap, len(MAGIC))
+            header = json.loads(self._mmap[start:start + length])
+            if header['version'] != VERSION:
+                raise SnapshotError(f"{path} has unsupported snapshot version "
+                                    f"{header['version']!r} (expected {VERSION})")
+            self.count: int = header['count']
+            self._columns: Dict[str, List[int]] = header['columns']
+            self.symbols: Dict[str, List] = header['symbols']
+            self.extras: Dict[int, Dict] = {int(key): value
+                                            for key, value in header['extras'].items()}
+            missing = [name for name in _REQUIRED_COLUMNS if name not in self._columns]
+            if missing:
+                raise SnapshotError(f"{path} is missing columns {', '.join(missing)}")
+            if max((offset + size for offset, size in self._columns.values()),
+                   default=0) > len(self._mmap):
+                raise SnapshotError(f"{path} is truncated")
+        except (SnapshotError, ValueError, KeyError, struct.error) as e:
+            self._mmap.close()
+            if isinstance(e, SnapshotError):
+                raise
+            raise SnapshotError(f"{path} has a corrupt header: {e}") from e
+        self._view = memoryview(self._mmap)
+        self._text = {field: (self._cast(f'{field}.offsets', 'Q'),
+                              self._raw(f'{field}.data'),
+                              self._raw(f'{field}.missing'))
+                      for field in TEXT_FIELDS}
+        self._digests: Optional[array] = None
+
+    def _raw(self, name: str) -> Optional[memoryview]:
+        if name not in self._columns:
+            return None
+        offset, size = self._columns[name]
+        return self._view[offset:offset + size]
+
+    def _cast(self, name: str, typecode: str) -> memoryview:
+        return self._raw(name).cast(typecode)
+
+    def array(self, name: str, typecode: str) -> array:
+        """Copy of a fixed-width column"""
+        column = array(typecode)
+        column.frombytes(self._raw(name))
+        if sys.byteorder == 'big':
+            column.byteswap()
+        return column
+
+    def digests(self) -> array:
+        """Per-item digests of the text fields"""
+        if self._digests is None:
+            self._digests = self.array('digest', 'Q')
+        return self._digests
+
+    def raw_text(self, field: str, row: int) -> Optional[memoryview]:
+        """One string's UTF-8 bytes, undecoded, or None if missing"""
+        offsets, data, missing = self._text[field]
+        if missing is not None and missing[row]:
+            return None
+        return data[offsets[row]:offsets[row + 1]]
+
+    def text(self, field: str, row: int) -> Optional[str]:
+        """Decode one string, or None if the item has no value"""
+        value = self.raw_text(field, row)
+        return None if value is None else str(value, 'utf-8')
+
+    def _record(self, row: int, ids: array, numeric: Dict[str, array],
+                codes: Dict[str, array]) -> Dict:
+        equipment_id = ids[row]
+        record = {'id': equipment_id}
+        extras = self.extras.get(equipment_id, {})
+        for field in FIELD_ORDER[1:]:
+            if field in numeric:
+                value = numeric[field][row]
+            elif field in codes:
+                value = self.symbols[field][codes[field][row]]
+            else:
+                value = self.text(field, row)
+                if value is None:
+                    value = extras.get(field)
+            if value is not None:
+                record[field] = value
+        record.update((key, value) for key, value in extras.items() if key not in record)
+        return record
+
+    def records(self) -> Iterator[Dict]:
+        """Every item as a dict in equipment_data.json order, decoded as it goes"""
+        ids = self.array('id', 'q')
+        numeric = {field: self.array(field, 'd') for field in NUMERIC_FIELDS}
+        codes = {field: self.array(field, 'I') for field in ENCODED_FIELDS}
+        for row in range(len(ids)):
+            yield self._record(row, ids, numeric, codes)
+
+    def close(self):
+        self._text = {}
+        self._view.release()
+        self._mmap.close()
+
+
+class LazyTextColumn:
+    """Text column of a ColumnarStore backed by a snapshot.
+
+    Rows from the file are decoded on every read; assignments and appended
+    rows are kept in memory on top of it.
+    """
+
+    __slots__ = ('_snapshot', '_field', '_base', '_changed', '_appended')
+
+    def __init__(self, snapshot: Snapshot, field: str, changed: Optional[Dict[int, object]] = None):
+        self._snapshot = snapshot
+        self._field = field
+        self._base = snapshot.count
+        self._changed: Dict[int, object] = changed or {}
+        self._appended: List = []
+
+    def __len__(self) -> int:
+        return self._base + len(self._appended)
+
+    def __getitem__(self, row: int):
+        if row >= self._base:
+            return self._appended[row - self._base]
+        if row in self._changed:
+            return self._changed[row]
+        return self._snapshot.text(self._field, row)
+
+    def __setitem__(self, row: int, value):
+        if row >= self._base:
+            self._appended[row - self._base] = value
+        else:
+            self._changed[row] = value
+
+    def append(self, value):
+        self._appended.append(value)
+
+    def copy(self) -> 'LazyTextColumn':
+        column = LazyTextColumn(self._snapshot, self._field, dict(self._changed))
+        column._appended = list(self._appended)
+        return column
+
+
+def _differing(old: array, new: array) -> Iterable[int]:
+    """Positions where two equally long columns differ"""
+    if old == new:
+        return ()
+    return [position for position, (a, b) in enumerate(zip(old, new)) if a != b]
+
+
+def diff_store(store: ColumnarStore, snapshot: Snapshot,
+               include: Iterable[int] = ()) -> Optional[Dict[int, Optional[Dict]]]:
+    """What ``snapshot`` holds for every item that may differ from ``store``:
+    a decoded record, or None where the store has an id the snapshot
+    doesn't. The ``include`` ids are always looked up.
+
+    Ids and the numeric, code and text digest columns are compared in bulk,
+    so only the items that come back are decoded. Returns None when the
+    store's strings don't come from a snapshot; the caller then has to
+    compare every record.
+    """
+    base = _base_snapshot(store)
+    if base is None:
+        return None
+    new_digests = snapshot.digests()
+    ids = snapshot.array('id', 'q')
+    numeric = {field: snapshot.array(field, 'd') for field in NUMERIC_FIELDS}
+    codes = {field: snapshot.array(field, 'I') for field in ENCODED_FIELDS}
+    store_rows = list(map(store.row, ids))
+    candidates = {position for position, row in enumerate(store_rows) if row is None}
+    present = len(ids) - len(candidates)
+    if candidates:
+        store_rows = [0 if row is None else row for row in store_rows]
+    if len(store):
+        for field in NUMERIC_FIELDS:
+            candidates.update(_differing(_gather(store.column(field), store_rows), numeric[field]))
+        for field in ENCODED_FIELDS:
+            column, symbols = store.encoded_column(field)
+            code_of = {value: code for code, value in enumerate(symbols)}
+            translate = [code_of.get(value, len(symbols)) for value in snapshot.symbols[field]]
+            translated = array('I', map(translate.__getitem__, codes[field]))
+            candidates.update(_differing(_gather(column, store_rows), translated))
+        # Strings changed since the store's snapshot was loaded have no
+        # digest to compare; those items are decoded and compared whole
+        limit = base.count
+        stored = array('Q', base.digests())
+        stored.extend(array('Q', [0]) * (len(store.id_column()) - limit))
+        candidates.update(_differing(_gather(stored, store_rows), new_digests))
+        dirty = set().union(*(store.text_column(field)._changed for field in TEXT_FIELDS))
+        if dirty or len(store.id_column()) > limit:
+            candidates.update(position for position, row in enumerate(store_rows)
+                              if row >= limit or row in dirty)
+    extras = set(store.extra_fields()) | set(snapshot.extras)
+    include = set(include) | extras
+    position_of = dict(zip(ids, range(len(ids)))) if include else {}
+    changed: Dict[int, Optional[Dict]] = {
+        ids[position]: snapshot._record(position, ids, numeric, codes) for position in candidates}
+    for equipment_id in include:
+        if equipment_id not in changed:
+            position = position_of.get(equipment_id)
+            changed[equipment_id] = (None if position is None
+                                     else snapshot._record(position, ids, numeric, codes))
+    if present < len(store):
+        kept = set(ids)
+        changed.update((equipment_id, None) for equipment_id in store if equipment_id not in kept)
+    return changed
+
+
+def load_store(path: str) -> ColumnarStore:
+    """Open a snapshot as a ColumnarStore: numeric and code columns are
+    copied in bulk, strings stay in the mapping until read"""
+    snapshot = Snapshot(path)
+    ids = snapshot.array('id', 'q')
+    numeric = {field: snapshot.array(field, 'd') for field in NUMERIC_FIELDS}
+    codes = {field: snapshot.array(field, 'I') for field in ENCODED_FIELDS}
+    # Non-string values of text fields were set aside as extras when writing
+    row_of = None
+    changed: Dict[str, Dict[int, object]] = {field: {} for field in TEXT_FIELDS}
+    extras: Dict[int, Dict] = {}
+    for equipment_id, values in snapshot.extras.items():
+        other = {key: value for key, value in values.items() if key not in TEXT_FIELDS}
+        if other:
+            extras[equipment_id] = other
+        if len(other) < len(values):
+            if row_of is None:
+                row_of = {value: row for row, value in enumerate(ids)}
+            for field in TEXT_FIELDS:
+                if field in values:
+                    changed[field][row_of[equipment_id]] = values[field]
+    text = {field: LazyTextColumn(snapshot, field, changed[field]) for field in TEXT_FIELDS}
+    return ColumnarStore.from_columns(ids, numeric, codes, snapshot.symbols, text, extras)
+
+
+def read_records(path: str) -> List[Dict]:
+    """Every item in a snapshot as dicts"""
+    snapshot = Snapshot(path)
+    try:
+        return list(snapshot.records())
+    finally:
+        snapshot.close()
+
+
+def json_to_snapshot(json_file: str, snapshot_file: str) -> int:
+    """Convert equipment_data.json to a snapshot; returns the item count"""
+    with open(json_file, 'r') as f:
+        return write_snapshot(snapshot_file, json.load(f))
+
+
+def snapshot_to_json(snapshot_file: str, json_file: str) -> int:
+    """Convert a snapshot back to the equipment_data.json format"""
+    records = read_records(snapshot_file)
+    tmp_file = json_file + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(records, f, indent=2)
+    os.replace(tmp_file, json_file)
+    return len(records)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python snapshot.py <equipment_data.json> <equipment_data.snap>\n"
+              "       python snapshot.py <equipment_data.snap> <equipment_data.json>")
+        sys.exit(1)
+    source, target = sys.argv[1], sys.argv[2]
+    if is_snapshot(source):
+        count = snapshot_to_json(source, target)
+    else:
+        count = json_to_snapshot(source, target)
+    print(f"Converted {count} items from {source} to {target}")
@@ -0,0 +1,367 @@
+# sqlite_store.py
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+
+from analytics import InventoryAnalytics
+from bulk import check_ids
+from journal import ChangeJournal
+
+COLUMNS = ['id', 'description', 'cost', 'purchase_date', 'current_retail',
+           'current_resale', 'resale_location', 'condition', 'date_added',
+           'last_updated']
+NUMERIC_COLUMNS = ['cost', 'current_retail', 'current_resale']
+# Fill-ins for fields missing from hand-edited JSON records
+DEFAULTS = {'description': '', 'cost': 0.0, 'current_retail': 0.0,
+            'current_resale': 0.0, 'resale_location': '', 'condition': 'Good'}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS equipment (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    description TEXT NOT NULL,
+    cost REAL NOT NULL DEFAULT 0,
+    purchase_date TEXT,
+    current_retail REAL NOT NULL DEFAULT 0,
+    current_resale REAL NOT NULL DEFAULT 0,
+    resale_location TEXT NOT NULL DEFAULT '',
+    condition TEXT NOT NULL DEFAULT 'Good',
+    date_added TEXT,
+    last_updated TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_equipment_purchase_date ON equipment (purchase_date);
+CREATE INDEX IF NOT EXISTS idx_equipment_condition ON equipment (condition);
+CREATE INDEX IF NOT EXISTS idx_equipment_resale_location ON equipment (resale_location);
+CREATE INDEX IF NOT EXISTS idx_equipment_cost ON equipment (cost);
+
+-- Data version for ETags, bumped by triggers so writes from any process count
+CREATE TABLE IF NOT EXISTS equipment_meta (
+    instance TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    modified REAL NOT NULL
+);
+INSERT INTO equipment_meta
+    SELECT lower(hex(randomblob(6))), 0, (julianday('now') - 2440587.5) * 86400.0
+    WHERE NOT EXISTS (SELECT 1 FROM equipment_meta);
+CREATE TRIGGER IF NOT EXISTS equipment_version_insert AFTER INSERT ON equipment
+BEGIN
+    UPDATE equipment_meta SET version = version + 1, modified = (julianday('now') - 2440587.5) * 86400.0;
+END;
+CREATE TRIGGER IF NOT EXISTS equipment_version_update AFTER UPDATE ON equipment
+BEGIN
+    UPDATE equipment_meta SET version = version + 1, modified = (julianday('now') - 2440587.5) * 86400.0;
+END;
+CREATE TRIGGER IF NOT EXISTS equipment_version_delete AFTER DELETE ON equipment
+BEGIN
+    UPDATE equipment_meta SET version = version + 1, modified = (julianday('now') - 2440587.5) * 86400.0;
+END;
+'''
+
+
+class SQLiteEquipmentTracker:
+    """EquipmentTracker backed by a local SQLite database.
+
+    Exposes the same public methods as ``equipment.EquipmentTracker`` so the
+    Flask routes can use either one, but keeps the inventory on disk and
+    answers lookups, searches and totals with SQL instead of list scans.
+    """
+
+    def __init__(self, db_file: str = "equipment.db"):
+        self.db_file = db_file
+        self._local = threading.local()
+        # (data_version, InventoryAnalytics) for the last analytics request
+        self._analytics: Optional[Tuple[int, InventoryAnalytics]] = None
+        with self._connect() as conn:
+            # Write-ahead logging lets a long read, such as a streamed
+            # export, run alongside writes instead of blocking them
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def reset_after_fork(self):
+        """Drop connections inherited from the master process; a SQLite
+        connection must not be used across fork"""
+        self._local = threading.local()
+
+    def _meta(self) -> sqlite3.Row:
+        return self._connect().execute(
+            'SELECT instance, version, modified FROM equipment_meta').fetchone()
+
+    @property
+    def data_version(self) -> int:
+        """Counter bumped by every insert, update and delete"""
+        return self._meta()['version']
+
+    @property
+    def last_modified(self) -> float:
+        """Time of the last change, as a Unix timestamp"""
+        return self._meta()['modified']
+
+    @property
+    def version_tag(self) -> str:
+        """Opaque tag that changes whenever the inventory does (used as ETag)"""
+        meta = self._meta()
+        return f"{meta['instance']}-{meta['version']}"
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        """Convert a row to the dict shape stored in equipment_data.json"""
+        item = dict(row)
+        if item.get('last_updated') is None:
+            item.pop('last_updated', None)
+        return item
+
+    def add_equipment(self, description: str, cost: float, purchase_date: str = None,
+                      current_retail: float = 0.0, current_resale: float = 0.0,
+                      resale_location: str = "", condition: str = "Good"):
+        """Add new equipment to the tracker"""
+        if purchase_date is None or purchase_date == "":
+            purchase_date = datetime.now().strftime("%Y-%m-%d")
+
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'INSERT INTO equipment (description, cost, purchase_date, current_retail, '
+                'current_resale, resale_location, condition, date_added) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (description, float(cost), purchase_date, float(current_retail),
+                 float(current_resale), resale_location, condition,
+                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+        return cursor.lastrowid
+
+    def update_equipment(self, equipment_id: int, **kwargs):
+        """Update existing equipment"""
+        fields = {}
+        for key, value in kwargs.items():
+            if key in COLUMNS and key != 'id' and value is not None and value != "":
+                fields[key] = float(value) if key in NUMERIC_COLUMNS else value
+        fields['last_updated'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        assignments = ', '.join(f'{key} = ?' for key in fields)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f'UPDATE equipment SET {assignments} WHERE id = ?',
+                list(fields.values()) + [equipment_id]
+            )
+        return cursor.rowcount > 0
+
+    def delete_equipment(self, equipment_id: int):
+        """Delete equipment by ID"""
+        with self._connect() as conn:
+            cursor = conn.execute('DELETE FROM equipment WHERE id = ?', (equipment_id,))
+        return cursor.rowcount > 0
+
+    def apply_batch(self, operations: List[Dict]) -> List[Dict]:
+        """Apply operations from bulk.parse_operations in one transaction"""
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        results = []
+        with self._connect() as conn:
+            check_ids(operations, lambda equipment_id: conn.execute(
+                'SELECT 1 FROM equipment WHERE id = ?', (equipment_id,)).fetchone() is not None)
+            for operation in operations:
+                if operation['op'] == 'create':
+                    item = dict(DEFAULTS, **operation['fields'])
+                    if not item.get('purchase_date'):
+                        item['purchase_date'] = datetime.now().strftime("%Y-%m-%d")
+                    item['date_added'] = now
+                    columns = [column for column in COLUMNS if column in item]
+                    cursor = conn.execute(
+                        f'INSERT INTO equipment ({", ".join(columns)}) '
+                        f'VALUES ({", ".join("?" for _ in columns)})',
+                        [item[column] for column in columns]
+                    )
+                    results.append({'op': 'create', 'id': cursor.lastrowid})
+                elif operation['op'] == 'update':
+                    fields = dict(operation['fields'], last_updated=now)
+                    assignments = ', '.join(f'{key} = ?' for key in fields)
+                    conn.execute(f'UPDATE equipment SET {assignments} WHERE id = ?',
+                                 list(fields.values()) + [operation['id']])
+                    results.append({'op': 'update', 'id': operation['id']})
+                else:
+                    conn.execute('DELETE FROM equipment WHERE id = ?', (operation['id'],))
+                    results.append({'op': 'delete', 'id': operation['id']})
+        return results
+
+    def import_records(self, chunks: Iterable[List[Dict]]) -> Dict[str, int]:
+        """Create or update records from imports.read_csv chunks in one
+        transaction; same id rules as EquipmentTracker.import_records"""
+        created = updated = 0
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._connect() as conn:
+            for chunk in chunks:
+                for record in chunk:
+                    equipment_id = record.get('id')
+                    if equipment_id is not None:
+                        fields = {key: value for key, value in record.items()
+                                  if key != 'id' and value is not None and value != ""}
+                        fields['last_updated'] = now
+                        assignments = ', '.join(f'{key} = ?' for key in fields)
+                        cursor = conn.execute(f'UPDATE equipment SET {assignments} WHERE id = ?',
+                                              list(fields.values()) + [equipment_id])
+                        if cursor.rowcount:
+                            updated += 1
+                            continue
+                    item = dict(DEFAULTS, **{key: value for key, value in record.items()
+                                             if value is not None})
+                    if not item.get('purchase_date'):
+                        item['purchase_date'] = datetime.now().strftime("%Y-%m-%d")
+                    if not item.get('date_added'):
+                        item['date_added'] = now
+                    columns = [column for column in COLUMNS if column in item]
+                    conn.execute(f'INSERT INTO equipment ({", ".join(columns)}) '
+                                 f'VALUES ({", ".join("?" for _ in columns)})',
+                                 [item[column] for column in columns])
+                    created += 1
+        return {'created': created, 'updated': updated}
+
+    def search_equipment(self, query: str, mode: str = 'token') -> List[Dict]:
+        """Search equipment by description, condition or resale location.
+
+        ``mode`` is accepted for compatibility with EquipmentTracker; SQLite
+        always does plain substring matching.
+        """
+        conn = self._connect()
+        if not query:
+            rows = conn.execute('SELECT * FROM equipment ORDER BY id')
+        else:
+            # instr() keeps the plain-substring semantics of the JSON tracker
+            # without having to escape LIKE wildcards in the query.
+            rows = conn.execute(
+                'SELECT * FROM equipment WHERE instr(lower(description), ?) > 0 '
+                'OR instr(lower(condition), ?) > 0 '
+                'OR instr(lower(resale_location), ?) > 0 ORDER BY id',
+                (query.lower(),) * 3
+            )
+        return [self._to_dict(row) for row in rows]
+
+    def get_all_equipment(self) -> List[Dict]:
+        """Get all equipment"""
+        rows = self._connect().execute('SELECT * FROM equipment ORDER BY id DESC')
+        return [self._to_dict(row) for row in rows]
+
+    def iter_equipment(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """Yield all equipment newest first, fetching rows in batches"""
+        # A private connection keeps the open cursor out of the way of
+        # writes made on this thread's shared connection.
+        conn = sqlite3.connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute('SELECT * FROM equipment ORDER BY id DESC')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._to_dict(row)
+        finally:
+            conn.close()
+
+    def get_equipment_page(self, limit: int = 50,
+                           cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Get one page of equipment, newest first, with an id cursor"""
+        return self.search_page('', limit=limit, cursor=cursor)
+
+    def search_page(self, query: str, mode: str = 'token', limit: int = 50,
+                    cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Get one page of search results, newest first, with an id cursor"""
+        clauses, params = [], []
+        if query:
+            clauses.append('(instr(lower(description), ?) > 0 '
+                           'OR instr(lower(condition), ?) > 0 '
+                           'OR instr(lower(resale_location), ?) > 0)')
+            params.extend([query.lower()] * 3)
+        if cursor:
+            clauses.append('id < ?')
+            params.append(int(cursor))
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ''
+        # Fetch one extra row to learn whether another page follows
+        rows = self._connect().execute(
+            f'SELECT * FROM equipment {where}ORDER BY id DESC LIMIT ?', params + [limit + 1]
+        ).fetchall()
+        page = [self._to_dict(row) for row in rows[:limit]]
+        next_cursor = str(page[-1]['id']) if len(rows) > limit else None
+        return page, next_cursor
+
+    def get_equipment_by_id(self, equipment_id: int) -> Optional[Dict]:
+        """Get equipment by ID"""
+        row = self._connect().execute(
+            'SELECT * FROM equipment WHERE id = ?', (equipment_id,)
+        ).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def get_total_value(self) -> Dict[str, float]:
+        """Calculate total values"""
+        row = self._connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(cost), 0), COALESCE(SUM(current_retail), 0), '
+            'COALESCE(SUM(current_resale), 0) FROM equipment'
+        ).fetchone()
+        count, total_cost, total_retail, total_resale = row
+
+        return {
+            'total_cost': total_cost,
+            'total_retail': total_retail,
+            'total_resale': total_resale,
+            'profit_loss': total_resale - total_cost,
+            'count': count
+        }
+
+    def get_analytics(self, top: int = 10) -> Dict:
+        """Grouped valuation statistics; see InventoryAnalytics.summary.
+
+        The columns the statistics need are fetched once per data version
+        and handed to the same NumPy code the JSON store uses.
+        """
+        version = self.data_version
+        cached = self._analytics
+        if cached is None or cached[0] != version:
+            rows = self._connect().execute(
+                'SELECT id, description, cost, current_retail, current_resale, '
+                'condition, resale_location, purchase_date FROM equipment ORDER BY id')
+            records = {row['id']: dict(row) for row in rows}
+            cached = self._analytics = (version, InventoryAnalytics(records))
+        return cached[1].summary(top=top)
+
+    def check_totals(self, repair: bool = False, tolerance: float = 1e-6,
+                     rel_tolerance: float = 1e-9) -> Dict[str, float]:
+        """Totals are SQL aggregates computed per call, so they never drift"""
+        return {}
+
+
+def migrate_json(json_file: str, db_file: str) -> int:
+    """Copy an equipment_data.json inventory (and its journal) into SQLite"""
+    equipment_list = []
+    if os.path.exists(json_file):
+        with open(json_file, 'r') as f:
+            equipment_list = json.load(f)
+    equipment_list = ChangeJournal(json_file).replay(equipment_list)
+
+    store = SQLiteEquipmentTracker(db_file)
+    with store._connect() as conn:
+        conn.executemany(
+            f'INSERT OR REPLACE INTO equipment ({", ".join(COLUMNS)}) '
+            f'VALUES ({", ".join("?" for _ in COLUMNS)})',
+            [tuple(item.get(column, DEFAULTS.get(column)) for column in COLUMNS)
+             for item in equipment_list]
+        )
+    return len(equipment_list)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python sqlite_store.py <equipment_data.json> [equipment.db]")
+        sys.exit(1)
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else "equipment.db"
+    count = migrate_json(source, target)
+    print(f"Migrated {count} items from {source} to {target}")
@@ -0,0 +1,52 @@
+# conftest.py
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from synthetic import write_inventory  # noqa: E402
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    """Write a synthetic equipment_data.json of ``count`` items; returns its path"""
+    def make(count: int = 200, name: str = 'equipment_data.json') -> str:
+        path = str(tmp_path / name)
+        write_inventory(path, count)
+        return path
+    return make
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    """Write the given items, completed with defaults and numbered from 1,
+    as equipment_data.json; returns its path"""
+    def make(*items: dict, name: str = 'equipment_data.json') -> str:
+        records = [dict({'id': number, 'description': '', 'cost': 100.0,
+                         'purchase_date': '2020-01-01', 'current_retail': 120.0,
+                         'current_resale': 80.0, 'resale_location': 'QRZ',
+                         'condition': 'Good', 'date_added': '2020-01-01 12:00:00'}, **item)
+                   for number, item in enumerate(items, 1)]
+        path = str(tmp_path / name)
+        with open(path, 'w') as f:
+            json.dump(records, f, indent=2)
+        return path
+    return make
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Flask test client for the app, with its exports, serving ``tracker``"""
+    def make(tracker):
+        import equipment
+        import wsgi  # noqa: F401 -- registers the export and import routes
+        from page_cache import PageCache
+        monkeypatch.setattr(equipment, '_tracker', tracker)
+        monkeypatch.setattr(equipment, 'page_cache', PageCache())
+        return equipment.app.test_client()
+    return make
@@ -0,0 +1,66 @@
+# test_analytics.py
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('numpy')
+
+from equipment import EquipmentTracker  # noqa: E402
+from snapshot import json_to_snapshot  # noqa: E402
+from sqlite_store import SQLiteEquipmentTracker  # noqa: E402
+
+
+@pytest.fixture
+def odd_catalog(catalog):
+    # Missing and empty labels group together; one item has no purchase date
+    return catalog(
+        {'condition': 'Fair', 'purchase_date': '2019-05-01', 'cost': 300.0, 'current_resale': 90.0},
+        {'condition': '', 'resale_location': '', 'purchase_date': '2021-02-03'},
+        {'condition': 'Fair', 'resale_location': 'eBay', 'purchase_date': '2019-12-31'},
+        {'purchase_date': None, 'cost': 0.0},
+        {'resale_location': 'eBay', 'cost': 50.0, 'current_resale': 75.0},
+    )
+
+
+def summary(tracker):
+    return tracker.get_analytics(top=3)
+
+
+def test_summary_groups(odd_catalog):
+    result = summary(EquipmentTracker(odd_catalog, background_compaction=False))
+    assert [(g['condition'], g['count']) for g in result['by_condition']] == \
+        [('', 1), ('Fair', 2), ('Good', 2)]
+    assert [(g['resale_location'], g['count']) for g in result['by_resale_location']] == \
+        [('', 1), ('QRZ', 2), ('eBay', 2)]
+    assert [(g['purchase_year'], g['count']) for g in result['by_purchase_year']] == \
+        [('', 1), ('2019', 2), ('2020', 1), ('2021', 1)]
+    assert [item['id'] for item in result['top_losers']] == [1, 3, 2]
+
+
+def test_columnar_matches_dict(odd_catalog, tmp_path):
+    expected = summary(EquipmentTracker(odd_catalog, background_compaction=False))
+    columnar = EquipmentTracker(odd_catalog, columnar=True, background_compaction=False)
+    assert summary(columnar) == expected
+
+    snapshot_file = str(tmp_path / 'equipment_data.snap')
+    json_to_snapshot(odd_catalog, snapshot_file)
+    assert summary(EquipmentTracker(snapshot_file, background_compaction=False)) == expected
+
+    sqlite = SQLiteEquipmentTracker(str(tmp_path / 'equipment.db'))
+    sqlite.import_records([EquipmentTracker(odd_catalog).get_all_equipment()])
+    # SQLite fills in a missing purchase date on import, so only that grouping differs
+    result = summary(sqlite)
+    assert result.pop('by_purchase_year') != expected.pop('by_purchase_year')
+    assert result == expected
+
+
+def test_columnar_skips_deleted_rows(inventory):
+    data_file = inventory(count=500)
+    plain = EquipmentTracker(data_file, background_compaction=False)
+    columnar = EquipmentTracker(data_file, columnar=True, background_compaction=False)
+    for tracker in (plain, columnar):
+        summary(tracker)  # cached until the next change
+        for equipment_id in range(1, 500, 3):
+            tracker.delete_equipment(equipment_id)
+        tracker.update_equipment(2, condition='Broken', purchase_date='1999-09-09')
+    assert summary(columnar) == summary(plain)
+    assert ('Broken', 1) in [(g['condition'], g['count']) for g in summary(columnar)['by_condition']]
@@ -0,0 +1,93 @@
+# test_bulk.py
+import pytest
+
+pytest.importorskip('flask')
+
+from bulk import BulkOperationError, parse_operations  # noqa: E402
+from equipment import EquipmentTracker  # noqa: E402
+from sqlite_store import SQLiteEquipmentTracker, migrate_json  # noqa: E402
+
+
+@pytest.fixture(params=['json', 'journal', 'sqlite'])
+def tracker(request, inventory, tmp_path):
+    data_file = inventory(20)
+    if request.param == 'sqlite':
+        db_file = str(tmp_path / 'equipment.db')
+        migrate_json(data_file, db_file)
+        return SQLiteEquipmentTracker(db_file)
+    return EquipmentTracker(data_file, journal=request.param == 'journal',
+                            background_compaction=False)
+
+
+def reopen(tracker):
+    if isinstance(tracker, SQLiteEquipmentTracker):
+        return SQLiteEquipmentTracker(tracker.db_file)
+    return EquipmentTracker(tracker.data_file, journal=tracker.journal,
+                            background_compaction=False)
+
+
+def test_batch_applies_everything(tracker, client):
+    http = client(tracker)
+    response = http.post('/api/equipment', json={'operations': [
+        {'op': 'create', 'item': {'description': 'Bulk rig', 'cost': '99.5'}},
+        {'op': 'update', 'id': 3, 'fields': {'condition': 'Poor', 'cost': 5}},
+        {'op': 'delete', 'id': 4},
+        {'op': 'create', 'item': {'description': 'Second bulk rig', 'cost': 1}},
+    ]})
+    assert response.status_code == 200
+    results = response.json['results']
+    assert [result['op'] for result in results] == ['create', 'update', 'delete', 'create']
+    assert response.json['count'] == 4
+    created = results[0]['id']
+    assert results[3]['id'] == created + 1
+
+    reopened = reopen(tracker)
+    assert reopened.get_equipment_by_id(created)['cost'] == 99.5
+    assert reopened.get_equipment_by_id(3)['condition'] == 'Poor'
+    assert reopened.get_equipment_by_id(3)['cost'] == 5.0
+    assert reopened.get_equipment_by_id(4) is None
+    assert reopened.get_total_value()['count'] == 21
+
+
+@pytest.mark.parametrize('operations, index, message', [
+    ([{'op': 'create', 'item': {'description': 'Fine', 'cost': 1}},
+      {'op': 'create', 'item': {'cost': 1}}], 1, 'description is required'),
+    ([{'op': 'update', 'id': 2, 'fields': {'cost': 'lots'}}], 0, 'cost must be a number'),
+    ([{'op': 'update', 'id': 2, 'fields': {'serial': 'x'}}], 0, 'unknown fields: serial'),
+    ([{'op': 'delete', 'id': 2}, {'op': 'delete', 'id': 999}], 1, 'equipment 999 not found'),
+    ([{'op': 'delete', 'id': 2}, {'op': 'update', 'id': 2, 'fields': {}}], 1,
+     'equipment 2 not found'),
+    ([{'op': 'delete', 'id': True}], 0, 'id must be an integer'),
+    ([{'op': 'rename', 'id': 1}], 0, "unknown op 'rename'"),
+    ({'items': []}, 0, 'expected a list'),
+])
+def test_invalid_batch_changes_nothing(tracker, client, operations, index, message):
+    http = client(tracker)
+    before = tracker.get_all_equipment()
+    response = http.post('/api/equipment', json=operations)
+    assert response.status_code == 400
+    assert response.json['index'] == index
+    assert message in response.json['error']
+    assert tracker.get_all_equipment() == before
+    assert reopen(tracker).get_all_equipment() == before
+
+
+def test_body_must_be_json(tracker, client):
+    response = client(tracker).post('/api/equipment', data='op=create')
+    assert response.status_code == 400
+
+
+def test_batch_is_one_journal_line(inventory):
+    tracker = EquipmentTracker(inventory(20), journal=True, background_compaction=False)
+    tracker.apply_batch(parse_operations([{'op': 'delete', 'id': n} for n in range(1, 11)]))
+    assert tracker._journal.entries == 1
+    assert reopen(tracker).get_total_value()['count'] == 10
+
+
+def test_parse_operations_coerces():
+    assert parse_operations([{'op': 'update', 'id': '7',
+                              'fields': {'cost': '2.5', 'description': ' Rig ', 'condition': ''}}]) == [
+        {'op': 'update', 'id': 7, 'fields': {'cost': 2.5, 'description': 'Rig'}}]
+    with pytest.raises(BulkOperationError) as error:
+        parse_operations([{'op': 'create', 'item': {'description': 'No cost'}}])
+    assert error.value.index == 0
@@ -0,0 +1,65 @@
+# test_concurrency.py
+import threading
+
+import pytest
+
+pytest.importorskip('flask')
+
+from equipment import EquipmentTracker  # noqa: E402
+
+WRITERS = 4
+READERS = 4
+ROUNDS = 50
+
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_concurrent_writers_and_readers(inventory, columnar):
+    tracker = EquipmentTracker(inventory(300), columnar=columnar, journal=True,
+                               background_compaction=False)
+    errors = []
+    added = [[] for _ in range(WRITERS)]
+    stop = threading.Event()
+
+    def writer(number):
+        try:
+            for i in range(ROUNDS):
+                equipment_id = tracker.add_equipment(f'Writer {number} radio {i}', 100.0)
+                added[number].append(equipment_id)
+                tracker.update_equipment(equipment_id, condition='Fair')
+                if i % 3 == 0:
+                    tracker.delete_equipment(added[number].pop())
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            while not stop.is_set():
+                items = tracker.get_all_equipment()
+                assert len({item['id'] for item in items}) == len(items)
+                tracker.search_equipment('radio')
+                tracker.get_total_value()
+                sum(1 for _ in tracker.iter_equipment())
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=reader) for _ in range(READERS)]
+    writers = [threading.Thread(target=writer, args=(n,)) for n in range(WRITERS)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    assert errors == []
+    expected = {equipment_id for ids in added for equipment_id in ids}
+    found = {item['id'] for item in tracker.search_equipment('writer')}
+    assert found == expected
+    assert all(tracker.get_equipment_by_id(i)['condition'] == 'Fair' for i in expected)
+    assert tracker.get_total_value()['count'] == 300 + len(expected)
+    assert tracker.check_totals() == {}
+
+    reloaded = EquipmentTracker(tracker.data_file, columnar=columnar, journal=True,
+                                background_compaction=False)
+    assert reloaded.get_all_equipment() == tracker.get_all_equipment()
@@ -0,0 +1,66 @@
+# test_conditional.py
+import time
+
+import pytest
+
+pytest.importorskip('flask')
+
+from equipment import EquipmentTracker  # noqa: E402
+
+ROUTES = ['/', '/search?q=yaesu', '/api/summary', '/api/equipment', '/api/search?q=icom',
+          '/export/csv', '/export/ndjson']
+
+
+@pytest.fixture
+def tracker(inventory):
+    return EquipmentTracker(inventory(), background_compaction=False)
+
+
+@pytest.mark.parametrize('url', ROUTES)
+def test_etag_answers_304_until_a_change(tracker, client, url):
+    http = client(tracker)
+    first = http.get(url)
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'no-cache'
+
+    again = http.get(url, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.get_data() == b''
+    assert again.headers['ETag'] == etag
+
+    tracker.add_equipment('Changed since', 1.0)
+    changed = http.get(url, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_last_modified_once_the_second_is_over(tracker, client):
+    http = client(tracker)
+    tracker.last_modified = time.time() - 60
+    response = http.get('/api/summary')
+    since = response.headers['Last-Modified']
+    assert http.get('/api/summary', headers={'If-Modified-Since': since}).status_code == 304
+
+    # A change in the current second: the date is neither sent nor trusted
+    tracker.update_equipment(1, condition='Poor')
+    response = http.get('/api/summary', headers={'If-Modified-Since': since})
+    assert response.status_code == 200
+    assert 'Last-Modified' not in response.headers
+
+
+def test_etag_wins_over_last_modified(tracker, client):
+    http = client(tracker)
+    tracker.last_modified = time.time() - 60
+    since = http.get('/api/summary').headers['Last-Modified']
+    response = http.get('/api/summary', headers={'If-None-Match': '"stale"',
+                                                 'If-Modified-Since': since})
+    assert response.status_code == 200
+
+
+def test_workers_share_etags(inventory, client):
+    data_file = inventory()
+    first = EquipmentTracker(data_file, background_compaction=False)
+    second = EquipmentTracker(data_file, background_compaction=False)
+    assert first.version_tag == second.version_tag
+    first.delete_equipment(3)
+    assert first.version_tag == second.version_tag
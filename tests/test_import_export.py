@@ -0,0 +1,121 @@
+# test_import_export.py
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+pytest.importorskip('flask')
+
+from equipment import EquipmentTracker  # noqa: E402
+from imports import CSVImportError, coerce_row, import_csv  # noqa: E402
+from sqlite_store import SQLiteEquipmentTracker, migrate_json  # noqa: E402
+
+
+def empty_tracker(kind, tmp_path):
+    if kind == 'sqlite':
+        return SQLiteEquipmentTracker(str(tmp_path / 'imported.db'))
+    return EquipmentTracker(str(tmp_path / 'imported.json'), columnar=kind == 'columnar',
+                            background_compaction=False)
+
+
+def by_id(records):
+    return {item['id']: dict(item) for item in records}
+
+
+@pytest.mark.parametrize('kind', ['json', 'columnar', 'sqlite'])
+def test_csv_export_imports_back(inventory, tmp_path, client, kind):
+    source = EquipmentTracker(inventory(300), background_compaction=False)
+    exported = client(source).get('/export/csv').get_data(as_text=True)
+
+    target = empty_tracker(kind, tmp_path)
+    report = import_csv(target, io.StringIO(exported, newline=''), chunk_rows=64)
+    assert report.to_dict() == {'rows': 300, 'created': 300, 'updated': 0,
+                                'skipped': 0, 'errors': []}
+    assert by_id(target.get_all_equipment()) == by_id(source.get_all_equipment())
+
+    # Importing the same file again updates every item in place
+    report = import_csv(target, io.StringIO(exported, newline=''))
+    assert (report.created, report.updated) == (0, 300)
+    assert target.get_total_value()['count'] == 300
+
+
+def test_ndjson_export_matches_records(inventory, client):
+    tracker = EquipmentTracker(inventory(300), background_compaction=False)
+    http = client(tracker)
+    lines = http.get('/export/ndjson').get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == tracker.get_all_equipment()
+    zipped = http.get('/export/ndjson?gzip=1&q=yaesu').get_data()
+    lines = gzip.decompress(zipped).decode().splitlines()
+    assert [json.loads(line) for line in lines] == tracker.search_equipment('yaesu')
+
+
+def test_import_route_reports_skipped_rows(inventory, client):
+    tracker = EquipmentTracker(inventory(10), background_compaction=False)
+    body = ('ID,Description,Purchase Cost,Purchase Date\n'
+            ',New rig,10,2020-01-01\n'
+            ',No cost,,2020-01-01\n'
+            '3,Renamed,$1,234.50,\n')
+    response = client(tracker).post('/import/csv', data=body)
+    assert response.status_code == 200
+    assert response.json['created'] == 1 and response.json['skipped'] == 2
+    assert [error['line'] for error in response.json['errors']] == [3, 4]
+
+
+def oversized_csv(rows=3000, bad_row=2501):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Description', 'Purchase Cost'])
+    for row in range(1, rows + 1):
+        writer.writerow(['x' * 200_000 if row == bad_row else f'Imported rig {row}', 10])
+    return output.getvalue()
+
+
+@pytest.mark.parametrize('kind', ['json', 'journal', 'columnar', 'sqlite'])
+def test_malformed_csv_imports_nothing(inventory, tmp_path, client, kind):
+    data_file = inventory(10)
+    if kind == 'sqlite':
+        db_file = str(tmp_path / 'equipment.db')
+        migrate_json(data_file, db_file)
+        tracker = SQLiteEquipmentTracker(db_file)
+    else:
+        tracker = EquipmentTracker(data_file, journal=kind == 'journal',
+                                   columnar=kind == 'columnar', background_compaction=False)
+    before = tracker.get_all_equipment()
+
+    response = client(tracker).post('/import/csv', data=oversized_csv())
+    assert response.status_code == 400
+    assert 'field larger than field limit' in response.json['error']
+    assert tracker.get_all_equipment() == before
+    assert tracker.search_equipment('imported') == []
+    assert tracker.check_totals() == {}
+    if kind != 'sqlite':
+        reloaded = EquipmentTracker(data_file, journal=kind == 'journal',
+                                    background_compaction=False)
+        assert reloaded.get_all_equipment() == before
+    # Ids the failed import took are handed out again
+    assert tracker.add_equipment('After the failed import', 1.0) == 11
+
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_failed_import_undoes_updates(inventory, columnar):
+    tracker = EquipmentTracker(inventory(20), columnar=columnar, background_compaction=False)
+    tracker.search_equipment('yaesu')
+    before = tracker.get_all_equipment()
+    tag = tracker.version_tag
+
+    def chunks():
+        rows = [{'ID': '3', 'Description': 'Overwritten', 'Purchase Cost': '1'},
+                {'ID': '40', 'Description': 'Created', 'Purchase Cost': '2'},
+                {'Description': 'Also created', 'Purchase Cost': '3'}]
+        yield [coerce_row(row) for row in rows]
+        raise CSVImportError('Line 9: broken')
+
+    with pytest.raises(CSVImportError):
+        tracker.import_records(chunks())
+    assert tracker.get_all_equipment() == before
+    assert tracker.search_equipment('overwritten') == []
+    assert tracker.search_equipment('created') == []
+    assert tracker.check_totals() == {}
+    assert tracker.version_tag == tag
@@ -0,0 +1,127 @@
+# test_journal.py
+import json
+import os
+
+import pytest
+
+pytest.importorskip('flask')
+
+from equipment import EquipmentTracker  # noqa: E402
+from journal import ChangeJournal  # noqa: E402
+
+
+def make_changes(tracker):
+    new_id = tracker.add_equipment('Journal test radio', 250.0, '2021-05-01', 300.0, 200.0,
+                                   'QRZ', 'Excellent')
+    tracker.update_equipment(1, description='Edited by the journal', cost=123.45)
+    tracker.delete_equipment(2)
+    return new_id
+
+
+def test_replay_round_trip(inventory):
+    data_file = inventory()
+    tracker = EquipmentTracker(data_file, journal=True, background_compaction=False)
+    with open(data_file) as f:
+        before = f.read()
+    new_id = make_changes(tracker)
+
+    # Only the journal was written
+    with open(data_file) as f:
+        assert f.read() == before
+    assert tracker._journal.entries == 3
+
+    reloaded = EquipmentTracker(data_file, journal=True, background_compaction=False)
+    assert reloaded.get_all_equipment() == tracker.get_all_equipment()
+    assert reloaded.get_equipment_by_id(new_id)['description'] == 'Journal test radio'
+    assert reloaded.get_equipment_by_id(1)['cost'] == 123.45
+    assert reloaded.get_equipment_by_id(2) is None
+
+
+def test_compaction_round_trip(inventory):
+    data_file = inventory()
+    tracker = EquipmentTracker(data_file, journal=True, background_compaction=False)
+    new_id = make_changes(tracker)
+    expected = tracker.get_all_equipment()
+
+    tracker.compact(force=True)
+    assert not os.path.exists(tracker._journal.path)
+    assert not os.path.exists(tracker._journal.rotated_path)
+    with open(data_file) as f:
+        assert sorted(json.load(f), key=lambda x: x['id'], reverse=True) == expected
+
+    # Ids handed out before compaction are never reused
+    reloaded = EquipmentTracker(data_file, journal=True, background_compaction=False)
+    reloaded.delete_equipment(new_id)
+    reloaded.compact(force=True)
+    assert EquipmentTracker(data_file).add_equipment('Next', 1.0) == new_id + 1
+
+
+def test_unfinished_compaction_is_replayed(inventory):
+    data_file = inventory()
+    tracker = EquipmentTracker(data_file, journal=True, background_compaction=False)
+    make_changes(tracker)
+    expected = tracker.get_all_equipment()
+
+    # A crash after rotating: the rotated entries are still applied, and a
+    # later rotation folds the live journal into them
+    assert tracker._journal.rotate()
+    tracker.update_equipment(3, condition='Poor')
+    expected = tracker.get_all_equipment()
+    assert tracker._journal.rotate()
+    assert not os.path.exists(tracker._journal.path)
+
+    reloaded = EquipmentTracker(data_file, journal=True, background_compaction=False)
+    assert reloaded.get_all_equipment() == expected
+
+
+def test_torn_final_line_is_ignored(tmp_path):
+    journal = ChangeJournal(str(tmp_path / 'data.json'))
+    journal.append({'op': 'delete', 'id': 1})
+    with open(journal.path, 'a') as f:
+        f.write('{"op": "delete", "id"')
+    assert journal.read_all() == [{'op': 'delete', 'id': 1}]
+
+
+def test_append_after_torn_line(tmp_path):
+    journal = ChangeJournal(str(tmp_path / 'data.json'))
+    journal.append({'op': 'delete', 'id': 1})
+    with open(journal.path, 'a') as f:
+        f.write('{"op": "delete", "id"')
+    journal.append({'op': 'delete', 'id': 2})
+    assert ChangeJournal(str(tmp_path / 'data.json')).read_all() == [
+        {'op': 'delete', 'id': 1}, {'op': 'delete', 'id': 2}]
+
+
+def test_changes_after_a_crash_survive_a_restart(inventory):
+    data_file = inventory()
+    tracker = EquipmentTracker(data_file, journal=True, background_compaction=False)
+    first = tracker.add_equipment('Before the crash', 1.0)
+    with open(tracker._journal.path, 'a') as f:
+        f.write('{"op":"update","id":1,"fie')  # died mid-append
+
+    restarted = EquipmentTracker(data_file, journal=True, background_compaction=False)
+    second = restarted.add_equipment('After the crash', 2.0)
+    restarted.update_equipment(1, description='Edited after the crash')
+    restarted.delete_equipment(2)
+    expected = restarted.get_all_equipment()
+
+    reloaded = EquipmentTracker(data_file, journal=True, background_compaction=False)
+    assert reloaded.get_all_equipment() == expected
+    assert reloaded.get_equipment_by_id(first)['description'] == 'Before the crash'
+    assert reloaded.get_equipment_by_id(second)['description'] == 'After the crash'
+    assert reloaded.get_equipment_by_id(1)['description'] == 'Edited after the crash'
+
+
+def test_rotation_folds_past_a_torn_line(inventory):
+    data_file = inventory()
+    tracker = EquipmentTracker(data_file, journal=True, background_compaction=False)
+    tracker.update_equipment(1, condition='Poor')
+    with open(tracker._journal.path, 'a') as f:
+        f.write('{"op":"del')
+    assert tracker._journal.rotate()  # the torn line moves aside with the rest
+    tracker.update_equipment(2, condition='Fair')
+    assert tracker._journal.rotate()  # and is cut off before folding
+
+    reloaded = EquipmentTracker(data_file, journal=True, background_compaction=False)
+    assert reloaded.get_equipment_by_id(1)['condition'] == 'Poor'
+    assert reloaded.get_equipment_by_id(2)['condition'] == 'Fair'
@@ -0,0 +1,77 @@
+# test_page_cache.py
+import pytest
+
+pytest.importorskip('flask')
+
+import equipment  # noqa: E402
+from equipment import EquipmentTracker  # noqa: E402
+from page_cache import PageCache  # noqa: E402
+
+
+@pytest.fixture
+def tracker(inventory):
+    return EquipmentTracker(inventory(), background_compaction=False)
+
+
+def test_repeat_views_are_served_from_the_cache(tracker, client):
+    http = client(tracker)
+    first = http.get('/').get_data()
+    assert http.get('/').get_data() == first
+    http.get('/search?q=yaesu')
+    http.get('/search?q=icom')
+    assert equipment.page_cache.stats()['hits'] == 1
+    assert equipment.page_cache.stats()['entries'] == 3
+
+
+@pytest.mark.parametrize('change', [
+    lambda tracker: tracker.add_equipment('Freshly added rig', 1.0),
+    lambda tracker: tracker.update_equipment(200, description='Freshly added rig'),
+    lambda tracker: tracker.delete_equipment(200),
+])
+def test_writes_invalidate_cached_pages(tracker, client, change):
+    http = client(tracker)
+    before = http.get('/').get_data(as_text=True)
+    http.get('/search?q=freshly')
+    change(tracker)
+    after = http.get('/').get_data(as_text=True)
+    assert after != before
+    assert equipment.page_cache.stats()['invalidations'] == 1
+    searched = http.get('/search?q=freshly').get_data(as_text=True)
+    assert ('Freshly added rig' in searched) == ('Freshly added rig' in after)
+
+
+def test_another_process_writing_invalidates(inventory, client):
+    data_file = inventory()
+    http = client(EquipmentTracker(data_file, background_compaction=False))
+    http.get('/')
+    EquipmentTracker(data_file, background_compaction=False).add_equipment('From elsewhere', 1.0)
+    assert 'From elsewhere' in http.get('/').get_data(as_text=True)
+
+
+def test_flash_messages_are_not_cached(tracker, client):
+    http = client(tracker)
+    http.get('/')
+    page = http.post('/add', data={'description': 'Flashed rig', 'cost': '10'},
+                     follow_redirects=True).get_data(as_text=True)
+    assert 'added successfully' in page
+    # The flash was shown once; the next view is a plain render
+    plain = http.get('/').get_data(as_text=True)
+    assert 'Flashed rig' in plain and 'added successfully' not in plain
+    assert http.get('/').get_data(as_text=True) == plain
+
+def test_lru_eviction():
+    cache = PageCache(max_entries=2)
+    cache.put('v1', 'a', 'A')
+    cache.put('v1', 'b', 'B')
+    assert cache.get('v1', 'a') == 'A'
+    cache.put('v1', 'c', 'C')  # evicts b, the least recently used
+    assert cache.get('v1', 'b') is None
+    assert cache.get('v1', 'a') == 'A' and cache.get('v1', 'c') == 'C'
+    assert cache.get('v2', 'a') is None  # new version, empty cache
+    assert cache.stats()['evictions'] == 1 and cache.stats()['invalidations'] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = PageCache(max_entries=0)
+    cache.put('v1', 'a', 'A')
+    assert cache.get('v1', 'a') is None
@@ -0,0 +1,86 @@
+# test_pagination.py
+import pytest
+
+pytest.importorskip('flask')
+
+from equipment import EquipmentTracker  # noqa: E402
+from sqlite_store import SQLiteEquipmentTracker, migrate_json  # noqa: E402
+
+
+@pytest.fixture(params=['json', 'columnar', 'sqlite'])
+def tracker(request, inventory, tmp_path):
+    data_file = inventory(230)
+    if request.param == 'sqlite':
+        db_file = str(tmp_path / 'equipment.db')
+        migrate_json(data_file, db_file)
+        return SQLiteEquipmentTracker(db_file)
+    return EquipmentTracker(data_file, columnar=request.param == 'columnar',
+                            background_compaction=False)
+
+
+def walk(get_page):
+    """Follow next cursors from the first page; returns every item's id"""
+    seen, cursor = [], None
+    while True:
+        page, cursor = get_page(cursor)
+        seen.extend(item['id'] for item in page)
+        if cursor is None:
+            return seen
+
+
+def test_dashboard_pages_cover_everything_newest_first(tracker):
+    seen = walk(lambda cursor: tracker.get_equipment_page(50, cursor))
+    assert seen == sorted(range(1, 231), reverse=True)
+
+
+@pytest.mark.parametrize('mode', ['token', 'substring', 'scan'])
+def test_search_pages_match_full_search(tracker, mode):
+    expected = [item['id'] for item in tracker.search_equipment('yaesu', mode)]
+    seen = walk(lambda cursor: tracker.search_page('yaesu', mode, 7, cursor))
+    if isinstance(tracker, EquipmentTracker) and mode == 'token':
+        assert seen == expected  # ranked, with score:id cursors
+    else:
+        assert sorted(seen, reverse=True) == seen
+        assert sorted(seen) == sorted(expected)
+
+
+def test_token_cursor_carries_score_and_id(inventory):
+    tracker = EquipmentTracker(inventory(230), background_compaction=False)
+    page, cursor = tracker.search_page('yaesu ft', limit=5)
+    score, equipment_id = cursor.split(':')
+    assert int(equipment_id) == page[-1]['id'] and int(score) > 0
+
+
+def test_api_pages(tracker, client):
+    http = client(tracker)
+    seen = walk(lambda cursor: _api_page(http, '/api/equipment?limit=100', cursor))
+    assert seen == sorted(range(1, 231), reverse=True)
+    expected = [item['id'] for item in tracker.search_equipment('icom')]
+    seen = walk(lambda cursor: _api_page(http, '/api/search?q=icom&limit=9', cursor))
+    assert sorted(seen) == sorted(expected)
+
+
+def _api_page(http, url, cursor):
+    if cursor:
+        url += f'&cursor={cursor}'
+    response = http.get(url)
+    assert response.status_code == 200
+    return response.json['items'], response.json['next_cursor']
+
+
+@pytest.mark.parametrize('url', ['/?cursor=abc', '/api/equipment?cursor=abc',
+                                 '/search?q=yaesu&cursor=abc', '/api/search?q=yaesu&cursor=1:x',
+                                 '/api/search?q=yaesu&cursor=abc',
+                                 '/api/search?q=400XD&mode=substring&cursor=x'])
+def test_bad_cursor_is_400(inventory, client, url):
+    http = client(EquipmentTracker(inventory(), background_compaction=False))
+    assert http.get(url).status_code == 400
+
+
+def test_page_links(inventory, client):
+    http = client(EquipmentTracker(inventory(120), background_compaction=False))
+    dashboard = http.get('/').get_data(as_text=True)
+    assert '/?limit=50&amp;cursor=71' in dashboard
+    assert 'q=' not in dashboard.split('card-footer')[1]
+    results = http.get('/search?q=yaesu&mode=substring&limit=5').get_data(as_text=True)
+    assert 'q=yaesu&amp;mode=substring' in results.split('card-footer')[1]
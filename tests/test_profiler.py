@@ -0,0 +1,51 @@
+# test_profiler.py
+import cProfile
+import pstats
+
+import pytest
+
+pytest.importorskip('flask')
+
+import equipment  # noqa: E402
+from equipment import EquipmentTracker  # noqa: E402
+from profiler import code_key, outermost  # noqa: E402
+from sqlite_store import SQLiteEquipmentTracker  # noqa: E402
+
+
+def inner():
+    return sum(range(20000))
+
+
+def outer():
+    return inner() + inner()
+
+
+def test_outermost_counts_nested_calls_once():
+    profile = cProfile.Profile()
+    profile.runcall(outer)
+    stats = pstats.Stats(profile)
+    keys = [code_key(outer), code_key(inner)]
+    assert outermost(stats, keys) == pytest.approx(stats.stats[code_key(outer)][3])
+
+
+def tracker_seconds(call) -> float:
+    profile = cProfile.Profile()
+    profile.runcall(call)
+    stats = pstats.Stats(profile)
+    seconds = equipment._profile_sections(stats)['tracker']
+    # Nothing in the profile ran outside the tracker, so its share can't
+    # exceed the profile's total
+    assert seconds <= stats.total_tt * 1.001
+    return seconds
+
+
+def test_tracker_section_within_profile(inventory, tmp_path):
+    tracker = EquipmentTracker(inventory(count=2000), background_compaction=False)
+    # search_page is wrapped by _searches around _reads
+    assert tracker_seconds(lambda: tracker.search_page('radio')) > 0
+    assert tracker_seconds(lambda: tracker.search_page('radio', mode='substring')) > 0
+
+    sqlite = SQLiteEquipmentTracker(str(tmp_path / 'equipment.db'))
+    sqlite.import_records([tracker.get_all_equipment()])
+    # get_equipment_page calls search_page
+    assert tracker_seconds(lambda: sqlite.get_equipment_page(limit=500)) > 0
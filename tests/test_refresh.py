@@ -0,0 +1,62 @@
+# test_refresh.py
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip('flask')
+
+from equipment import EquipmentTracker  # noqa: E402
+from snapshot import json_to_snapshot  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def edit_in_other_process(data_file, **options):
+    """Add, edit and delete through a tracker in a separate process;
+    returns the new item's id"""
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {ROOT!r})
+        from equipment import EquipmentTracker
+        tracker = EquipmentTracker({data_file!r}, background_compaction=False, **{options!r})
+        new_id = tracker.add_equipment('Other process radio', 77.0)
+        tracker.update_equipment(4, description='Edited elsewhere', cost=9.5)
+        tracker.delete_equipment(6)
+        print(new_id)
+    """)
+    result = subprocess.run([sys.executable, '-c', script], check=True,
+                            capture_output=True, text=True, cwd=os.path.dirname(data_file))
+    return int(result.stdout)
+
+
+@pytest.mark.parametrize('options', [{}, {'journal': True}, {'columnar': True},
+                                     {'snapshot': True}, {'snapshot': True, 'journal': True}],
+                         ids=['json', 'journal', 'columnar', 'snapshot', 'snapshot-journal'])
+def test_refresh_picks_up_other_process(inventory, tmp_path, options):
+    options = dict(options)
+    data_file = inventory()
+    if options.pop('snapshot', False):
+        snapshot_file = str(tmp_path / 'equipment_data.snap')
+        json_to_snapshot(data_file, snapshot_file)
+        data_file = snapshot_file
+    tracker = EquipmentTracker(data_file, background_compaction=False, **options)
+    tracker.build_indexes(substring=True)
+    tag = tracker.version_tag
+
+    new_id = edit_in_other_process(data_file, **options)
+
+    assert tracker.get_equipment_by_id(new_id)['description'] == 'Other process radio'
+    assert tracker.get_equipment_by_id(4)['cost'] == 9.5
+    assert tracker.get_equipment_by_id(6) is None
+    assert [item['id'] for item in tracker.search_equipment('elsewhere')] == [4]
+    assert [item['id'] for item in tracker.search_equipment('other process', 'substring')] == [new_id]
+    assert tracker.version_tag != tag
+    assert tracker.check_totals() == {}
+
+    # Ids keep counting from the other process's
+    assert tracker.add_equipment('Local radio', 1.0) == new_id + 1
+    fresh = EquipmentTracker(data_file, background_compaction=False, **options)
+    assert fresh.get_all_equipment() == tracker.get_all_equipment()
@@ -0,0 +1,109 @@
+# test_search.py
+import threading
+
+import pytest
+
+pytest.importorskip('flask')
+
+import equipment  # noqa: E402
+from equipment import EquipmentTracker  # noqa: E402
+from search_index import TokenIndex  # noqa: E402
+
+
+def ids(results):
+    return [item['id'] for item in results]
+
+
+@pytest.fixture
+def radios(catalog):
+    return EquipmentTracker(catalog(
+        {'description': 'Yaesu FT-991A'},                               # 1
+        {'description': 'Yaesumod FT-891'},                             # 2
+        {'description': 'Icom IC-7300', 'resale_location': 'Yaesu shop'},  # 3
+        {'description': 'Yaesu FT-891'},                                # 4
+        {'description': 'Kenwood TS-590SG', 'condition': 'Fair'},       # 5
+    ), background_compaction=False)
+
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_token_ranking(catalog, columnar):
+    tracker = EquipmentTracker(catalog(
+        {'description': 'Yaesu FT-991A'},
+        {'description': 'Yaesumod FT-891'},
+        {'description': 'Icom IC-7300', 'resale_location': 'Yaesu shop'},
+        {'description': 'Yaesu FT-891'},
+    ), columnar=columnar, background_compaction=False)
+    # Whole word in the description, then a prefix of one, then another
+    # field; ties go to the newest item
+    assert ids(tracker.search_equipment('yaesu')) == [4, 1, 2, 3]
+    assert ids(tracker.search_equipment('YAE')) == [4, 2, 1, 3]
+
+
+def test_every_term_must_match(radios):
+    assert ids(radios.search_equipment('yaesu 991')) == [1]
+    assert ids(radios.search_equipment('icom yaesu')) == [3]  # across fields
+    assert ids(radios.search_equipment('yaesu kenwood')) == []
+    assert ids(radios.search_equipment('fair')) == [5]
+
+
+def test_query_without_words_scans(radios):
+    assert ids(radios.search_equipment('-')) == [1, 2, 3, 4, 5]
+
+
+def test_index_follows_edits(radios):
+    radios.search_equipment('yaesu')  # builds the index
+    radios.update_equipment(4, description='Elecraft KX3')
+    radios.delete_equipment(1)
+    new_id = radios.add_equipment('Yaesu FT-710', 900.0)
+    assert ids(radios.search_equipment('yaesu')) == [new_id, 2, 3]
+    assert ids(radios.search_equipment('kx3')) == [4]
+
+
+def test_index_builds_without_blocking_writers(radios, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    class SlowIndex(TokenIndex):
+        def add(self, equipment):
+            started.set()
+            release.wait(10)
+            super().add(equipment)
+
+    monkeypatch.setattr(equipment, 'TokenIndex', SlowIndex)
+    searcher = threading.Thread(target=lambda: results.extend(radios.search_equipment('yaesu')))
+    results = []
+    searcher.start()
+    assert started.wait(10)
+    # The build is under way; writes still go through, and get replayed
+    radios.update_equipment(1, description='Icom IC-705')
+    new_id = radios.add_equipment('Yaesu FT-5DR', 400.0)
+    radios.delete_equipment(2)
+    release.set()
+    searcher.join(10)
+
+    assert ids(results) == [new_id, 4, 3]
+    assert ids(radios.search_equipment('ic')) == [3, 1]
+
+
+def test_substring_matches_scan(inventory):
+    tracker = EquipmentTracker(inventory(500), background_compaction=False)
+    for query in ['400XD', 'ft-', 'DR/D', 'used on', 'xcellen', 'zzz', 'qr', '5']:
+        expected = ids(tracker.search_equipment(query, 'scan'))
+        assert ids(tracker.search_equipment(query, 'substring')) == expected, query
+    assert tracker.search_equipment('400XD', 'substring')
+
+
+def test_substring_is_exact_inside_words(radios):
+    # Substring search finds text inside a word, which token search can't
+    assert ids(radios.search_equipment('esumo', 'substring')) == [2]
+    assert ids(radios.search_equipment('esumo')) == []
+    assert ids(radios.search_equipment('-891', 'substring')) == [2, 4]
+    assert ids(radios.search_equipment('FT-8', 'substring')) == [2, 4]
+
+
+def test_trigram_index_follows_edits(radios):
+    radios.search_equipment('891', 'substring')  # builds the index
+    radios.update_equipment(4, description='Yaesu FT-710')
+    radios.delete_equipment(2)
+    new_id = radios.add_equipment('Spare FT-891 mic', 20.0)
+    assert ids(radios.search_equipment('-891', 'substring')) == [new_id]
+    assert ids(radios.search_equipment('ft-7', 'substring')) == [4]
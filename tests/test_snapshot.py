@@ -0,0 +1,109 @@
+# test_snapshot.py
+import json
+
+import pytest
+
+pytest.importorskip('flask')
+
+from equipment import DataFileError, EquipmentTracker  # noqa: E402
+from snapshot import (Snapshot, SnapshotError, diff_store, is_snapshot,  # noqa: E402
+                      json_to_snapshot, load_store, read_records, snapshot_to_json,
+                      write_snapshot)
+
+
+def by_id(records):
+    return {item['id']: dict(item) for item in records}
+
+
+def test_json_round_trip(inventory, tmp_path):
+    data_file = inventory()
+    snapshot_file = str(tmp_path / 'equipment_data.snap')
+    back_file = str(tmp_path / 'back.json')
+    assert json_to_snapshot(data_file, snapshot_file) == 200
+    assert is_snapshot(snapshot_file) and not is_snapshot(data_file)
+    snapshot_to_json(snapshot_file, back_file)
+    with open(data_file) as f, open(back_file) as g:
+        assert by_id(json.load(g)) == by_id(json.load(f))
+
+
+def test_missing_and_extra_fields(tmp_path):
+    path = str(tmp_path / 'odd.snap')
+    records = [
+        {'id': 1, 'description': 'Ünïcode ☃ radio', 'cost': 1.5, 'purchase_date': '2020-01-01',
+         'current_retail': 0.0, 'current_resale': 0.0, 'resale_location': '',
+         'condition': 'Good', 'date_added': '2020-01-01 00:00:00'},
+        # No purchase_date: a missing string comes back missing
+        {'id': 7, 'description': '', 'cost': 0.0,
+         'current_retail': 2.0, 'current_resale': 1.0, 'resale_location': 'QRZ',
+         'condition': 'Poor', 'date_added': '2020-01-02 00:00:00',
+         'last_updated': '2020-02-02 00:00:00', 'serial': 'AB123'},
+    ]
+    write_snapshot(path, records)
+    assert by_id(read_records(path)) == by_id(records)
+
+
+def test_tracker_saves_round_trip(inventory, tmp_path):
+    snapshot_file = str(tmp_path / 'equipment_data.snap')
+    json_to_snapshot(inventory(), snapshot_file)
+    tracker = EquipmentTracker(snapshot_file, background_compaction=False)
+    new_id = tracker.add_equipment('Snapshot radio', 42.0)
+    tracker.update_equipment(5, description='Edited in the snapshot', condition='Fair')
+    tracker.delete_equipment(9)
+
+    assert by_id(read_records(snapshot_file)) == by_id(tracker.get_all_equipment())
+    reloaded = EquipmentTracker(snapshot_file, background_compaction=False)
+    assert reloaded.get_all_equipment() == tracker.get_all_equipment()
+    assert reloaded.get_equipment_by_id(new_id)['description'] == 'Snapshot radio'
+    assert reloaded.search_equipment('edited')[0]['id'] == 5
+
+
+def test_diff_store_finds_only_changed_items(inventory, tmp_path):
+    snapshot_file = str(tmp_path / 'equipment_data.snap')
+    json_to_snapshot(inventory(), snapshot_file)
+    store = load_store(snapshot_file)
+
+    records = by_id(read_records(snapshot_file))
+    records[3]['description'] = 'Changed text'
+    records[4]['cost'] = 1.25
+    records[6]['condition'] = 'Poor' if records[6]['condition'] != 'Poor' else 'Good'
+    del records[8]
+    records[500] = dict(records[10], id=500)
+    changed_file = str(tmp_path / 'changed.snap')
+    write_snapshot(changed_file, records)
+
+    snapshot = Snapshot(changed_file)
+    try:
+        changes = diff_store(store, snapshot, include=[12])
+    finally:
+        snapshot.close()
+    assert set(changes) == {3, 4, 6, 8, 12, 500}
+    assert changes[8] is None
+    for equipment_id in (3, 4, 6, 12, 500):
+        assert changes[equipment_id] == records[equipment_id]
+
+
+def rewrite_header(path, old, new):
+    """Edit the JSON header in place, keeping its length"""
+    assert len(old) == len(new)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data.replace(old, new, 1))
+
+
+def test_unknown_version_is_rejected(inventory, tmp_path):
+    path = str(tmp_path / 'equipment_data.snap')
+    json_to_snapshot(inventory(), path)
+    rewrite_header(path, b'"version": 1', b'"version": 9')
+    with pytest.raises(SnapshotError, match='version 9'):
+        load_store(path)
+    with pytest.raises(DataFileError, match='version 9'):
+        EquipmentTracker(path, background_compaction=False)
+
+
+def test_missing_column_is_rejected(inventory, tmp_path):
+    path = str(tmp_path / 'equipment_data.snap')
+    json_to_snapshot(inventory(), path)
+    rewrite_header(path, b'"digest"', b'"digesx"')
+    with pytest.raises(SnapshotError, match='missing columns digest'):
+        read_records(path)
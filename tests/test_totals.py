@@ -0,0 +1,46 @@
+# test_totals.py
+import math
+
+import pytest
+
+pytest.importorskip('flask')
+
+from equipment import EquipmentTracker  # noqa: E402
+
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_running_totals_match_recomputed(inventory, columnar):
+    tracker = EquipmentTracker(inventory(500), columnar=columnar, background_compaction=False)
+    assert tracker.check_totals() == {}
+    for i in range(1, 100):
+        tracker.update_equipment(i, cost=i * 0.1, current_resale=i / 3)
+    for i in range(100, 150):
+        tracker.delete_equipment(i)
+    tracker.add_equipment('New radio', 0.3, current_retail=1e-3)
+    assert tracker.check_totals() == {}
+
+    items = tracker.get_all_equipment()
+    totals = tracker.get_total_value()
+    assert math.isclose(totals['total_cost'], math.fsum(item['cost'] for item in items))
+    assert totals['count'] == len(items)
+
+
+def test_check_totals_reports_and_repairs_drift(inventory):
+    tracker = EquipmentTracker(inventory(), background_compaction=False)
+    expected = tracker.get_total_value()['total_cost']
+    tracker._totals['total_cost'] += 5.0
+
+    drift = tracker.check_totals()
+    assert set(drift) == {'total_cost'}
+    assert math.isclose(drift['total_cost'], 5.0)
+    assert tracker.check_totals() == drift  # reporting alone changes nothing
+
+    assert tracker.check_totals(repair=True) == drift
+    assert tracker.check_totals() == {}
+    assert tracker.get_total_value()['total_cost'] == expected
+
+
+def test_rounding_is_not_drift(inventory):
+    tracker = EquipmentTracker(inventory(), background_compaction=False)
+    tracker._totals['total_cost'] *= 1 + 1e-12
+    assert tracker.check_totals() == {}
@@ -0,0 +1,18 @@
+# wsgi.py
+"""Production entry point: ``gunicorn wsgi:app``.
+
+Serves the dashboard and the exports from the shipped templates; nothing
+is written at start-up. Run ``flask --app wsgi precompile-templates`` once
+per deploy so workers load compiled templates from the bytecode cache.
+"""
+import importlib.util
+import os
+
+# equiptment-with-exports.py is not an importable module name
+_spec = importlib.util.spec_from_file_location(
+    'equipment_exports',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'equiptment-with-exports.py'))
+_exports = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_exports)
+
+app = _exports.app